@@ -1,149 +1,433 @@
-import time
-import random
-import pandas as pd
-from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
 from fake_useragent import UserAgent
 import re
-from typing import List, Dict, Optional
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 import logging
-import os
+from driver_pool import DriverPool, create_driver
+from page_parser import PRODUCT_FIELDS, SearchPageParser, build_product
+from fetcher import BaseFetcher, FallbackFetcher, FetchResult, HttpFetcher, SeleniumFetcher
+from page_cache import CachingFetcher, PageCache
+from checkpoint import CrawlCheckpoint
+from sinks import ProductSink, XlsxSink
+from filter_engine import ProductFrame, product_matches
+from rate_limiter import AdaptiveRateLimiter, RateLimitedFetcher
+from query_planner import QueryPlan, plan_query
+from product_store import ProductStore
+from marketplace import get_marketplace
+from enrichment import DetailEnricher, split_filters
+from metrics import CrawlMetrics
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# 一次 execute_script 调用提取整页所有商品卡片，避免每个字段一次 WebDriver 往返
+EXTRACT_PRODUCTS_JS = r"""
+const cards = document.querySelectorAll("[data-component-type='s-search-result']");
+// 已出现过的 ASIN，这些卡片不提取字段
+const skip = new Set(arguments[0] || []);
+// 站点语言的配送关键词
+const deliveryWords = arguments[1] || ["配送", "送达"];
+const textOf = (el) => el ? (el.innerText || el.textContent || "").trim() : null;
+const pick = (root, sel) => root.querySelector(sel);
+const results = [];
+for (const card of cards) {
+    if (skip.has(card.getAttribute("data-asin"))) {
+        continue;
+    }
+    const item = {};
+    let titleElem = pick(card, '[data-cy="title-recipe"] a.a-link-normal');
+    if (titleElem) {
+        item.url = titleElem.href || titleElem.getAttribute("href");
+        item.name = textOf(titleElem);
+    } else {
+        item.name = textOf(pick(card, ".a-text-normal"));
+    }
+    const priceElem = pick(card, ".a-price .a-offscreen");
+    item.price = priceElem ? priceElem.textContent.trim() : null;
+    const ratingElem = pick(card, "i.a-icon-star-small span.a-icon-alt");
+    item.rating = ratingElem ? (ratingElem.innerHTML || ratingElem.textContent) : null;
+    item.reviews = textOf(pick(card, "span.a-size-base.s-underline-text"));
+    item.asin = card.getAttribute("data-asin");
+    const imgElem = pick(card, "img.s-image");
+    item.image = imgElem ? (imgElem.src || imgElem.getAttribute("src")) : null;
+    const promoElem = pick(card, ".a-price.a-text-price .a-offscreen");
+    if (promoElem) {
+        item.promotion = promoElem.textContent.trim();
+    } else {
+        item.promotion = textOf(pick(card, ".a-size-base.a-color-secondary"));
+    }
+    const deliveryElem = pick(card, '[data-cy="delivery-recipe"] .a-row.a-size-base.a-color-secondary');
+    if (deliveryElem) {
+        item.delivery = textOf(deliveryElem);
+    } else {
+        item.delivery = null;
+        for (const span of card.querySelectorAll("span")) {
+            const text = (span.textContent || "").trim();
+            if (deliveryWords.some((word) => text.includes(word))) {
+                item.delivery = text;
+                break;
+            }
+        }
+    }
+    results.push(item);
+}
+return results;
+"""
+
+# 搜索结果页上应当能提取到的字段（店铺信息只在详情页上），用于统计选择器缺失
+SEARCH_PAGE_FIELDS = [field for field in PRODUCT_FIELDS if field not in ("店铺名称", "店铺评分")]
+
+# 只读取整页商品卡片的 data-asin，用于在提取字段之前去重
+CARD_ASINS_JS = r"""
+return Array.from(document.querySelectorAll("[data-component-type='s-search-result']"),
+                  (card) => card.getAttribute("data-asin"));
+"""
+
+
+def build_search_url(keyword: str, page: int = 1, params: Optional[Dict[str, str]] = None,
+                     marketplace=None) -> str:
+    """
+    构造搜索结果页 URL
+
+    Args:
+        keyword: 搜索关键词
+        page: 页码
+        params: 额外的筛选 / 排序参数（见 query_planner.plan_query）
+        marketplace: 站点代码或 Marketplace，默认读取 CRAWLER_CONFIG["marketplace"]
+    """
+    return get_marketplace(marketplace).search_url(keyword, page, params)
+
+
 class AmazonCrawler:
-    def __init__(self, headless: bool = True):
+    # 支持的提取模式：script 为单次脚本批量提取，html 为离线解析 page_source，element 为逐字段查找元素
+    EXTRACT_MODES = ("script", "html", "element")
+    # 支持的页面获取后端：http 为连接池 HTTP 请求（被拦截时升级到浏览器），browser 为始终使用浏览器
+    FETCH_BACKENDS = ("http", "browser")
+
+    def __init__(self, headless: bool = True, extract_mode: str = "script",
+                 fetch_backend: str = "http", fetcher: Optional[BaseFetcher] = None,
+                 driver_pool: Optional[DriverPool] = None, cache: Optional[PageCache] = None,
+                 cache_mode: str = "normal", checkpoint: Optional[CrawlCheckpoint] = None,
+                 rate_limiter: Optional[AdaptiveRateLimiter] = None, deduper=None, marketplace=None,
+                 enricher: Optional[DetailEnricher] = None, metrics: Optional[CrawlMetrics] = None):
         """
         初始化亚马逊爬虫
         
         Args:
             headless: 是否使用无头模式
+            extract_mode: 浏览器页面的商品信息提取模式，"script" 一次脚本调用提取整页，
+                          "html" 读取一次 page_source 后用 lxml 解析，"element" 逐个元素提取
+            fetch_backend: 页面获取后端，"http" 仅在遇到验证码时才启动浏览器，"browser" 始终使用浏览器
+            fetcher: 自定义页面获取后端，传入时忽略 fetch_backend
+            driver_pool: 共享的浏览器池，传入时从池中借用浏览器而不是启动新的 Chrome
+            cache: 页面缓存，传入时优先从缓存读取搜索页
+            cache_mode: 缓存模式，"normal"、"refresh" 或 "replay"（只读缓存，不产生任何网络请求）
+            checkpoint: 爬取检查点，传入时跳过已完成的页面，每完成一页立即记录，关键词正常爬完后清除其记录
+            rate_limiter: 按主机的自适应限速器，可在多个爬虫之间共享，默认为每个爬虫新建一个
+            deduper: ASIN 去重器（dedup.ExactDeduper / BloomDeduper），传入时跨页面、跨关键词跳过已出现的商品，
+                     重复的卡片不提取字段；None 表示不去重
+            marketplace: 站点代码（见 marketplace.MARKETPLACES）或 Marketplace，默认读取 CRAWLER_CONFIG["marketplace"]
+            enricher: 商品详情补全，传入时 search_products 在后台获取详情页补全店铺名称、店铺评分等字段
+            metrics: 爬取指标（各阶段耗时、计数、字段缺失），可在多个爬虫之间共享，默认为每个爬虫新建一个
         """
+        if extract_mode not in self.EXTRACT_MODES:
+            raise ValueError(f"不支持的提取模式: {extract_mode}，可选值: {self.EXTRACT_MODES}")
+        if fetch_backend not in self.FETCH_BACKENDS:
+            raise ValueError(f"不支持的获取后端: {fetch_backend}，可选值: {self.FETCH_BACKENDS}")
+
         self.driver = None
+        self.driver_pool = driver_pool
+        self._lease = None
         self.headless = headless
+        self.extract_mode = extract_mode
+        self.fetch_backend = fetch_backend
+        self.checkpoint = checkpoint
+        self.deduper = deduper
+        self.marketplace = get_marketplace(marketplace)
+        self.enricher = enricher
+        self.page_parser = SearchPageParser(marketplace=self.marketplace)
         self.ua = UserAgent()
-        self.setup_driver()
+
+        # 限速放在缓存之下，命中缓存的页面不需要等待
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter()
+        # 传入的 fetcher、cache、enricher、checkpoint 可能被多个爬虫共享，close() 时只关闭自己创建的获取后端
+        self._shared_fetcher = fetcher is not None
+        browser_fetcher = RateLimitedFetcher(SeleniumFetcher(self._get_driver), self.rate_limiter)
+        if fetcher is not None:
+            self.fetcher = RateLimitedFetcher(fetcher, self.rate_limiter)
+        elif fetch_backend == "http":
+            # 浏览器按需启动，只有 HTTP 请求被拦截时才会创建
+            http_fetcher = HttpFetcher(self.ua, headers=self.marketplace.headers)
+            self.fetcher = FallbackFetcher(RateLimitedFetcher(http_fetcher, self.rate_limiter), browser_fetcher)
+        else:
+            self.fetcher = browser_fetcher
+            if driver_pool is None and not (cache is not None and cache_mode == "replay"):
+                self.setup_driver()
+
+        if cache is not None:
+            self.fetcher = CachingFetcher(self.fetcher, cache, cache_mode)
+
+        self.metrics = metrics or CrawlMetrics()
+        self._register_collectors()
+
+    def _register_collectors(self):
+        """把限速器、页面缓存、去重器和卖家缓存的当前状态登记到指标中"""
+        self.metrics.register("rate_limiter", self.rate_limiter.stats, label="host")
+        if isinstance(self.fetcher, CachingFetcher):
+            fetcher = self.fetcher
+            self.metrics.register("page_cache", lambda: {"hits": fetcher.hits, "misses": fetcher.misses})
+        self.metrics.register("dedup", lambda: {"seen": len(self.deduper)} if self.deduper is not None else {})
+        seller_cache = getattr(self.enricher, "seller_cache", None)
+        if seller_cache is not None:
+            self.metrics.register("seller_cache", lambda: dict(seller_cache.stats))
+
+    def _get_driver(self):
+        """获取浏览器驱动，首次调用时才启动 Chrome"""
+        if self.driver is None:
+            self.setup_driver()
+        return self.driver
     
     def setup_driver(self):
         """设置Chrome浏览器驱动"""
         try:
-            chrome_options = Options()
-
-            if self.headless:
-                chrome_options.add_argument("--headless")
-
-            # 添加反检测参数
-            chrome_options.add_argument("--no-sandbox")
-            chrome_options.add_argument("--disable-dev-shm-usage")
-            chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-            chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-            chrome_options.add_experimental_option('useAutomationExtension', False)
-            chrome_options.add_argument(f"--user-agent={self.ua.random}")
-            driver_path = None  # 初始化路径变量
-            # 尝试运行ChromeDriver配置脚本
-            try:
-                from setup_chromedriver import setup_chromedriver_auto, check_chromedriver_exists
-
-                if setup_chromedriver_auto():
-                    logger.info("ChromeDriver配置成功")
-                    # 配置成功后再次检查本地路径
-                    existing_path = check_chromedriver_exists()
-                    driver_path = existing_path
-                else:
-                    driver_path = ChromeDriverManager().install()
-            except Exception as e:
-                logger.error(f"运行ChromeDriver配置脚本时出错: {e}")
-                raise Exception("ChromeDriver配置失败")
-
-            # 修复ChromeDriver路径问题 - 更精确的修复
-            if driver_path and os.path.isdir(driver_path):
-                # 如果是目录，查找chromedriver可执行文件
-                possible_paths = [
-                    os.path.join(driver_path, "chromedriver"),
-                    os.path.join(driver_path, "chromedriver-linux64", "chromedriver"),
-                    os.path.join(driver_path, "chromedriver.exe"),
-                    os.path.join(driver_path, "chromedriver-linux64", "chromedriver-linux64")
-                ]
-
-                for path in possible_paths:
-                    if os.path.exists(path) and os.access(path, os.X_OK):
-                        driver_path = path
-                        break
-                    
-            # 确保driver_path不为None
-            if not driver_path:
-                raise Exception("无法找到有效的ChromeDriver路径")
+            if self.driver_pool is not None:
+                # 从浏览器池借用预热好的浏览器，搜索结束后归还
+                self._lease = self.driver_pool.acquire()
+                self.driver = self._lease.driver
+                logger.info("已从浏览器池借用Chrome驱动")
+            else:
+                self.driver = create_driver(self.headless, self.ua.random)
 
-            logger.info(f"使用ChromeDriver路径: {driver_path}")
-
-            service = Service(driver_path)
-            self.driver = webdriver.Chrome(service=service, options=chrome_options)
-
-            # 执行反检测脚本
-            self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-
-            logger.info("Chrome驱动设置成功")
-            
         except Exception as e:
             logger.error(f"设置Chrome驱动失败: {e}")
             raise
+
+    def _release_driver(self, pages: int = 0, broken: bool = False):
+        """将借用的浏览器归还给浏览器池，broken 表示浏览器会话已不可用"""
+        if self._lease is not None:
+            self._lease.pages_served += pages
+            self.driver_pool.release(self._lease, broken)
+            self._lease = None
+            self.driver = None
     
-    def search_products(self, keyword: str, max_pages: int = 5) -> List[Dict]:
+    def search_products(self, keyword: str, max_pages: int = 5, sink: Optional[ProductSink] = None,
+                        collect: bool = True, filters: Optional[Dict] = None,
+                        department: Optional[str] = None, sort: Optional[str] = None) -> List[Dict]:
         """
         根据关键词搜索商品
         
         Args:
             keyword: 搜索关键词
             max_pages: 最大爬取页数
+            sink: 流式输出端，每解析完一页立即写入
+            collect: 是否在内存中收集并返回全部商品，配合 sink 设为 False 时内存占用不随页数增长
+            filters: 筛选条件，价格区间和最低评分下推为搜索 URL 参数，其余条件在客户端筛选
+                     （配置了 enricher 时，店铺评分条件在补全之后判断）
+            department: 品类别名（搜索 URL 的 i 参数）
+            sort: 排序方式，可选值见 query_planner.SORT_ORDERS
             
         Returns:
-            商品信息列表
+            商品信息列表（传入 filters 时只包含满足条件的商品，collect=False 时为空列表）
         """
+        plan = plan_query(keyword, filters, department, sort, self.marketplace)
+        residual = plan.residual_filters
+        detail_filters = {}
+        if self.enricher is not None:
+            residual, detail_filters = split_filters(residual)
         products = []
-        base_url = f"https://www.amazon.com/s?k={keyword.replace(' ', '+')}"
+        pending = deque()
+
+        def emit(items: List[Dict]):
+            if detail_filters:
+                items = [p for p in items if self._meets_criteria(p, detail_filters)]
+            if sink is not None:
+                with self.metrics.timer("sink_write"):
+                    sink.write(items)
+            if collect:
+                products.extend(items)
+            self.metrics.incr("products_kept", len(items))
+
+        for page_products in self.iter_pages(keyword, max_pages, plan):
+            if residual:
+                with self.metrics.timer("filter"):
+                    page_products = [p for p in page_products if self._meets_criteria(p, residual)]
+            if self.enricher is None:
+                emit(page_products)
+                continue
+            # 只补全通过搜索结果页筛选的商品；详情页在后台获取，不阻塞下一页的爬取
+            pending.extend(self.enricher.submit(product) for product in page_products)
+            self.metrics.incr("products_enriched", len(page_products))
+            emit(self.enricher.completed(pending))
+        if pending:
+            logger.info(f"等待 {len(pending)} 个商品的详情补全完成")
+            with self.metrics.timer("enrich_wait"):
+                completed = self.enricher.completed(pending, wait=True)
+            emit(completed)
+        return products
+
+    def iter_products(self, keyword: str, max_pages: int = 5, filters: Optional[Dict] = None,
+                      target_count: Optional[int] = None, department: Optional[str] = None,
+                      sort: Optional[str] = None) -> Iterator[Dict]:
+        """
+        按页惰性爬取商品，每解析完一页就逐个产出
+
+        调用方停止迭代（或达到 target_count）后不会再获取后续页面。
+
+        Args:
+            keyword: 搜索关键词
+            max_pages: 最大爬取页数
+            filters: 筛选条件，只产出满足条件的商品（能下推的条件会写入搜索 URL）
+            target_count: 产出的商品数量达到该值后停止爬取
+            department: 品类别名（搜索 URL 的 i 参数）
+            sort: 排序方式，可选值见 query_planner.SORT_ORDERS
+
+        Yields:
+            商品信息
+        """
+        produced = 0
+        if target_count is not None and target_count <= 0:
+            return
+        plan = plan_query(keyword, filters, department, sort, self.marketplace)
+        residual = plan.residual_filters
+        for page_products in self.iter_pages(keyword, max_pages, plan):
+            for product in page_products:
+                if residual and not self._meets_criteria(product, residual):
+                    continue
+                yield product
+                produced += 1
+                if target_count is not None and produced >= target_count:
+                    logger.info(f"已获取 {produced} 个目标商品，停止爬取")
+                    return
+
+    def iter_pages(self, keyword: str, max_pages: int = 5, plan: Optional[QueryPlan] = None) -> Iterator[List[Dict]]:
+        """
+        逐页爬取商品，每解析完一页产出该页的商品列表
+
+        Args:
+            keyword: 搜索关键词
+            max_pages: 最大爬取页数
+            plan: 搜索计划（URL 中的筛选 / 排序参数），None 表示不带任何参数
+
+        Yields:
+            每页的商品信息列表
+        """
+        plan = plan or QueryPlan(keyword, marketplace=self.marketplace)
+        # 不同筛选参数的结果页不同，检查点按参数区分
+        checkpoint_key = plan.checkpoint_key
+        browser_pages = 0
+        broken = False
+        # 正常爬完（到达最后一页或 max_pages）才清除检查点，被拦截、出错或调用方提前停止时保留
+        finished = False
+        completed = self.checkpoint.completed_pages(checkpoint_key) if self.checkpoint else {}
         
         try:
             for page in range(1, max_pages + 1):
+                if page in completed:
+                    # 检查点中已完成的页面直接复用
+                    record = completed[page]
+                    logger.info(f"第 {page} 页已在检查点中，跳过（{len(record.products)} 个商品）")
+                    self.metrics.incr("checkpoint_pages")
+                    if self.deduper is not None:
+                        # 检查点中的商品记录时已经去重，这里只登记 ASIN
+                        for product in record.products:
+                            self.deduper.add(product.get("ASIN"))
+                    yield record.products
+                    if not record.has_next:
+                        logger.info("已到达最后一页")
+                        finished = True
+                        break
+                    continue
+
                 logger.info(f"正在爬取第 {page} 页...")
                 
-                if page == 1:
-                    url = base_url
-                else:
-                    url = f"{base_url}&page={page}"
-                
-                self.driver.get(url)
-                time.sleep(random.uniform(2, 4))  # 随机延迟
-                
-                # 等待页面加载
-                WebDriverWait(self.driver, 10).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "[data-component-type='s-search-result']"))
-                )
-                
+                page_start = time.perf_counter()
+                url = plan.url(page)
+                with self.metrics.timer("fetch"):
+                    result = self.fetcher.fetch(url)
+                self.metrics.observe_timings(result.timings)
+                self.metrics.incr("pages", backend=result.backend)
+                if result.backend == SeleniumFetcher.backend:
+                    browser_pages += 1
+                if result.blocked:
+                    self.metrics.incr("blocked_pages")
+                    logger.warning(f"第 {page} 页被验证码拦截，停止爬取")
+                    break
+
                 # 解析商品信息
-                page_products = self._parse_products()
-                products.extend(page_products)
+                with self.metrics.timer("parse"):
+                    page_products, has_next = self._parse_fetch_result(result)
+                self.metrics.record_fields(page_products, SEARCH_PAGE_FIELDS)
+                self.metrics.incr("products_parsed", len(page_products))
+                with self.metrics.timer("dedup"):
+                    page_products = self._dedup(page_products)
+                if self.checkpoint:
+                    with self.metrics.timer("checkpoint"):
+                        self.checkpoint.record_page(checkpoint_key, page, page_products, has_next)
                 
-                logger.info(f"第 {page} 页爬取完成，获取到 {len(page_products)} 个商品")
+                self.metrics.record_page(keyword=keyword, page=page, backend=result.backend,
+                                         seconds=round(time.perf_counter() - page_start, 6),
+                                         products=len(page_products),
+                                         timings={phase: round(seconds, 6) for phase, seconds in result.timings.items()})
+                logger.info(f"第 {page} 页爬取完成（{result.backend}），获取到 {len(page_products)} 个商品")
+                yield page_products
                 
                 # 检查是否有下一页
-                if not self._has_next_page():
+                if not has_next:
                     logger.info("已到达最后一页")
+                    finished = True
                     break
+            else:
+                finished = True
+
+            if finished and self.checkpoint:
+                self.checkpoint.finish(checkpoint_key)
                     
         except Exception as e:
+            # 获取、解析等阶段的异常已由计时器按阶段计数
             logger.error(f"搜索商品时出错: {e}")
-        
-        return products
+            broken = isinstance(e, WebDriverException)
+        finally:
+            # 使用浏览器池时，每次搜索结束后归还浏览器，会话断开的浏览器由池重建
+            self._release_driver(browser_pages, broken)
+
+    def _parse_fetch_result(self, result: FetchResult) -> Tuple[List[Dict], bool]:
+        """
+        解析一次页面获取的结果
+
+        Returns:
+            (商品信息列表, 是否有下一页)
+        """
+        if result.backend == SeleniumFetcher.backend and self.driver is not None:
+            # 浏览器仍停留在该页面，按 extract_mode 从 DOM 中提取
+            return self._parse_products(), self._has_next_page()
+        return self.page_parser.parse_page(result.html, self.deduper)
+
+    def _dedup(self, products: List[Dict]) -> List[Dict]:
+        """
+        按 ASIN 去掉已出现过的商品并登记新商品
+
+        解析时已经跳过了此前出现过的卡片，这里处理同一页内的重复和不支持提前跳过的情况。
+        """
+        if self.deduper is None:
+            return products
+        unique = [product for product in products if self.deduper.add(product.get("ASIN"))]
+        self.metrics.incr("duplicates", len(products) - len(unique))
+        if len(unique) < len(products):
+            logger.info(f"去掉 {len(products) - len(unique)} 个重复商品")
+        return unique
     
     def _parse_products(self) -> List[Dict]:
         """解析页面中的商品信息"""
+        if self.extract_mode == "script":
+            return self._parse_products_script()
+        if self.extract_mode == "html":
+            return self._parse_products_html()
+
         products = []
         
         try:
@@ -153,124 +437,185 @@ class AmazonCrawler:
             logger.info(f"找到 {len(product_containers)} 个商品容器")
             
             for i, container in enumerate(product_containers):
+                if self.deduper is not None and container.get_attribute("data-asin") in self.deduper:
+                    # 已出现过的商品只读取 data-asin，省去逐字段查找元素
+                    continue
                 try:
                     product_info = self._extract_product_info(container)
                     if product_info:
                         products.append(product_info)
                         logger.debug(f"成功解析第 {i+1} 个商品: {product_info.get('商品名称', 'N/A')[:50]}...")
                 except Exception as e:
+                    self.metrics.error("parse.card", e)
                     logger.warning(f"解析第 {i+1} 个商品时出错: {e}")
                     continue
                     
         except Exception as e:
+            self.metrics.error("parse.element", e)
             logger.error(f"解析商品列表时出错: {e}")
         
         logger.info(f"成功解析 {len(products)} 个商品")
         return products
     
+    def _parse_products_script(self) -> List[Dict]:
+        """通过一次 execute_script 调用批量解析页面中的所有商品"""
+        products = []
+
+        try:
+            skip = []
+            if self.deduper is not None:
+                asins = self.driver.execute_script(CARD_ASINS_JS) or []
+                skip = [asin for asin in asins if asin in self.deduper]
+            raw_items = self.driver.execute_script(EXTRACT_PRODUCTS_JS, skip,
+                                                   list(self.marketplace.delivery_keywords)) or []
+            logger.info(f"找到 {len(raw_items)} 个商品容器")
+
+            for i, item in enumerate(raw_items):
+                try:
+                    products.append(build_product(**item, marketplace=self.marketplace))
+                except Exception as e:
+                    self.metrics.error("parse.card", e)
+                    logger.warning(f"解析第 {i+1} 个商品时出错: {e}")
+
+        except Exception as e:
+            self.metrics.error("parse.script", e)
+            logger.error(f"批量解析商品列表时出错: {e}")
+
+        logger.info(f"成功解析 {len(products)} 个商品")
+        return products
+
+    def _parse_products_html(self) -> List[Dict]:
+        """读取一次 page_source 并离线解析页面中的所有商品"""
+        products = []
+
+        try:
+            products = self.page_parser.parse(self.driver.page_source, self.deduper)
+        except Exception as e:
+            self.metrics.error("parse.html", e)
+            logger.error(f"离线解析商品列表时出错: {e}")
+
+        logger.info(f"成功解析 {len(products)} 个商品")
+        return products
+
     def _extract_product_info(self, container) -> Optional[Dict]:
         """从商品容器中提取商品信息"""
         try:
             # 商品名称和链接
-            product_name = "N/A"
-            product_url = "N/A"
-            try:
-                # 优先用 data-cy="title-recipe" 下的 a 标签
-                title_elem = container.find_element(By.CSS_SELECTOR, '[data-cy="title-recipe"] a.a-link-normal')
-                if title_elem:
-                    product_url = title_elem.get_attribute("href") or "N/A"
-                    # 补全相对链接
-                    if product_url.startswith("/"):
-                        product_url = "https://www.amazon.sg" + product_url
-                    product_name = title_elem.text.strip()
-            except Exception as e:
-                logger.debug(f"提取商品名称时出错: {e}")
-                # 备选方案：使用.a-text-normal选择器
+            with self.metrics.timer("extract.商品名称"):
+                product_name = "N/A"
+                product_url = "N/A"
                 try:
-                    title_element = container.find_element(By.CSS_SELECTOR, ".a-text-normal")
-                    if title_element:
-                        product_name = title_element.text.strip()
-                except:
-                    pass
+                    # 优先用 data-cy="title-recipe" 下的 a 标签
+                    title_elem = container.find_element(By.CSS_SELECTOR, '[data-cy="title-recipe"] a.a-link-normal')
+                    if title_elem:
+                        product_url = title_elem.get_attribute("href") or "N/A"
+                        # 补全相对链接
+                        if product_url.startswith("/"):
+                            product_url = self.marketplace.absolute_url(product_url)
+                        product_name = title_elem.text.strip()
+                except Exception as e:
+                    self.metrics.error("extract.商品名称", e)
+                    logger.debug(f"提取商品名称时出错: {e}")
+                    # 备选方案：使用.a-text-normal选择器
+                    try:
+                        title_element = container.find_element(By.CSS_SELECTOR, ".a-text-normal")
+                        if title_element:
+                            product_name = title_element.text.strip()
+                    except:
+                        pass
 
             # 价格
-            price = "N/A"
-            try:
-                price_elem = container.find_element(By.CSS_SELECTOR, ".a-price .a-offscreen")
-                if price_elem:
-                    price = price_elem.text.strip()
-            except Exception as e:
-                logger.debug(f"提取价格时出错: {e}")
+            with self.metrics.timer("extract.价格"):
+                price = "N/A"
+                try:
+                    price_elem = container.find_element(By.CSS_SELECTOR, ".a-price .a-offscreen")
+                    if price_elem:
+                        price = price_elem.text.strip()
+                except Exception as e:
+                    self.metrics.error("extract.价格", e)
+                    logger.debug(f"提取价格时出错: {e}")
 
             # 评分
-            rating = "N/A"
-            try:
-                rating_elem = container.find_element(By.CSS_SELECTOR, "i.a-icon-star-small span.a-icon-alt")
-                if rating_elem:
-                    rating_text = rating_elem.get_attribute("innerHTML") or rating_elem.text
-                    rating_match = re.search(r'(\d+\.?\d*)', rating_text)
-                    if rating_match:
-                        rating = rating_match.group(1)
-            except Exception as e:
-                logger.debug(f"提取评分时出错: {e}")
+            with self.metrics.timer("extract.评分"):
+                rating = "N/A"
+                try:
+                    rating_elem = container.find_element(By.CSS_SELECTOR, "i.a-icon-star-small span.a-icon-alt")
+                    if rating_elem:
+                        rating_text = rating_elem.get_attribute("innerHTML") or rating_elem.text
+                        rating_match = re.search(r'(\d+(?:[.,]\d+)?)', rating_text)
+                        if rating_match:
+                            # 欧式站点的评分为 "4,5 von 5 Sternen"
+                            rating = rating_match.group(1).replace(',', '.')
+                except Exception as e:
+                    self.metrics.error("extract.评分", e)
+                    logger.debug(f"提取评分时出错: {e}")
 
             # 评论数
-            reviews = "N/A"
-            try:
-                review_elem = container.find_element(By.CSS_SELECTOR, 'span.a-size-base.s-underline-text')
-                if review_elem:
-                    reviews = review_elem.text.strip().replace(',', '')
-            except Exception as e:
-                logger.debug(f"提取评论数时出错: {e}")
+            with self.metrics.timer("extract.评论数"):
+                reviews = "N/A"
+                try:
+                    review_elem = container.find_element(By.CSS_SELECTOR, 'span.a-size-base.s-underline-text')
+                    if review_elem:
+                        reviews = review_elem.text.strip().replace(self.marketplace.thousands_separator, '')
+                except Exception as e:
+                    self.metrics.error("extract.评论数", e)
+                    logger.debug(f"提取评论数时出错: {e}")
 
             # ASIN
-            asin = "N/A"
-            try:
-                asin = container.get_attribute("data-asin")
-            except:
-                pass
+            with self.metrics.timer("extract.ASIN"):
+                asin = "N/A"
+                try:
+                    asin = container.get_attribute("data-asin")
+                except:
+                    pass
 
             # 商品图片URL
-            image_url = "N/A"
-            try:
-                img_elem = container.find_element(By.CSS_SELECTOR, "img.s-image")
-                if img_elem:
-                    image_url = img_elem.get_attribute("src")
-            except Exception as e:
-                logger.debug(f"提取图片URL时出错: {e}")
+            with self.metrics.timer("extract.图片URL"):
+                image_url = "N/A"
+                try:
+                    img_elem = container.find_element(By.CSS_SELECTOR, "img.s-image")
+                    if img_elem:
+                        image_url = img_elem.get_attribute("src")
+                except Exception as e:
+                    self.metrics.error("extract.图片URL", e)
+                    logger.debug(f"提取图片URL时出错: {e}")
 
             # 促销信息
-            promotion = "N/A"
-            try:
-                # 优先找价格下方的 strike-through 价格（如标准价、市场价等）
-                promo_elem = container.find_element(By.CSS_SELECTOR, ".a-price.a-text-price .a-offscreen")
-                if promo_elem:
-                    promotion = promo_elem.text.strip()
-                else:
-                    # 备选：找促销相关的span
-                    promo_span = container.find_element(By.CSS_SELECTOR, ".a-size-base.a-color-secondary")
-                    if promo_span:
-                        promotion = promo_span.text.strip()
-            except Exception as e:
-                logger.debug(f"提取促销信息时出错: {e}")
+            with self.metrics.timer("extract.促销信息"):
+                promotion = "N/A"
+                try:
+                    # 优先找价格下方的 strike-through 价格（如标准价、市场价等）
+                    promo_elem = container.find_element(By.CSS_SELECTOR, ".a-price.a-text-price .a-offscreen")
+                    if promo_elem:
+                        promotion = promo_elem.text.strip()
+                    else:
+                        # 备选：找促销相关的span
+                        promo_span = container.find_element(By.CSS_SELECTOR, ".a-size-base.a-color-secondary")
+                        if promo_span:
+                            promotion = promo_span.text.strip()
+                except Exception as e:
+                    self.metrics.error("extract.促销信息", e)
+                    logger.debug(f"提取促销信息时出错: {e}")
 
             # 配送信息
-            delivery = "N/A"
-            try:
-                # 优先找data-cy="delivery-recipe"下的内容
-                delivery_elem = container.find_element(By.CSS_SELECTOR, '[data-cy="delivery-recipe"] .a-row.a-size-base.a-color-secondary')
-                if delivery_elem:
-                    delivery = delivery_elem.text.strip()
-                else:
-                    # 备选：找包含“配送”字样的span
-                    delivery_spans = container.find_elements(By.CSS_SELECTOR, 'span')
-                    for span in delivery_spans:
-                        text = span.text.strip()
-                        if "配送" in text or "送达" in text:
-                            delivery = text
-                            break
-            except Exception as e:
-                logger.debug(f"提取配送信息时出错: {e}")
+            with self.metrics.timer("extract.配送信息"):
+                delivery = "N/A"
+                try:
+                    # 优先找data-cy="delivery-recipe"下的内容
+                    delivery_elem = container.find_element(By.CSS_SELECTOR, '[data-cy="delivery-recipe"] .a-row.a-size-base.a-color-secondary')
+                    if delivery_elem:
+                        delivery = delivery_elem.text.strip()
+                    else:
+                        # 备选：找包含“配送”字样的span
+                        delivery_spans = container.find_elements(By.CSS_SELECTOR, 'span')
+                        for span in delivery_spans:
+                            text = span.text.strip()
+                            if any(word in text for word in self.marketplace.delivery_keywords):
+                                delivery = text
+                                break
+                except Exception as e:
+                    self.metrics.error("extract.配送信息", e)
+                    logger.debug(f"提取配送信息时出错: {e}")
 
             # 店铺名称、店铺评分保持原样
             store_name = "Amazon"
@@ -301,78 +646,44 @@ class AmazonCrawler:
         except:
             return False
     
-    def filter_products(self, products: List[Dict], filters: Dict) -> List[Dict]:
+    def filter_products(self, products: Iterable[Dict], filters: Dict, limit: Optional[int] = None) -> List[Dict]:
         """
         根据筛选条件过滤商品
         
         Args:
-            products: 商品列表
+            products: 商品列表，也可以是 iter_products 返回的生成器（惰性消费），
+                      或者 ProductStore 本地商品库（筛选条件直接在 SQL 中执行）
             filters: 筛选条件字典
+            limit: 筛选出的商品达到该数量后停止消费，传入生成器时可以提前结束爬取
             
         Returns:
             过滤后的商品列表
         """
-        filtered_products = []
-        
-        for product in products:
-            if self._meets_criteria(product, filters):
-                filtered_products.append(product)
+        if isinstance(products, ProductStore):
+            filtered_products = products.query(filters, limit=limit)
+            logger.info(f"从商品库 {products.path} 中筛选出 {len(filtered_products)} 个商品")
+            return filtered_products
+        if isinstance(products, list):
+            # 已经全部在内存中的商品：一次性转换为数值列后用向量化掩码筛选
+            total = len(products)
+            filtered_products = ProductFrame(products, self.marketplace).filter(filters, limit) if limit is None or limit > 0 else []
+        else:
+            filtered_products = []
+            total = 0
+            if limit is None or limit > 0:
+                for product in products:
+                    total += 1
+                    if self._meets_criteria(product, filters):
+                        filtered_products.append(product)
+                        if limit is not None and len(filtered_products) >= limit:
+                            break
         
-        logger.info(f"筛选完成，从 {len(products)} 个商品中筛选出 {len(filtered_products)} 个")
+        logger.info(f"筛选完成，从 {total} 个商品中筛选出 {len(filtered_products)} 个")
         return filtered_products
     
     def _meets_criteria(self, product: Dict, filters: Dict) -> bool:
-        """检查商品是否满足筛选条件"""
-        try:
-            # 价格筛选
-            if "min_price" in filters and filters["min_price"]:
-                try:
-                    product_price = float(product["价格"].replace("$", "").replace(",", ""))
-                    if product_price < filters["min_price"]:
-                        return False
-                except:
-                    pass
-            
-            if "max_price" in filters and filters["max_price"]:
-                try:
-                    product_price = float(product["价格"].replace("$", "").replace(",", ""))
-                    if product_price > filters["max_price"]:
-                        return False
-                except:
-                    pass
-            
-            # 店铺评分筛选
-            if "min_store_rating" in filters and filters["min_store_rating"]:
-                try:
-                    store_rating = float(product["店铺评分"])
-                    if store_rating < filters["min_store_rating"]:
-                        return False
-                except:
-                    pass
-            
-            # 商品评分筛选
-            if "min_rating" in filters and filters["min_rating"]:
-                try:
-                    rating = float(product["评分"])
-                    if rating < filters["min_rating"]:
-                        return False
-                except:
-                    pass
-            
-            # 评论数筛选
-            if "min_reviews" in filters and filters["min_reviews"]:
-                try:
-                    reviews = int(product["评论数"])
-                    if reviews < filters["min_reviews"]:
-                        return False
-                except:
-                    pass
-            
-            return True
-            
-        except Exception as e:
-            logger.warning(f"检查筛选条件时出错: {e}")
-            return True
+        """检查商品是否满足筛选条件（无法解析的字段不参与该项筛选）"""
+        return product_matches(product, filters, self.marketplace)
     
     def save_to_excel(self, products: List[Dict], filename: str = "amazon_products.xlsx"):
         """
@@ -387,15 +698,66 @@ class AmazonCrawler:
                 logger.warning("没有商品数据可保存")
                 return
             
-            df = pd.DataFrame(products)
-            df.to_excel(filename, index=False, engine='openpyxl')
-            logger.info(f"成功保存 {len(products)} 个商品信息到 {filename}")
+            # 列顺序与 pd.DataFrame(products) 一致：按字段首次出现的顺序
+            fields = list(dict.fromkeys(key for product in products for key in product))
+            with self.metrics.timer("save"):
+                with XlsxSink(filename, fields) as sink:
+                    sink.write(products)
+            self.metrics.incr("rows_saved", len(products))
             
         except Exception as e:
             logger.error(f"保存Excel文件时出错: {e}")
     
     def close(self):
-        """关闭浏览器驱动"""
+        """关闭浏览器驱动和自己创建的连接池，传入的 fetcher、cache、enricher、checkpoint 由调用方关闭"""
+        if not self._shared_fetcher:
+            self.fetcher.close()
+        self._release_driver()
         if self.driver:
             self.driver.quit()
-            logger.info("浏览器驱动已关闭") 
\ No newline at end of file
+            self.driver = None
+            logger.info("浏览器驱动已关闭") 
+
+
+def search_marketplaces(keyword: str, marketplaces: Iterable, max_pages: int = 5,
+                        filters: Optional[Dict] = None, rate_limiter: Optional[AdaptiveRateLimiter] = None,
+                        **crawler_kwargs) -> Dict[str, List[Dict]]:
+    """
+    在多个站点上并发搜索同一个关键词
+
+    每个站点使用独立的爬虫（独立的连接池和浏览器），共享的限速器按主机分别计算速率，
+    一个站点被拦截降速不影响其他站点。crawler_kwargs 中的 cache、enricher 等由所有站点共享，
+    各站点的爬虫结束时不会关闭它们，由调用方在全部站点完成后关闭。
+
+    Args:
+        keyword: 搜索关键词
+        marketplaces: 站点代码列表，例如 ["us", "uk", "sg"]
+        max_pages: 每个站点最大爬取页数
+        filters: 筛选条件
+        rate_limiter: 共享的自适应限速器，默认新建一个
+        crawler_kwargs: 传给 AmazonCrawler 的其他参数（例如 cache、cache_mode、fetch_backend）
+
+    Returns:
+        站点代码 -> 商品信息列表
+    """
+    marketplaces = [get_marketplace(marketplace) for marketplace in marketplaces]
+    rate_limiter = rate_limiter or AdaptiveRateLimiter()
+
+    def crawl(marketplace) -> List[Dict]:
+        crawler = AmazonCrawler(marketplace=marketplace, rate_limiter=rate_limiter, **crawler_kwargs)
+        try:
+            return crawler.search_products(keyword, max_pages, filters=filters)
+        finally:
+            crawler.close()
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(len(marketplaces), 1)) as executor:
+        futures = {marketplace.code: executor.submit(crawl, marketplace) for marketplace in marketplaces}
+        for code, future in futures.items():
+            try:
+                results[code] = future.result()
+                logger.info(f"站点 {code} 搜索完成，获取到 {len(results[code])} 个商品")
+            except Exception as e:
+                logger.error(f"站点 {code} 搜索失败: {e}")
+                results[code] = []
+    return results
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+异步爬取引擎
+
+在有界并发下同时爬取多个关键词的多个页面，按主机限制并发数，
+并使用 AdaptiveRateLimiter 按主机自适应调整请求速率，每完成一页就立即产出结果。
+传入多个站点时，每个站点使用独立的连接池，并发数和速率按站点域名分别计算。
+设置 parse_workers 后页面交给 ParsePool 的工作进程解析（结果为列式的 PageResult.batch），
+获取线程只负责请求，获取并发数和解析进程数分别扩展。
+
+用法:
+    engine = AsyncCrawlEngine()
+    async for result in engine.crawl(["laptop", "mouse"], pages=5, marketplaces=["us", "uk", "sg"]):
+        print(result.marketplace, result.keyword, result.page, result.count)
+
+    engine = AsyncCrawlEngine(parse_workers=4)   # 多进程解析
+"""
+
+import asyncio
+import logging
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+from amazon_crawler import build_search_url
+from config import CRAWLER_CONFIG
+from fetcher import BaseFetcher, HttpFetcher
+from marketplace import Marketplace, get_marketplace
+from page_parser import SearchPageParser
+from parse_pool import ParsePool
+from product import ProductBatch
+from rate_limiter import AdaptiveRateLimiter
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PageResult:
+    """单个（关键词, 页码）的爬取结果，使用解析进程池时商品在 batch 中，products 为空"""
+    keyword: str
+    page: int
+    url: str
+    products: List[Dict] = field(default_factory=list)
+    has_next: bool = False
+    backend: str = ""
+    elapsed: float = 0.0
+    error: Optional[str] = None
+    marketplace: str = ""
+    batch: Optional[ProductBatch] = None
+
+    @property
+    def count(self) -> int:
+        """商品数量"""
+        return len(self.batch) if self.batch is not None else len(self.products)
+
+
+class AsyncCrawlEngine:
+    """基于 asyncio 的多关键词、多页面并发爬取引擎"""
+
+    def __init__(self, fetcher: Optional[BaseFetcher] = None, concurrency: int = None,
+                 per_host_concurrency: int = None, per_host_min_interval: float = None,
+                 url_builder: Optional[Callable[[str, int], str]] = None,
+                 rate_limiter: Optional[AdaptiveRateLimiter] = None,
+                 parse_workers: int = None, parse_pool: Optional[ParsePool] = None):
+        """
+        初始化异步爬取引擎
+
+        Args:
+            fetcher: 页面获取后端（需线程安全，由调用方关闭），默认在第一次使用时创建连接池 HttpFetcher
+            concurrency: 全局最大并发请求数，默认读取 CRAWLER_CONFIG["concurrency"]
+            per_host_concurrency: 每个主机最大并发请求数，默认读取 CRAWLER_CONFIG["per_host_concurrency"]
+            per_host_min_interval: 同一主机相邻请求的最小间隔（秒），即限速器的速率上限，
+                                   默认读取 CRAWLER_CONFIG["per_host_min_interval"]
+            url_builder: 根据 (关键词, 页码) 构造 URL 的函数，默认按站点调用 build_search_url
+            rate_limiter: 自适应限速器，默认从速率上限开始，遇到拦截或慢页面时自动降速
+            parse_workers: 解析进程数，默认读取 CRAWLER_CONFIG["parse_workers"]，0 表示在获取线程中直接解析
+            parse_pool: 共享的解析进程池（由调用方关闭），传入时忽略 parse_workers
+        """
+        self.concurrency = concurrency or CRAWLER_CONFIG["concurrency"]
+        self.per_host_concurrency = per_host_concurrency or CRAWLER_CONFIG["per_host_concurrency"]
+        self.per_host_min_interval = (CRAWLER_CONFIG["per_host_min_interval"]
+                                      if per_host_min_interval is None else per_host_min_interval)
+        if rate_limiter is None:
+            max_rate = 1 / self.per_host_min_interval if self.per_host_min_interval > 0 else math.inf
+            rate_limiter = AdaptiveRateLimiter(initial_rate=max_rate, max_rate=max_rate)
+        self.rate_limiter = rate_limiter
+        # 调用方传入的获取后端由调用方关闭，引擎只关闭自己创建的
+        self._shared_fetcher = fetcher is not None
+        self._fetcher = fetcher
+        self._fetcher_lock = threading.Lock()
+        self.url_builder = url_builder
+        self.page_parser = SearchPageParser()
+        if parse_workers is None:
+            parse_workers = CRAWLER_CONFIG["parse_workers"]
+        self._shared_parse_pool = parse_pool is not None
+        self.parse_pool = parse_pool or (ParsePool(parse_workers) if parse_workers else None)
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        # 站点代码 -> 该站点的获取后端 / 解析器
+        self._fetchers: Dict[str, BaseFetcher] = {}
+        self._parsers: Dict[str, SearchPageParser] = {}
+
+    @property
+    def fetcher(self) -> BaseFetcher:
+        """默认的获取后端；只爬指定站点时使用各站点的连接池，不会创建"""
+        if self._fetcher is None:
+            with self._fetcher_lock:
+                if self._fetcher is None:
+                    self._fetcher = HttpFetcher(pool_size=self.concurrency)
+        return self._fetcher
+
+    def _prepare_marketplace(self, marketplace: Marketplace):
+        """为站点创建独立的连接池（带站点的 Accept-Language）和解析器"""
+        if marketplace.code not in self._fetchers:
+            self._fetchers[marketplace.code] = self.fetcher if self._shared_fetcher else HttpFetcher(
+                pool_size=self.per_host_concurrency, headers=marketplace.headers)
+            self._parsers[marketplace.code] = SearchPageParser(marketplace=marketplace)
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        """获取（或创建）URL 所在主机的并发限制"""
+        host = urlsplit(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host_concurrency)
+        return self._host_limits[host]
+
+    def _fetch_and_parse(self, keyword: str, page: int, url: str,
+                         marketplace: Optional[Marketplace] = None) -> Tuple[PageResult, Optional[str]]:
+        """
+        在线程池中执行的阻塞部分：获取页面，未使用解析进程池时同时解析
+
+        Returns:
+            (页面结果, 待交给解析进程池的 HTML，已解析或被拦截时为 None)
+        """
+        code = marketplace.code if marketplace else ""
+        fetcher = self._fetchers[code] if marketplace else self.fetcher
+        parser = self._parsers[code] if marketplace else self.page_parser
+        try:
+            result = fetcher.fetch(url)
+        except Exception:
+            self.rate_limiter.record(url, status_code=0, failed=True)
+            raise
+        self.rate_limiter.record_result(result)
+        if result.blocked:
+            return PageResult(keyword, page, url, backend=result.backend,
+                              elapsed=result.elapsed, error="blocked", marketplace=code), None
+        if self.parse_pool is not None:
+            return PageResult(keyword, page, url, backend=result.backend,
+                              elapsed=result.elapsed, marketplace=code), result.html
+        products, has_next = parser.parse_page(result.html)
+        return PageResult(keyword, page, url, products, has_next, result.backend, result.elapsed,
+                          marketplace=code), None
+
+    async def _parse_in_pool(self, result: PageResult, page_html: str) -> PageResult:
+        """把获取到的页面交给解析进程池，不占用获取并发额度"""
+        try:
+            result.batch, result.has_next = await asyncio.wrap_future(
+                self.parse_pool.submit(page_html, result.marketplace or None))
+        except Exception as e:
+            logger.warning(f"解析 {result.keyword} 第 {result.page} 页失败: {e}")
+            result.error = str(e)
+        return result
+
+    async def crawl(self, keywords: Iterable[str], pages: Union[int, Iterable[int]] = None,
+                    marketplaces: Optional[Iterable] = None) -> AsyncIterator[PageResult]:
+        """
+        并发爬取多个关键词，按完成顺序逐页产出结果
+
+        Args:
+            keywords: 关键词列表
+            pages: 最大页数，或要爬取的页码列表，默认读取 CRAWLER_CONFIG["default_max_pages"]
+            marketplaces: 站点代码列表，每个关键词在每个站点上各爬取一遍；None 表示只爬默认站点
+
+        Yields:
+            每个已完成页面的 PageResult
+        """
+        if pages is None:
+            pages = CRAWLER_CONFIG["default_max_pages"]
+        page_numbers = list(range(1, pages + 1)) if isinstance(pages, int) else sorted(pages)
+        targets: List[Optional[Marketplace]] = [None]
+        if marketplaces:
+            targets = [get_marketplace(marketplace) for marketplace in marketplaces]
+            for marketplace in targets:
+                self._prepare_marketplace(marketplace)
+
+        loop = asyncio.get_running_loop()
+        # asyncio 同步原语绑定事件循环，每次爬取重新创建
+        self._host_limits = {}
+        global_limit = asyncio.Semaphore(self.concurrency)
+        # 每个（站点, 关键词）已知的最后一页，超过此页码的任务直接跳过
+        last_page: Dict[tuple, float] = {}
+
+        async def run_unit(marketplace: Optional[Marketplace], keyword: str, page: int) -> Optional[PageResult]:
+            if self.url_builder is not None:
+                url = self.url_builder(keyword, page)
+            else:
+                url = build_search_url(keyword, page, marketplace=marketplace)
+            key = (marketplace.code if marketplace else "", keyword)
+            async with global_limit:
+                if page > last_page.get(key, float("inf")):
+                    return None
+                async with self._host_limit(url):
+                    wait = self.rate_limiter.reserve(url)
+                    if wait > 0:
+                        await asyncio.sleep(wait)
+                    if page > last_page.get(key, float("inf")):
+                        return None
+                    try:
+                        result, page_html = await loop.run_in_executor(executor, self._fetch_and_parse,
+                                                                       keyword, page, url, marketplace)
+                    except Exception as e:
+                        logger.warning(f"爬取 {keyword} 第 {page} 页失败: {e}")
+                        return PageResult(keyword, page, url, error=str(e), marketplace=key[0])
+
+            if page_html is not None:
+                result = await self._parse_in_pool(result, page_html)
+            if result.error or not result.has_next:
+                last_page[key] = min(last_page.get(key, float("inf")), page)
+            return result
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            tasks = [asyncio.ensure_future(run_unit(marketplace, keyword, page))
+                     for marketplace in targets for keyword in keywords for page in page_numbers]
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    result = await next_done
+                    if result is not None:
+                        logger.info(f"{result.keyword} 第 {result.page} 页完成，获取到 {result.count} 个商品")
+                        yield result
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+    def run(self, keywords: Iterable[str], pages: Union[int, Iterable[int]] = None,
+            marketplaces: Optional[Iterable] = None) -> List[PageResult]:
+        """同步接口：爬取所有关键词并返回全部页面结果"""
+        async def collect():
+            return [result async for result in self.crawl(keywords, pages, marketplaces)]
+        return asyncio.run(collect())
+
+    def close(self):
+        """释放引擎自己创建的获取后端和解析进程池"""
+        for fetcher in self._fetchers.values():
+            if fetcher is not self._fetcher:
+                fetcher.close()
+        if self._fetcher is not None and not self._shared_fetcher:
+            self._fetcher.close()
+            self._fetcher = None
+        self._fetchers.clear()
+        self._parsers.clear()
+        if self.parse_pool is not None and not self._shared_parse_pool:
+            self.parse_pool.close()
+            self.parse_pool = None
@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多关键词批量爬取（非交互式）
+
+从关键词文件读取关键词，分发到多个工作进程，每个进程持有一个 AmazonCrawler
+并把结果逐页写入自己的分片文件（不在内存中保留整个关键词的结果），最后合并所有分片并按 ASIN 去重。
+
+每个关键词内重复出现的商品在解析时跳过；传入 --seen-file 时，往次运行已经爬到的商品
+（保存在布隆过滤器文件中）也会被跳过，只输出新商品。
+
+每个关键词的爬取指标（各阶段耗时、计数、字段缺失）由工作进程返回，主进程合并后
+写入 output_dir/crawl_metrics.json（见 metrics.CrawlMetrics）。传入 --profile 时每个关键词的爬取
+在工作进程中单独剖析，结果写入 --profile-dir 下以关键词命名的子目录（见 profiling.Profiler）；
+配合 --replay 只从页面缓存回放，不产生任何网络请求。
+
+关键词文件格式:
+    .txt   每行一个关键词，空行和 # 开头的行会被忽略
+    .jsonl 每行一个 JSON 对象，读取其中的 "keyword" 字段
+
+用法:
+    python batch_runner.py keywords.txt --max-pages 3 --workers 4 --output-dir exports
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import nullcontext
+from typing import Dict, Iterable, List, Optional
+
+from config import CRAWLER_CONFIG, PROFILING_CONFIG
+from dedup import BloomDeduper, ExactDeduper
+from marketplace import MARKETPLACES
+from metrics import CrawlMetrics
+from page_parser import PRODUCT_FIELDS
+from query_planner import SORT_ORDERS
+from sinks import JsonlSink, create_sink
+
+logger = logging.getLogger(__name__)
+
+SHARD_PATTERN = "shard-*.jsonl"
+KEYWORD_FIELD = "关键词"
+
+# 每个工作进程持有的爬虫实例
+_worker_crawler = None
+_worker_shard_path = None
+# 往次运行已经爬到的 ASIN（只读）
+_worker_seen = None
+# 剖析方式和结果目录，None 表示不剖析
+_worker_profile = None
+
+
+def read_keywords(path: str) -> List[str]:
+    """
+    读取关键词文件（去重并保持顺序）
+
+    Args:
+        path: 关键词文件路径（.txt 或 .jsonl）
+
+    Returns:
+        关键词列表
+    """
+    keywords = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if path.endswith(".jsonl"):
+                try:
+                    keyword = json.loads(line).get("keyword")
+                except (json.JSONDecodeError, AttributeError):
+                    logger.warning(f"无法解析的关键词行: {line[:50]}")
+                    continue
+                if keyword:
+                    keywords.append(str(keyword).strip())
+            else:
+                keywords.append(line)
+    return list(dict.fromkeys(keywords))
+
+
+def _init_worker(output_dir: str, headless: bool, fetch_backend: str, seen_file: Optional[str] = None,
+                 marketplace: Optional[str] = None, enrich: bool = False, replay: bool = False,
+                 profile: Optional[str] = None, profile_dir: Optional[str] = None):
+    """工作进程初始化：创建本进程的爬虫实例和分片文件"""
+    global _worker_crawler, _worker_shard_path, _worker_seen, _worker_profile
+    from multiprocessing.util import Finalize
+    from amazon_crawler import AmazonCrawler
+    from enrichment import DetailEnricher
+    from page_cache import PageCache
+    from seller_cache import SellerCache
+
+    enricher = None
+    seller_cache = None
+    cache = PageCache() if replay else None
+    if enrich:
+        # 卖家缓存保存在同一个 SQLite 文件中，所有工作进程共享，同一卖家只获取一次
+        seller_cache = SellerCache()
+        enricher = DetailEnricher(marketplace=marketplace, seller_cache=seller_cache)
+    _worker_crawler = AmazonCrawler(headless=headless, fetch_backend=fetch_backend, marketplace=marketplace,
+                                    enricher=enricher, cache=cache,
+                                    cache_mode="replay" if replay else "normal")
+    if profile:
+        _worker_profile = (profile, profile_dir or PROFILING_CONFIG["dir"])
+    _worker_shard_path = os.path.join(output_dir, f"shard-{os.getpid()}.jsonl")
+    if seen_file:
+        # 只读映射，所有工作进程共享同一个文件，本次运行的结果由主进程在合并后写回
+        _worker_seen = BloomDeduper(seen_file, readonly=True)
+    # 进程退出时关闭浏览器和连接池
+    Finalize(_worker_crawler, _worker_crawler.close, exitpriority=10)
+    # 爬虫不会关闭传入的补全和缓存，在爬虫之后关闭
+    if enricher is not None:
+        Finalize(enricher, enricher.close, exitpriority=5)
+        Finalize(seller_cache, seller_cache.close, exitpriority=1)
+    if cache is not None:
+        Finalize(cache, cache.close, exitpriority=5)
+
+
+class ShardSink(JsonlSink):
+    """分片输出端：追加写入，每条记录附加来源关键词"""
+
+    def __init__(self, path: str, keyword: str):
+        super().__init__(path, PRODUCT_FIELDS + [KEYWORD_FIELD], append=True)
+        self.keyword = keyword
+
+    def write(self, products: Iterable[Dict]):
+        super().write({**product, KEYWORD_FIELD: self.keyword} for product in products)
+
+
+def checkpoint_path(checkpoint_dir: str, keyword: str) -> str:
+    """关键词对应的检查点文件路径"""
+    digest = hashlib.sha1(keyword.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(checkpoint_dir, f"{digest}.jsonl")
+
+
+def profile_path(profile_dir: str, keyword: str) -> str:
+    """关键词对应的剖析结果目录（关键词 + 摘要，避免特殊字符和重名）"""
+    digest = hashlib.sha1(keyword.encode("utf-8")).hexdigest()[:8]
+    name = re.sub(r"\W+", "_", keyword).strip("_")[:40]
+    return os.path.join(profile_dir, f"{name}-{digest}")
+
+
+def _crawl_keyword(keyword: str, max_pages: int, filters: Optional[Dict],
+                   checkpoint_dir: Optional[str] = None, department: Optional[str] = None,
+                   sort: Optional[str] = None) -> Dict:
+    """在工作进程中爬取单个关键词，每爬完一页就追加写入分片文件"""
+    from checkpoint import CrawlCheckpoint
+
+    start = time.perf_counter()
+    if checkpoint_dir:
+        # 每个关键词一个检查点文件，重新运行时从未完成的页面继续
+        _worker_crawler.checkpoint = CrawlCheckpoint(checkpoint_path(checkpoint_dir, keyword))
+    # 关键词内按 ASIN 去重；跨关键词的重复留到合并时处理，以便记录商品对应的全部关键词
+    _worker_crawler.deduper = ExactDeduper(known=_worker_seen)
+    profiler = nullcontext()
+    if _worker_profile:
+        from profiling import Profiler
+        modes, profile_dir = _worker_profile
+        profiler = Profiler(profile_path(profile_dir, keyword), modes)
+    sink = ShardSink(_worker_shard_path, keyword)
+    try:
+        # 价格、评分等条件下推为搜索 URL 参数，其余条件在爬取时筛选
+        with profiler:
+            _worker_crawler.search_products(keyword, max_pages, sink=sink, collect=False, filters=filters,
+                                            department=department, sort=sort)
+    finally:
+        sink.close()
+        if _worker_crawler.checkpoint:
+            _worker_crawler.checkpoint.close()
+            _worker_crawler.checkpoint = None
+
+    # 每个关键词返回一份指标后清零，由主进程合并
+    metrics = _worker_crawler.metrics
+    summary = metrics.summary()
+    metrics.reset()
+    return {
+        "keyword": keyword,
+        "count": sink.count,
+        "shard": _worker_shard_path,
+        "elapsed": time.perf_counter() - start,
+        "metrics": summary,
+    }
+
+
+def merge_shards(output_dir: str, output_file: Optional[str] = None) -> List[Dict]:
+    """
+    合并所有分片文件并按 ASIN 去重（保持分片文件名和行的顺序）
+
+    没有 ASIN 的商品按链接去重，两者都缺失的商品无法判断是否重复，全部保留。
+
+    Args:
+        output_dir: 分片文件所在目录
+        output_file: 合并结果文件路径（.xlsx / .csv / .jsonl / .parquet），None 表示不写文件
+
+    Returns:
+        去重后的商品列表
+    """
+    products = []
+    # 去重键 -> products 中的下标
+    index = {}
+    total = 0
+    for shard_path in sorted(glob.glob(os.path.join(output_dir, SHARD_PATTERN))):
+        with open(shard_path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                product = json.loads(line)
+                total += 1
+                asin = product.get("ASIN")
+                # 没有 ASIN 的商品按链接去重
+                key = asin if asin and asin != "N/A" else product.get("商品链接")
+                if not key or key == "N/A":
+                    products.append(product)
+                elif key not in index:
+                    index[key] = len(products)
+                    products.append(product)
+                else:
+                    existing = products[index[key]]
+                    if product[KEYWORD_FIELD] not in existing[KEYWORD_FIELD].split(","):
+                        existing[KEYWORD_FIELD] += f",{product[KEYWORD_FIELD]}"
+
+    logger.info(f"合并分片完成：共 {total} 条记录，去重后 {len(products)} 个商品")
+
+    if output_file and products:
+        with create_sink(output_file, PRODUCT_FIELDS + [KEYWORD_FIELD]) as sink:
+            sink.write(products)
+    return products
+
+
+def run_batch(keywords: Iterable[str], max_pages: int = None, workers: int = None,
+              output_dir: str = "exports", output_file: Optional[str] = None,
+              filters: Optional[Dict] = None, headless: bool = True,
+              fetch_backend: str = "http", checkpoint_dir: Optional[str] = None,
+              department: Optional[str] = None, sort: Optional[str] = None,
+              seen_file: Optional[str] = None, marketplace: Optional[str] = None,
+              enrich: bool = False, metrics_file: Optional[str] = None,
+              prometheus_file: Optional[str] = None, metrics_port: Optional[int] = None,
+              replay: bool = False, profile: Optional[str] = None,
+              profile_dir: Optional[str] = None) -> List[Dict]:
+    """
+    使用进程池批量爬取多个关键词
+
+    Args:
+        keywords: 关键词列表
+        max_pages: 每个关键词最大爬取页数
+        workers: 工作进程数，默认为 CPU 核数
+        output_dir: 分片和合并结果的输出目录
+        output_file: 合并后的 Excel 文件名，None 表示 output_dir/amazon_batch.xlsx
+        filters: 筛选条件
+        headless: 是否使用无头模式
+        fetch_backend: 页面获取后端
+        checkpoint_dir: 检查点目录，传入时中断后重新运行会跳过已完成的页面
+        department: 品类别名（搜索 URL 的 i 参数）
+        sort: 排序方式，可选值见 query_planner.SORT_ORDERS
+        seen_file: 已爬取 ASIN 的布隆过滤器文件，传入时跳过往次运行已经爬到的商品，
+                   并在合并后把本次的商品写回该文件
+        marketplace: 站点代码，默认读取 CRAWLER_CONFIG["marketplace"]
+        enrich: 是否获取商品详情页补全店铺名称、店铺评分等字段（见 enrichment.DetailEnricher）
+        metrics_file: 合并后的爬取指标 JSON 文件，None 表示 output_dir/crawl_metrics.json
+        prometheus_file: Prometheus 文本格式的指标文件，None 表示不写
+        metrics_port: 爬取期间在该端口提供 /metrics 端点，None 表示不启动
+        replay: 只从页面缓存（CACHE_CONFIG["dir"]）回放，不产生任何网络请求
+        profile: 剖析方式（例如 "cpu,memory"，见 profiling.Profiler），None 表示不剖析
+        profile_dir: 剖析结果目录，默认读取 PROFILING_CONFIG["dir"]
+
+    Returns:
+        去重后的商品列表
+    """
+    keywords = list(keywords)
+    max_pages = max_pages or CRAWLER_CONFIG["default_max_pages"]
+    workers = min(workers or os.cpu_count() or 1, max(len(keywords), 1))
+    output_file = output_file or os.path.join(output_dir, "amazon_batch.xlsx")
+
+    os.makedirs(output_dir, exist_ok=True)
+    if checkpoint_dir:
+        os.makedirs(checkpoint_dir, exist_ok=True)
+    # 清理上一次运行遗留的分片
+    for shard_path in glob.glob(os.path.join(output_dir, SHARD_PATTERN)):
+        os.remove(shard_path)
+
+    metrics = CrawlMetrics()
+    server = metrics.serve(metrics_port) if metrics_port is not None else None
+    try:
+        logger.info(f"开始批量爬取 {len(keywords)} 个关键词，工作进程数 {workers}")
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(output_dir, headless, fetch_backend, seen_file, marketplace,
+                                           enrich, replay, profile, profile_dir)) as executor:
+            futures = {executor.submit(_crawl_keyword, keyword, max_pages, filters, checkpoint_dir,
+                                       department, sort): keyword
+                       for keyword in keywords}
+            for future in as_completed(futures):
+                keyword = futures[future]
+                try:
+                    summary = future.result()
+                    metrics.merge(summary["metrics"])
+                    metrics.observe("keyword", summary["elapsed"])
+                    metrics.incr("keywords", status="done")
+                    logger.info(f"关键词 {keyword} 完成：{summary['count']} 个商品，耗时 {summary['elapsed']:.1f}s")
+                except Exception as e:
+                    metrics.error("keyword", e)
+                    metrics.incr("keywords", status="failed")
+                    logger.error(f"关键词 {keyword} 爬取失败: {e}")
+
+        logger.info(f"批量爬取完成，耗时 {time.perf_counter() - start:.1f}s")
+        with metrics.timer("merge"):
+            products = merge_shards(output_dir, output_file)
+        if seen_file:
+            with BloomDeduper(seen_file) as seen:
+                added = sum(seen.add(product.get("ASIN")) for product in products)
+            logger.info(f"已向 {seen_file} 写入 {added} 个新 ASIN，共 {len(seen)} 个")
+
+        metrics.incr("products_merged", len(products))
+        logger.info("各阶段耗时：\n" + metrics.report())
+        metrics.write_json(metrics_file or os.path.join(output_dir, "crawl_metrics.json"))
+        if prometheus_file:
+            metrics.write_prometheus(prometheus_file)
+    finally:
+        # 出错时也要停止指标端点
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+    return products
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="亚马逊多关键词批量爬取")
+    parser.add_argument("keywords_file", help="关键词文件（.txt 每行一个，或 .jsonl 含 keyword 字段）")
+    parser.add_argument("--max-pages", type=int, default=CRAWLER_CONFIG["default_max_pages"], help="每个关键词最大爬取页数")
+    parser.add_argument("--workers", type=int, default=None, help="工作进程数，默认为 CPU 核数")
+    parser.add_argument("--output-dir", default="exports", help="输出目录")
+    parser.add_argument("--output", default=None, help="合并结果文件名（.xlsx / .csv / .jsonl / .parquet）")
+    parser.add_argument("--checkpoint-dir", default=None, help="检查点目录，中断后重新运行时从未完成的页面继续")
+    parser.add_argument("--fetch-backend", choices=["http", "browser"], default="http", help="页面获取后端")
+    parser.add_argument("--min-price", type=float, help="最低价格")
+    parser.add_argument("--max-price", type=float, help="最高价格")
+    parser.add_argument("--min-rating", type=float, help="最低商品评分")
+    parser.add_argument("--min-reviews", type=int, help="最少评论数")
+    parser.add_argument("--min-store-rating", type=float, help="最低店铺评分（需要 --enrich）")
+    parser.add_argument("--enrich", action="store_true", help="获取商品详情页补全店铺名称、店铺评分等字段")
+    parser.add_argument("--department", default=None, help="品类别名，例如 electronics、computers")
+    parser.add_argument("--sort", choices=list(SORT_ORDERS), default=None, help="排序方式")
+    parser.add_argument("--marketplace", choices=list(MARKETPLACES), default=None, help="站点，默认为 us")
+    parser.add_argument("--seen-file", default=None, help="已爬取 ASIN 的布隆过滤器文件，跳过往次运行已爬到的商品")
+    parser.add_argument("--metrics-file", default=None, help="爬取指标 JSON 文件，默认为 输出目录/crawl_metrics.json")
+    parser.add_argument("--prometheus-file", default=None, help="Prometheus 文本格式的指标文件")
+    parser.add_argument("--metrics-port", type=int, default=None, help="爬取期间提供 /metrics 端点的端口")
+    parser.add_argument("--replay", action="store_true", help="只从页面缓存回放，不产生任何网络请求")
+    parser.add_argument("--profile", nargs="?", const=PROFILING_CONFIG["modes"], default=None,
+                        help="剖析每个关键词的爬取，可指定方式：cpu,sample,memory（默认 %(const)s）")
+    parser.add_argument("--profile-dir", default=None, help="剖析结果目录，默认读取 PROFILING_CONFIG")
+    args = parser.parse_args()
+
+    keywords = read_keywords(args.keywords_file)
+    if not keywords:
+        print("错误：关键词文件为空！")
+        return
+
+    filters = {name: value for name, value in (
+        ("min_price", args.min_price),
+        ("max_price", args.max_price),
+        ("min_rating", args.min_rating),
+        ("min_reviews", args.min_reviews),
+        ("min_store_rating", args.min_store_rating),
+    ) if value is not None}
+
+    products = run_batch(keywords, args.max_pages, args.workers, args.output_dir,
+                         args.output, filters or None, fetch_backend=args.fetch_backend,
+                         checkpoint_dir=args.checkpoint_dir, department=args.department, sort=args.sort,
+                         seen_file=args.seen_file, marketplace=args.marketplace, enrich=args.enrich,
+                         metrics_file=args.metrics_file, prometheus_file=args.prometheus_file,
+                         metrics_port=args.metrics_port, replay=args.replay, profile=args.profile,
+                         profile_dir=args.profile_dir)
+    print(f"\n批量爬取完成！共 {len(keywords)} 个关键词，去重后 {len(products)} 个商品")
+
+
+if __name__ == "__main__":
+    main()
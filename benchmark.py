@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+离线基准测试
+
+完全离线运行，不需要浏览器和网络：
+- 解析：重复解析保存的搜索结果页（docs/Amazon.sg _ laptop.html），统计每秒解析的商品卡片数
+- 筛选：以样例页面中的商品为模板合成 1 万 ~ 100 万个商品，统计 filter_products 每秒处理的商品数
+  （列表走向量化筛选，生成器走逐个筛选，ProductBatch 走紧凑记录筛选）
+- 导出：统计 save_to_excel 每秒写入的行数
+
+每一项记录耗时（多次运行取最快）、吞吐量和内存峰值，结果写入 JSON。
+内存峰值为 tracemalloc 统计的 Python 分配峰值（含 numpy 数组，lxml 等 C 扩展的内部内存不计入），
+单独运行一次测量，不影响计时。
+指定基线文件时与基线比较，吞吐量下降或内存峰值上升超过容差（BENCHMARK_CONFIG）视为性能回退，
+以非零状态码退出。
+
+用法:
+    python benchmark.py --save-baseline                          # 在当前版本上生成基线
+    python benchmark.py --baseline benchmark_baseline.json       # 修改后与基线比较
+    python benchmark.py --sizes 10000 --only parse filter        # 快速运行部分基准
+"""
+
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+
+from config import BENCHMARK_CONFIG
+from page_parser import SearchPageParser
+from product import MISSING, ProductBatch, parse_currency
+
+logger = logging.getLogger(__name__)
+
+BENCHMARKS = ("parse", "filter", "export")
+
+# 筛选基准使用的条件，覆盖价格、评分和评论数列
+BENCHMARK_FILTERS = {"min_price": 100, "max_price": 1500, "min_rating": 4.0, "min_reviews": 50}
+
+
+def load_page(path: Optional[str] = None) -> str:
+    """读取基准测试使用的搜索结果页"""
+    with open(path or BENCHMARK_CONFIG["fixture"], encoding="utf-8") as f:
+        return f.read()
+
+
+def synthesize_products(count: int, templates: List[Dict], seed: int = 0) -> List[Dict]:
+    """
+    以样例商品为模板合成指定数量的商品
+
+    名称、图片等长文本沿用模板（与真实爬取结果一样大量重复），ASIN、链接、价格、评分和评论数
+    按固定随机种子生成，约 5% 的商品缺少价格或评分，结果可重复。
+
+    Args:
+        count: 商品数量
+        templates: 模板商品（通常为样例页面的解析结果）
+        seed: 随机种子
+
+    Returns:
+        商品字典列表
+    """
+    rng = random.Random(seed)
+    products = []
+    for i in range(count):
+        product = dict(templates[i % len(templates)])
+        asin = f"B{i:09d}"
+        currency = parse_currency(product.get("价格")) or "$"
+        product["ASIN"] = asin
+        product["商品链接"] = f"https://www.amazon.sg/dp/{asin}"
+        product["价格"] = f"{currency}{rng.uniform(5, 3000):,.2f}" if rng.random() > 0.05 else MISSING
+        product["评分"] = f"{rng.uniform(1, 5):.1f}" if rng.random() > 0.05 else MISSING
+        product["评论数"] = f"{rng.randint(0, 50_000):,}"
+        products.append(product)
+    return products
+
+
+def measure(func: Callable[[], object], rows: int, repeat: int = 3, memory: bool = True) -> Dict:
+    """
+    测量一个基准
+
+    Args:
+        func: 被测函数
+        rows: 每次调用处理的行数（商品数）
+        repeat: 计时运行次数，取最快的一次
+        memory: 是否测量内存峰值（需要额外运行一次，tracemalloc 下分配密集的代码会慢数倍）
+
+    Returns:
+        rows、seconds、rows_per_sec、peak_mb（不测量内存时为 None）
+    """
+    best = float("inf")
+    for _ in range(max(1, repeat)):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+
+    peak_mb = None
+    if memory:
+        # tracemalloc 会显著拖慢分配，内存峰值单独测量
+        gc.collect()
+        tracemalloc.start()
+        try:
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        peak_mb = round(peak / 1024 / 1024, 3)
+
+    return {
+        "rows": rows,
+        "seconds": round(best, 6),
+        "rows_per_sec": round(rows / best, 1) if best > 0 else float("inf"),
+        "peak_mb": peak_mb,
+    }
+
+
+def bench_parse(page_html: str, pages: int = 20, repeat: int = 3,
+                engines: Iterable[str] = SearchPageParser.ENGINES, memory: bool = True) -> Dict[str, Dict]:
+    """解析基准：每次运行解析 pages 次样例页面"""
+    results = {}
+    for engine in engines:
+        parser = SearchPageParser(engine)
+        cards = len(parser.parse(page_html))  # 预热
+
+        def run():
+            for _ in range(pages):
+                parser.parse(page_html)
+
+        results[f"parse.{engine}"] = measure(run, cards * pages, repeat, memory)
+    return results
+
+
+def bench_filter(products: List[Dict], sizes: Iterable[int], repeat: int = 3,
+                 memory: bool = True) -> Dict[str, Dict]:
+    """筛选基准：列表、生成器和 ProductBatch 三条路径"""
+    from amazon_crawler import AmazonCrawler
+
+    crawler = AmazonCrawler()
+    results = {}
+    try:
+        for size in sizes:
+            subset = products[:size]
+            results[f"filter.list@{size}"] = measure(
+                lambda: crawler.filter_products(subset, BENCHMARK_FILTERS), size, repeat, memory)
+            results[f"filter.stream@{size}"] = measure(
+                lambda: crawler.filter_products(iter(subset), BENCHMARK_FILTERS), size, repeat, memory)
+            batch = ProductBatch.from_dicts(subset)
+            results[f"filter.batch@{size}"] = measure(lambda: batch.filter(BENCHMARK_FILTERS), size, repeat,
+                                                      memory)
+            del batch
+    finally:
+        crawler.close()
+    return results
+
+
+def bench_export(products: List[Dict], sizes: Iterable[int], repeat: int = 1,
+                 max_rows: Optional[int] = None, memory: bool = True) -> Dict[str, Dict]:
+    """导出基准：save_to_excel 写入临时文件"""
+    from amazon_crawler import AmazonCrawler
+
+    max_rows = BENCHMARK_CONFIG["max_export_rows"] if max_rows is None else max_rows
+    crawler = AmazonCrawler()
+    results = {}
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "benchmark.xlsx")
+            for size in sizes:
+                if size > max_rows:
+                    logger.info(f"跳过 {size} 行的导出基准（超过 {max_rows} 行）")
+                    continue
+                subset = products[:size]
+                results[f"export.xlsx@{size}"] = measure(lambda: crawler.save_to_excel(subset, path), size, repeat,
+                                                       memory)
+                if not os.path.exists(path):
+                    raise RuntimeError("save_to_excel 没有生成文件")
+    finally:
+        crawler.close()
+    return results
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(sizes: Optional[Iterable[int]] = None, only: Iterable[str] = BENCHMARKS,
+                   repeat: int = 3, pages: int = 20, page_path: Optional[str] = None,
+                   engines: Iterable[str] = SearchPageParser.ENGINES,
+                   max_export_rows: Optional[int] = None, memory: bool = True) -> Dict:
+    """
+    运行基准测试
+
+    Args:
+        sizes: 合成商品数量，默认读取 BENCHMARK_CONFIG["sizes"]
+        only: 运行的基准（parse / filter / export）
+        repeat: 每项计时运行次数（导出只运行一次）
+        pages: 解析基准每次运行解析的页数
+        page_path: 样例页面路径
+        engines: 解析基准使用的解析引擎
+        max_export_rows: 导出基准的最大行数
+        memory: 是否测量内存峰值
+
+    Returns:
+        {"meta": 运行环境, "results": 基准名 -> 测量结果}
+    """
+    sizes = sorted(BENCHMARK_CONFIG["sizes"] if sizes is None else sizes)
+    page_html = load_page(page_path)
+    results = {}
+    if "parse" in only:
+        results.update(bench_parse(page_html, pages, repeat, engines, memory))
+    if ("filter" in only or "export" in only) and sizes:
+        started = time.perf_counter()
+        products = synthesize_products(sizes[-1], SearchPageParser().parse(page_html))
+        logger.info(f"合成 {len(products)} 个商品，耗时 {time.perf_counter() - started:.1f} 秒")
+        if "filter" in only:
+            results.update(bench_filter(products, sizes, repeat, memory))
+        if "export" in only:
+            results.update(bench_export(products, sizes, 1, max_export_rows, memory))
+        del products
+
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict, baseline: Dict, throughput_tolerance: Optional[float] = None,
+            memory_tolerance: Optional[float] = None) -> List[str]:
+    """
+    与基线比较，找出性能回退的基准
+
+    只比较两边都有的基准。吞吐量低于基线 (1 - throughput_tolerance) 倍，
+    或内存峰值高于基线 (1 + memory_tolerance) 倍视为回退。
+
+    Args:
+        current: run_benchmarks 的结果
+        baseline: 基线结果（同样的结构）
+        throughput_tolerance: 吞吐量容差，默认读取 BENCHMARK_CONFIG
+        memory_tolerance: 内存峰值容差，默认读取 BENCHMARK_CONFIG
+
+    Returns:
+        回退说明列表，为空表示没有回退
+    """
+    if throughput_tolerance is None:
+        throughput_tolerance = BENCHMARK_CONFIG["throughput_tolerance"]
+    if memory_tolerance is None:
+        memory_tolerance = BENCHMARK_CONFIG["memory_tolerance"]
+
+    regressions = []
+    for name, result in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        if result["rows_per_sec"] < base["rows_per_sec"] * (1 - throughput_tolerance):
+            regressions.append(f"{name}: 吞吐量 {result['rows_per_sec']:.0f}/秒，"
+                               f"基线 {base['rows_per_sec']:.0f}/秒")
+        if result["peak_mb"] is None or base.get("peak_mb") is None:
+            continue
+        # 内存峰值很小时波动占比大，不足 1MB 的差异忽略
+        if (result["peak_mb"] > base["peak_mb"] * (1 + memory_tolerance)
+                and result["peak_mb"] - base["peak_mb"] > 1):
+            regressions.append(f"{name}: 内存峰值 {result['peak_mb']:.1f}MB，基线 {base['peak_mb']:.1f}MB")
+    return regressions
+
+
+def format_report(current: Dict, baseline: Optional[Dict] = None) -> str:
+    """格式化为文本表格，有基线时附带吞吐量变化"""
+    lines = [f"{'基准':24s} {'行数':>9s} {'耗时(s)':>9s} {'行/秒':>12s} {'峰值(MB)':>10s}"]
+    base_results = (baseline or {}).get("results", {})
+    for name, result in current["results"].items():
+        line = (f"{name:24s} {result['rows']:>9d} {result['seconds']:>9.3f} "
+                f"{result['rows_per_sec']:>12.0f} "
+                + (f"{result['peak_mb']:>10.1f}" if result["peak_mb"] is not None else f"{'-':>10s}"))
+        base = base_results.get(name)
+        if base and base["rows_per_sec"]:
+            line += f"  {(result['rows_per_sec'] / base['rows_per_sec'] - 1) * 100:+.1f}%"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="解析、筛选和导出的离线基准测试")
+    arg_parser.add_argument("--sizes", type=int, nargs="+", help="合成商品数量，默认读取 BENCHMARK_CONFIG")
+    arg_parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=list(BENCHMARKS), help="只运行部分基准")
+    arg_parser.add_argument("--repeat", type=int, default=3, help="每项计时运行次数，取最快的一次")
+    arg_parser.add_argument("--pages", type=int, default=20, help="解析基准每次运行解析的页数")
+    arg_parser.add_argument("--no-memory", action="store_true", help="不测量内存峰值（节省一次 tracemalloc 运行）")
+    arg_parser.add_argument("--page", default=None, help="样例搜索结果页路径")
+    arg_parser.add_argument("--output", default="benchmark_results.json", help="结果 JSON 文件")
+    arg_parser.add_argument("--baseline", default=None, help="基线 JSON 文件，指定时检查性能回退")
+    arg_parser.add_argument("--save-baseline", action="store_true", help="把本次结果保存为基线（--baseline 或 benchmark_baseline.json）")
+    arg_parser.add_argument("--throughput-tolerance", type=float, default=None, help="吞吐量容差，例如 0.2")
+    arg_parser.add_argument("--memory-tolerance", type=float, default=None, help="内存峰值容差，例如 0.25")
+    args = arg_parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    # 被测代码每次调用都会记录日志，只保留警告
+    for name in ("amazon_crawler", "sinks"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    current = run_benchmarks(args.sizes, args.only, args.repeat, args.pages, args.page,
+                             memory=not args.no_memory)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(current, f, ensure_ascii=False, indent=2)
+
+    if args.save_baseline:
+        baseline_path = args.baseline or "benchmark_baseline.json"
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(current, f, ensure_ascii=False, indent=2)
+        print(format_report(current))
+        print(f"\n基线已保存到 {baseline_path}")
+        return
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print(format_report(current, baseline))
+    print(f"\n结果已保存到 {args.output}")
+
+    if baseline is not None:
+        regressions = compare(current, baseline, args.throughput_tolerance, args.memory_tolerance)
+        if regressions:
+            print("\n❌ 性能回退:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            sys.exit(1)
+        print("✅ 没有性能回退")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+精简浏览器配置
+
+爬虫只读取文本和 img.s-image 的 src 属性，不需要真正下载图片、字体、视频和广告/跟踪脚本。
+资源屏蔽配置通过 Chrome DevTools 的 Network.setBlockedURLs 生效，被屏蔽的请求不会发出，
+同时应用 BROWSER_CONFIG 中的窗口大小和页面加载超时。
+
+    full     不屏蔽任何资源
+    lean     屏蔽图片、字体、音视频和第三方广告/跟踪（默认）
+    minimal  在 lean 的基础上再屏蔽样式表（innerText 依赖布局，script 提取模式下文本可能略有差异）
+
+用法:
+    python browser_profile.py "docs/Amazon.sg _ laptop.html" --repeat 5
+    # 启动本地服务回放保存的搜索页，比较各配置的加载耗时、传输字节数和 JS 堆内存
+"""
+
+import argparse
+import logging
+import os
+import re
+import statistics
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Tuple
+
+from config import BROWSER_CONFIG
+
+logger = logging.getLogger(__name__)
+
+IMAGE_PATTERNS = ("*.jpg*", "*.jpeg*", "*.png*", "*.gif*", "*.webp*", "*.svg*", "*.ico*", "*.avif*")
+FONT_PATTERNS = ("*.woff*", "*.ttf*", "*.otf*", "*.eot*")
+MEDIA_PATTERNS = ("*.mp4*", "*.webm*", "*.m3u8*", "*.mp3*", "*.ogg*")
+TRACKER_PATTERNS = (
+    "*amazon-adsystem.com*",
+    "*aax-*.amazon.*",
+    "*fls-*.amazon.*",
+    "*unagi*.amazon.*",
+    "*/uedata*",
+    "*doubleclick.net*",
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*facebook.net*",
+)
+STYLE_PATTERNS = ("*.css*",)
+
+
+@dataclass(frozen=True)
+class BrowserProfile:
+    """浏览器资源屏蔽配置"""
+    name: str
+    blocked_urls: Tuple[str, ...] = ()
+
+
+PROFILES: Dict[str, BrowserProfile] = {
+    "full": BrowserProfile("full"),
+    "lean": BrowserProfile("lean", IMAGE_PATTERNS + FONT_PATTERNS + MEDIA_PATTERNS + TRACKER_PATTERNS),
+    "minimal": BrowserProfile("minimal", IMAGE_PATTERNS + FONT_PATTERNS + MEDIA_PATTERNS
+                              + TRACKER_PATTERNS + STYLE_PATTERNS),
+}
+
+
+def get_profile(profile=None) -> BrowserProfile:
+    """
+    获取资源屏蔽配置
+
+    Args:
+        profile: 配置名称或 BrowserProfile，默认读取 BROWSER_CONFIG["resource_profile"]
+    """
+    if isinstance(profile, BrowserProfile):
+        return profile
+    name = profile or BROWSER_CONFIG["resource_profile"]
+    if name not in PROFILES:
+        raise ValueError(f"不支持的浏览器配置: {name}，可选值: {tuple(PROFILES)}")
+    return PROFILES[name]
+
+
+def window_size_argument() -> str:
+    """BROWSER_CONFIG 中窗口大小对应的 Chrome 启动参数"""
+    width, height = BROWSER_CONFIG["window_size"]
+    return f"--window-size={width},{height}"
+
+
+def apply_profile(driver, profile=None, page_load_timeout: float = None) -> BrowserProfile:
+    """
+    在已启动的浏览器上应用资源屏蔽配置和页面加载超时
+
+    Args:
+        driver: WebDriver 实例
+        profile: 配置名称或 BrowserProfile，默认读取 BROWSER_CONFIG["resource_profile"]
+        page_load_timeout: 页面加载超时（秒），默认读取 BROWSER_CONFIG["timeout"]
+
+    Returns:
+        实际应用的配置
+    """
+    profile = get_profile(profile)
+    driver.set_page_load_timeout(BROWSER_CONFIG["timeout"] if page_load_timeout is None else page_load_timeout)
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(profile.blocked_urls)})
+    except Exception as e:
+        # 非 Chromium 驱动不支持 CDP，退回为不屏蔽资源
+        logger.warning(f"应用浏览器配置 {profile.name} 失败: {e}")
+    return profile
+
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    """/s 返回保存的搜索页，其余路径按扩展名返回固定大小的假资源，并统计传输字节数"""
+
+    protocol_version = "HTTP/1.1"
+    page = b""
+    asset_sizes = {".jpg": 40000, ".png": 20000, ".gif": 2000, ".webp": 30000, ".svg": 3000,
+                   ".woff": 50000, ".woff2": 40000, ".css": 60000, ".js": 120000, ".mp4": 500000}
+    lock = threading.Lock()
+    bytes_sent = 0
+
+    def do_GET(self):
+        if self.path.startswith("/s"):
+            body, content_type = self.page, "text/html; charset=utf-8"
+        else:
+            extension = os.path.splitext(self.path.split("?")[0])[1].lower()
+            body = b"\0" * self.asset_sizes.get(extension, 1000)
+            content_type = "application/octet-stream"
+        with _FixtureHandler.lock:
+            _FixtureHandler.bytes_sent += len(body)
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fixture_server(page_path: str) -> Tuple[ThreadingHTTPServer, str]:
+    """启动本地服务回放保存的搜索页，页面引用的外部资源改写到本地，确保测量不依赖网络"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FixtureHandler)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    with open(page_path, encoding="utf-8") as f:
+        html = f.read()
+    # https://host/path -> http://127.0.0.1:port/_ext/host/path（包括脚本中动态加载的地址），
+    # 保留主机名以便匹配跟踪脚本规则
+    html = re.sub(r'https?://([a-z0-9.-]+\.[a-z]{2,})/', rf'{base_url}/_ext/\1/', html)
+    html = html.replace('"./', f'"{base_url}/_files/')
+    _FixtureHandler.page = html.encode("utf-8")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, base_url
+
+
+def measure(page_path: str, profiles=None, repeat: int = 5, headless: bool = True) -> Dict[str, Dict]:
+    """
+    对比各资源屏蔽配置加载同一页面的耗时、传输字节数和 JS 堆内存
+
+    Args:
+        page_path: 保存的搜索结果页 HTML 路径
+        profiles: 要测量的配置名称，默认全部
+        repeat: 每个配置加载页面的次数
+        headless: 是否使用无头模式
+
+    Returns:
+        配置名称 -> 测量结果
+    """
+    from driver_pool import create_driver, get_js_heap_mb
+    from page_ready import wait_for_page
+
+    server, base_url = start_fixture_server(page_path)
+    results = {}
+    try:
+        for name in profiles or PROFILES:
+            driver = create_driver(headless, "Mozilla/5.0 (profile benchmark)", resource_profile=name)
+            try:
+                # 关闭缓存，保证每次加载都重新请求资源
+                driver.execute_cdp_cmd("Network.setCacheDisabled", {"cacheDisabled": True})
+                timings, transferred, states = [], [], []
+                for i in range(repeat):
+                    with _FixtureHandler.lock:
+                        _FixtureHandler.bytes_sent = 0
+                    start = time.perf_counter()
+                    driver.get(f"{base_url}/s?k=laptop&page={i + 1}")
+                    states.append(wait_for_page(driver, BROWSER_CONFIG["timeout"]))
+                    timings.append(time.perf_counter() - start)
+                    # 等待剩余的异步资源请求完成后再统计字节数
+                    time.sleep(0.5)
+                    with _FixtureHandler.lock:
+                        transferred.append(_FixtureHandler.bytes_sent)
+                results[name] = {
+                    "median_load_seconds": statistics.median(timings),
+                    "median_bytes": statistics.median(transferred),
+                    "js_heap_mb": get_js_heap_mb(driver),
+                    "states": sorted(set(states)),
+                }
+            finally:
+                driver.quit()
+    finally:
+        server.shutdown()
+    return results
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="比较浏览器资源屏蔽配置的加载速度")
+    parser.add_argument("html_file", help="保存的搜索结果页 HTML 文件")
+    parser.add_argument("--repeat", type=int, default=5, help="每个配置加载页面的次数")
+    parser.add_argument("--profiles", nargs="+", choices=list(PROFILES), default=None, help="要测量的配置")
+    parser.add_argument("--show-browser", action="store_true", help="显示浏览器窗口")
+    args = parser.parse_args()
+
+    results = measure(args.html_file, args.profiles, args.repeat, headless=not args.show_browser)
+    baseline = results.get("full")
+    for name, result in results.items():
+        line = (f"{name:8s} 加载 {result['median_load_seconds'] * 1000:7.1f} ms  "
+                f"传输 {result['median_bytes'] / 1024:8.1f} KB  状态 {','.join(result['states'])}")
+        if result["js_heap_mb"] is not None:
+            line += f"  JS 堆 {result['js_heap_mb']:.1f} MB"
+        if baseline and name != "full" and result["median_load_seconds"] > 0:
+            line += f"  加速 {baseline['median_load_seconds'] / result['median_load_seconds']:.2f}x"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
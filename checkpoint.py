@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+爬取检查点
+
+以追加写入的 JSONL 日志记录已完成的（关键词, 页码）及其商品，
+任务中断后重新运行时从未完成的页面继续，而不是全部重新爬取。
+关键词爬取完成后调用 finish() 清除其记录，所有关键词都完成时日志文件被截断；
+加载时如果日志中有被覆盖、已完成或无法解析的行，会重写为只包含有效记录的紧凑文件。
+
+每行格式:
+    {"keyword": "laptop", "page": 3, "has_next": true, "products": [...], "time": 1720000000.0}
+    {"keyword": "laptop", "finished": true, "time": 1720000000.0}     # 关键词已完成
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PageRecord:
+    """检查点中一个已完成页面的记录"""
+    keyword: str
+    page: int
+    products: List[Dict]
+    has_next: bool
+
+
+class CrawlCheckpoint:
+    """基于追加写入 JSONL 的爬取检查点（线程安全）"""
+
+    def __init__(self, path: str, fsync: bool = True):
+        """
+        初始化检查点
+
+        Args:
+            path: 检查点日志文件路径，不存在时自动创建
+            fsync: 每写入一页是否立即刷盘，保证进程崩溃后记录不丢失
+        """
+        self.path = path
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._pages: Dict[str, Dict[int, PageRecord]] = {}
+        self._load()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _load(self):
+        """读取已有的检查点日志，日志中有多余的行时压缩重写"""
+        if not os.path.exists(self.path):
+            return
+        lines = 0
+        with open(self.path, encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                lines += 1
+                try:
+                    data = json.loads(line)
+                    if data.get("finished"):
+                        self._pages.pop(data["keyword"], None)
+                        continue
+                    record = PageRecord(data["keyword"], int(data["page"]), data["products"], bool(data["has_next"]))
+                except (json.JSONDecodeError, KeyError, TypeError, ValueError, AttributeError):
+                    # 崩溃时最后一行可能只写了一半
+                    logger.warning(f"忽略检查点中无法解析的第 {line_no} 行")
+                    continue
+                self._pages.setdefault(record.keyword, {})[record.page] = record
+        count = sum(len(pages) for pages in self._pages.values())
+        logger.info(f"从检查点 {self.path} 恢复 {count} 个已完成页面")
+        if lines > count:
+            self._compact()
+
+    def _compact(self):
+        """把当前有效的记录写入临时文件，再原子替换日志文件"""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for pages in self._pages.values():
+                for record in pages.values():
+                    f.write(self._dump(record) + "\n")
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        logger.info(f"检查点 {self.path} 已压缩")
+
+    @staticmethod
+    def _dump(record: PageRecord) -> str:
+        """序列化一个页面记录"""
+        return json.dumps({
+            "keyword": record.keyword,
+            "page": record.page,
+            "has_next": record.has_next,
+            "products": record.products,
+            "time": time.time(),
+        }, ensure_ascii=False)
+
+    def _write(self, line: str):
+        """追加一行并刷盘，调用方需持有锁"""
+        self._file.write(line + "\n")
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def completed_pages(self, keyword: str) -> Dict[int, PageRecord]:
+        """返回某关键词已完成的页面（页码 -> 记录）"""
+        with self._lock:
+            return dict(self._pages.get(keyword, {}))
+
+    def record_page(self, keyword: str, page: int, products: List[Dict], has_next: bool):
+        """
+        记录一个已完成的页面
+
+        Args:
+            keyword: 搜索关键词
+            page: 页码
+            products: 该页的商品列表
+            has_next: 是否有下一页
+        """
+        record = PageRecord(keyword, page, products, has_next)
+        line = self._dump(record)
+        with self._lock:
+            self._write(line)
+            self._pages.setdefault(keyword, {})[page] = record
+
+    def finish(self, keyword: str):
+        """
+        关键词爬取完成，清除其记录
+
+        其它关键词仍有记录时追加一行完成标记（下次加载时压缩掉），否则直接截断日志文件
+
+        Args:
+            keyword: 搜索关键词
+        """
+        with self._lock:
+            if self._pages.pop(keyword, None) is None:
+                return
+            if self._pages:
+                self._write(json.dumps({"keyword": keyword, "finished": True, "time": time.time()},
+                                       ensure_ascii=False))
+            else:
+                self._file.close()
+                self._file = open(self.path, "w", encoding="utf-8")
+
+    def clear(self):
+        """清空检查点（任务全部完成后调用）"""
+        with self._lock:
+            self._file.close()
+            self._pages.clear()
+            self._file = open(self.path, "w", encoding="utf-8")
+
+    def close(self):
+        """关闭检查点日志文件"""
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self) -> "CrawlCheckpoint":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
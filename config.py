@@ -9,6 +9,7 @@ BROWSER_CONFIG = {
     "user_agent": None,  # 自定义User-Agent，None表示随机
     "window_size": (1920, 1080),  # 浏览器窗口大小
     "timeout": 30,  # 页面加载超时时间（秒）
+    "resource_profile": "lean",  # 资源屏蔽配置：full / lean / minimal（见 browser_profile.py）
 }
 
 # 爬取设置
@@ -17,6 +18,64 @@ CRAWLER_CONFIG = {
     "delay_max": 4,  # 页面间最大延迟（秒）
     "max_retries": 3,  # 最大重试次数
     "default_max_pages": 5,  # 默认最大爬取页数
+    "marketplace": "us",  # 默认站点：us / ca / uk / de / au / sg（见 marketplace.py）
+    "concurrency": 8,  # 异步引擎全局最大并发请求数
+    "per_host_concurrency": 4,  # 每个主机最大并发请求数
+    "per_host_min_interval": 0.5,  # 同一主机相邻请求的最小间隔（秒）
+    "rate_min": 0.05,  # 自适应限速的最低速率（请求/秒），即最多 20 秒一页
+    "rate_max": 2.0,  # 自适应限速的最高速率（请求/秒）
+    "rate_increase": 0.05,  # 每个正常响应增加的速率（请求/秒）
+    "rate_decrease": 0.5,  # 遇到验证码、429/503 或慢页面时速率的乘数
+    "slow_page_seconds": 8,  # 超过该耗时的页面视为过慢
+    "parse_workers": 0,  # 异步引擎解析进程数，0 表示在获取线程中直接解析（见 parse_pool.py）
+    "parse_shm_threshold": 64 * 1024,  # 页面 HTML 达到该字节数时通过共享内存交给解析进程
+}
+
+# 页面缓存设置
+CACHE_CONFIG = {
+    "dir": ".page_cache",  # 缓存目录
+    "ttl": 24 * 3600,  # 缓存有效期（秒）
+    "max_size_mb": 512,  # 缓存总大小上限（MB），超过后淘汰最久未访问的页面
+}
+
+# 去重设置
+DEDUP_CONFIG = {
+    "bloom_capacity": 10_000_000,  # 布隆过滤器预计容纳的 ASIN 数量（约 18MB）
+    "bloom_error_rate": 0.001,  # 布隆过滤器误判率（新商品被误判为已出现的概率）
+}
+
+# 卖家信息缓存设置
+SELLER_CACHE_CONFIG = {
+    "path": "seller_cache.db",  # 缓存数据库路径，多个工作进程共享
+    "ttl": 7 * 24 * 3600,  # 卖家评分的有效期（秒）
+    "claim_timeout": 60,  # 等待其他进程获取同一卖家的最长时间（秒）
+}
+
+# 离线基准测试设置
+BENCHMARK_CONFIG = {
+    "fixture": "docs/Amazon.sg _ laptop.html",  # 解析基准使用的搜索结果页
+    "sizes": [10_000, 100_000, 1_000_000],  # 合成商品数量（筛选和导出基准）
+    "max_export_rows": 100_000,  # 导出基准的最大行数，更大的规模只测筛选（Excel 上限约 104 万行）
+    "throughput_tolerance": 0.2,  # 吞吐量低于基线的比例超过该值视为性能回退
+    "memory_tolerance": 0.25,  # 内存峰值高于基线的比例超过该值视为性能回退
+}
+
+# 爬取指标设置
+METRICS_CONFIG = {
+    "summary_file": "crawl_metrics.json",  # 运行结束后写入的 JSON 汇总，None表示不写
+    "prometheus_file": None,  # Prometheus 文本格式文件（供 node_exporter textfile 采集），None表示不写
+    "port": None,  # Prometheus HTTP 端口（/metrics），None表示不启动
+    "prefix": "amazon_crawler",  # Prometheus 指标名前缀
+    "max_pages": 1000,  # 汇总中保留的最近页面明细数量
+}
+
+# 性能剖析设置
+PROFILING_CONFIG = {
+    "dir": "profiles",  # 剖析结果输出目录
+    "modes": "sample,memory",  # 默认剖析方式：cpu（cProfile）、sample（采样调用栈）、memory（tracemalloc）
+    "interval": 0.005,  # 采样间隔（秒）
+    "top": 30,  # 报告中列出的函数 / 分配位置数量
+    "memory_frames": 25,  # tracemalloc 记录的调用栈深度
 }
 
 # 筛选条件默认值
@@ -33,6 +92,7 @@ OUTPUT_CONFIG = {
     "excel_filename_template": "amazon_{keyword}_{timestamp}.xlsx",  # Excel文件名模板
     "include_timestamp": True,  # 是否在文件名中包含时间戳
     "encoding": "utf-8",  # 文件编码
+    "store_path": "amazon_products.db",  # 本地商品库（SQLite）路径，每次爬取的结果按 ASIN 增量写入
 }
 
 # 日志设置
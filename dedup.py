@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+ASIN 去重
+
+同一个商品会以广告位、相邻页面或重叠关键词的形式多次出现。去重器以 data-asin 为键，
+解析器在提取字段之前先读取卡片的 data-asin，已出现过的卡片直接跳过，不再提取其余字段。
+
+    ExactDeduper  内存中的集合，结果精确，适合单次爬取或中小规模任务
+    BloomDeduper  持久化到文件的布隆过滤器，内存占用固定（默认 1000 万个 ASIN 约 18MB），
+                  可跨批次、跨运行复用；有极小概率把新商品误判为已出现（默认 0.1%），不会漏判
+
+用法:
+    deduper = ExactDeduper()
+    crawler = AmazonCrawler(deduper=deduper)
+
+    with BloomDeduper("seen_asins.bloom", capacity=50_000_000) as seen:
+        if seen.add(asin):
+            ...  # 新商品
+"""
+
+import hashlib
+import logging
+import math
+import mmap
+import os
+import struct
+from typing import Iterable, Optional
+
+from config import DEDUP_CONFIG
+from product import MISSING
+
+logger = logging.getLogger(__name__)
+
+# 文件头：魔数、位数、哈希函数个数、已加入的 ASIN 数量
+BLOOM_MAGIC = b"ASINBF01"
+BLOOM_HEADER = struct.Struct("<8sQIQ")
+_HASH_PAIR = struct.Struct("<QQ")
+
+
+def is_valid_asin(asin) -> bool:
+    """没有 ASIN 的商品无法去重，始终视为新商品"""
+    return bool(asin) and asin != MISSING
+
+
+def bloom_size(capacity: int, error_rate: float):
+    """
+    计算布隆过滤器的位数和哈希函数个数
+
+    Args:
+        capacity: 预计加入的 ASIN 数量
+        error_rate: 期望的误判率
+
+    Returns:
+        (位数, 哈希函数个数)
+    """
+    if capacity <= 0 or not 0 < error_rate < 1:
+        raise ValueError("capacity 必须为正数，error_rate 必须在 (0, 1) 之间")
+    num_bits = int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+    num_hashes = max(1, int(round(num_bits / capacity * math.log(2))))
+    return num_bits, num_hashes
+
+
+class ExactDeduper:
+    """基于集合的精确去重"""
+
+    def __init__(self, asins: Iterable[str] = (), known=None):
+        """
+        Args:
+            asins: 初始已出现的 ASIN
+            known: 只读的已知集合（例如往次运行保存的 BloomDeduper），其中的 ASIN 视为已出现
+        """
+        self._seen = {asin for asin in asins if is_valid_asin(asin)}
+        self.known = known
+
+    def __contains__(self, asin) -> bool:
+        if not is_valid_asin(asin):
+            return False
+        return asin in self._seen or (self.known is not None and asin in self.known)
+
+    def add(self, asin) -> bool:
+        """
+        记录一个 ASIN
+
+        Returns:
+            是否为新商品（没有 ASIN 时始终返回 True）
+        """
+        if not is_valid_asin(asin):
+            return True
+        if asin in self:
+            return False
+        self._seen.add(asin)
+        return True
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class BloomDeduper:
+    """持久化的布隆过滤器去重（位数组通过 mmap 映射到文件，修改直接落在页缓存中）"""
+
+    def __init__(self, path: Optional[str] = None, capacity: Optional[int] = None,
+                 error_rate: Optional[float] = None, readonly: bool = False):
+        """
+        打开（或创建）布隆过滤器
+
+        Args:
+            path: 文件路径，None 表示只在内存中使用
+            capacity: 预计加入的 ASIN 数量，默认读取 DEDUP_CONFIG["bloom_capacity"]（仅创建时生效）
+            error_rate: 期望的误判率，默认读取 DEDUP_CONFIG["bloom_error_rate"]（仅创建时生效）
+            readonly: 只读打开，之后加入的 ASIN 只保存在内存中，不写回文件（多进程共享同一文件时使用）
+        """
+        self.path = path
+        self.capacity = capacity or DEDUP_CONFIG["bloom_capacity"]
+        self.error_rate = error_rate or DEDUP_CONFIG["bloom_error_rate"]
+        self.readonly = readonly
+        self._file = None
+
+        if path and os.path.exists(path):
+            self._file = open(path, "rb" if readonly else "r+b")
+            self._buf = mmap.mmap(self._file.fileno(), 0,
+                                  access=mmap.ACCESS_COPY if readonly else mmap.ACCESS_WRITE)
+            magic, self.num_bits, self.num_hashes, self._count = BLOOM_HEADER.unpack_from(self._buf)
+            if magic != BLOOM_MAGIC:
+                self.close()
+                raise ValueError(f"{path} 不是 ASIN 布隆过滤器文件")
+            logger.info(f"已加载布隆过滤器 {path}：{self._count} 个 ASIN")
+        else:
+            self.num_bits, self.num_hashes = bloom_size(self.capacity, self.error_rate)
+            size = BLOOM_HEADER.size + (self.num_bits + 7) // 8
+            self._count = 0
+            if path and not readonly:
+                with open(path, "wb") as f:
+                    f.truncate(size)
+                self._file = open(path, "r+b")
+                self._buf = mmap.mmap(self._file.fileno(), size, access=mmap.ACCESS_WRITE)
+            else:
+                self._buf = bytearray(size)
+            self._write_header()
+
+    def _write_header(self):
+        BLOOM_HEADER.pack_into(self._buf, 0, BLOOM_MAGIC, self.num_bits, self.num_hashes, self._count)
+
+    def _positions(self, asin: str):
+        """双重哈希生成 num_hashes 个位位置"""
+        digest = hashlib.blake2b(asin.encode("utf-8"), digest_size=16).digest()
+        h1, h2 = _HASH_PAIR.unpack(digest)
+        h2 |= 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def __contains__(self, asin) -> bool:
+        if not is_valid_asin(asin):
+            return False
+        buf, offset = self._buf, BLOOM_HEADER.size
+        return all(buf[offset + (pos >> 3)] & (1 << (pos & 7)) for pos in self._positions(asin))
+
+    def add(self, asin) -> bool:
+        """
+        记录一个 ASIN
+
+        Returns:
+            是否为新商品（没有 ASIN 时始终返回 True）
+        """
+        if not is_valid_asin(asin):
+            return True
+        buf, offset = self._buf, BLOOM_HEADER.size
+        new = False
+        for pos in self._positions(asin):
+            index, mask = offset + (pos >> 3), 1 << (pos & 7)
+            if not buf[index] & mask:
+                buf[index] |= mask
+                new = True
+        if new:
+            self._count += 1
+            if self._count == self.capacity + 1:
+                logger.warning(f"布隆过滤器中的 ASIN 数量超过容量 {self.capacity}，误判率会逐渐升高")
+        return new
+
+    def __len__(self) -> int:
+        """已加入的 ASIN 数量（近似值）"""
+        return self._count
+
+    def flush(self):
+        """把计数和位数组写回文件"""
+        self._write_header()
+        if isinstance(self._buf, mmap.mmap) and not self.readonly:
+            self._buf.flush()
+
+    def close(self):
+        """写回并关闭文件"""
+        if self._file is None:
+            return
+        if not self._buf.closed:
+            self.flush()
+            self._buf.close()
+        self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def create_deduper(path: Optional[str] = None, **kwargs):
+    """
+    创建去重器
+
+    Args:
+        path: 布隆过滤器文件路径，传入时使用可持久化的 BloomDeduper，否则使用内存中的 ExactDeduper
+        kwargs: 传给 BloomDeduper 的其他参数
+    """
+    if path:
+        return BloomDeduper(path, **kwargs)
+    return ExactDeduper()
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Chrome 驱动创建与浏览器池
+
+- create_driver: 创建一个带反检测参数的 Chrome 驱动（ChromeDriver 路径每个进程只解析一次）
+- DriverPool: 维护 N 个预热的 Chrome 实例（各自独立的 UA 和用户目录），
+  借给搜索任务使用，超过页数上限或内存膨胀时自动回收重建
+
+用法:
+    pool = DriverPool(size=4)
+    with pool.lease() as pooled:
+        pooled.driver.get(url)
+        pooled.pages_served += 1
+    pool.close()
+"""
+
+import logging
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Optional
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+
+from browser_profile import apply_profile, window_size_argument
+
+logger = logging.getLogger(__name__)
+
+_driver_path: Optional[str] = None
+_driver_path_lock = threading.Lock()
+
+# 放入空闲队列的唤醒标记：池关闭或重建浏览器失败时唤醒阻塞在 acquire 中的线程
+_WAKEUP = object()
+
+
+def resolve_driver_path() -> str:
+    """
+    解析 ChromeDriver 可执行文件路径，结果在进程内缓存
+
+    Returns:
+        ChromeDriver 路径
+    """
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path:
+            return _driver_path
+
+        driver_path = None  # 初始化路径变量
+        # 尝试运行ChromeDriver配置脚本
+        try:
+            from setup_chromedriver import setup_chromedriver_auto, check_chromedriver_exists
+
+            if setup_chromedriver_auto():
+                logger.info("ChromeDriver配置成功")
+                # 配置成功后再次检查本地路径
+                existing_path = check_chromedriver_exists()
+                driver_path = existing_path
+            else:
+                driver_path = ChromeDriverManager().install()
+        except Exception as e:
+            logger.error(f"运行ChromeDriver配置脚本时出错: {e}")
+            raise Exception("ChromeDriver配置失败")
+
+        # 修复ChromeDriver路径问题 - 更精确的修复
+        if driver_path and os.path.isdir(driver_path):
+            # 如果是目录，查找chromedriver可执行文件
+            possible_paths = [
+                os.path.join(driver_path, "chromedriver"),
+                os.path.join(driver_path, "chromedriver-linux64", "chromedriver"),
+                os.path.join(driver_path, "chromedriver.exe"),
+                os.path.join(driver_path, "chromedriver-linux64", "chromedriver-linux64")
+            ]
+
+            for path in possible_paths:
+                if os.path.exists(path) and os.access(path, os.X_OK):
+                    driver_path = path
+                    break
+
+        # 确保driver_path不为None
+        if not driver_path:
+            raise Exception("无法找到有效的ChromeDriver路径")
+
+        logger.info(f"使用ChromeDriver路径: {driver_path}")
+        _driver_path = driver_path
+        return _driver_path
+
+
+def build_chrome_options(headless: bool, user_agent: str, profile_dir: Optional[str] = None) -> Options:
+    """构造 Chrome 启动参数"""
+    chrome_options = Options()
+
+    if headless:
+        chrome_options.add_argument("--headless")
+
+    # 添加反检测参数
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    chrome_options.add_experimental_option('useAutomationExtension', False)
+    chrome_options.add_argument(f"--user-agent={user_agent}")
+    chrome_options.add_argument(window_size_argument())
+    # DOMContentLoaded 后 get 即返回，由 page_ready 判断结果列表是否渲染完成，不必等待所有图片加载
+    chrome_options.page_load_strategy = "eager"
+    if profile_dir:
+        chrome_options.add_argument(f"--user-data-dir={profile_dir}")
+    return chrome_options
+
+
+def create_driver(headless: bool, user_agent: str, profile_dir: Optional[str] = None,
+                  resource_profile: Optional[str] = None):
+    """
+    创建 Chrome 驱动
+
+    Args:
+        headless: 是否使用无头模式
+        user_agent: User-Agent
+        profile_dir: 浏览器用户数据目录，None 表示使用临时目录
+        resource_profile: 资源屏蔽配置名称，默认读取 BROWSER_CONFIG["resource_profile"]
+
+    Returns:
+        WebDriver 实例
+    """
+    service = Service(resolve_driver_path())
+    driver = webdriver.Chrome(service=service, options=build_chrome_options(headless, user_agent, profile_dir))
+
+    # 执行反检测脚本
+    driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+    # 屏蔽图片、字体等不需要的资源，并设置页面加载超时
+    apply_profile(driver, resource_profile)
+
+    logger.info("Chrome驱动设置成功")
+    return driver
+
+
+def get_js_heap_mb(driver) -> Optional[float]:
+    """通过 CDP 读取页面 JS 堆内存占用（MB），不支持时返回 None"""
+    try:
+        driver.execute_cdp_cmd("Performance.enable", {})
+        metrics = driver.execute_cdp_cmd("Performance.getMetrics", {})
+        for metric in metrics.get("metrics", []):
+            if metric["name"] == "JSHeapTotalSize":
+                return metric["value"] / (1024 * 1024)
+    except Exception as e:
+        logger.debug(f"读取浏览器内存指标失败: {e}")
+    return None
+
+
+class PooledDriver:
+    """浏览器池中的一个 Chrome 实例"""
+
+    def __init__(self, driver, user_agent: str, profile_dir: str):
+        self.driver = driver
+        self.user_agent = user_agent
+        self.profile_dir = profile_dir
+        self.pages_served = 0
+        self.created_at = time.time()
+
+    def quit(self):
+        """关闭浏览器并删除用户目录"""
+        try:
+            self.driver.quit()
+        except Exception as e:
+            logger.debug(f"关闭浏览器时出错: {e}")
+        shutil.rmtree(self.profile_dir, ignore_errors=True)
+
+
+class DriverPool:
+    """可复用、预热的 Chrome 浏览器池（线程安全）"""
+
+    def __init__(self, size: int = 2, headless: bool = True, max_pages_per_driver: int = 50,
+                 max_memory_mb: float = 1024, prewarm: bool = True, user_agent=None,
+                 resource_profile: Optional[str] = None):
+        """
+        初始化浏览器池
+
+        Args:
+            size: 浏览器实例数量
+            headless: 是否使用无头模式
+            max_pages_per_driver: 单个浏览器最多服务的页数，超过后回收重建
+            max_memory_mb: JS 堆内存上限（MB），超过后回收重建
+            prewarm: 是否在创建时立即启动全部浏览器
+            user_agent: fake_useragent.UserAgent 实例，None 表示自动创建
+            resource_profile: 资源屏蔽配置名称，默认读取 BROWSER_CONFIG["resource_profile"]
+        """
+        if user_agent is None:
+            from fake_useragent import UserAgent
+            user_agent = UserAgent()
+
+        self.size = size
+        self.headless = headless
+        self.max_pages_per_driver = max_pages_per_driver
+        self.max_memory_mb = max_memory_mb
+        self.ua = user_agent
+        self.resource_profile = resource_profile
+
+        self._idle: "queue.Queue[PooledDriver]" = queue.Queue()
+        self._all: List[PooledDriver] = []
+        # 已预留名额、正在启动的浏览器数量，与 _all 一起计入 size 上限
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+        if prewarm:
+            for _ in range(size):
+                if self._reserve():
+                    self._idle.put(self._spawn())
+
+    def _reserve(self) -> bool:
+        """在锁内检查上限并预留一个启动名额，已达上限时返回 False"""
+        with self._lock:
+            if len(self._all) + self._pending >= self.size:
+                return False
+            self._pending += 1
+            return True
+
+    def _spawn(self) -> PooledDriver:
+        """启动一个新的浏览器实例（调用前需通过 _reserve 预留名额，启动失败时归还名额）"""
+        user_agent = self.ua.random
+        profile_dir = tempfile.mkdtemp(prefix="amazon_crawler_profile_")
+        try:
+            driver = create_driver(self.headless, user_agent, profile_dir, self.resource_profile)
+        except Exception:
+            shutil.rmtree(profile_dir, ignore_errors=True)
+            with self._lock:
+                self._pending -= 1
+            raise
+        pooled = PooledDriver(driver, user_agent, profile_dir)
+        with self._lock:
+            self._pending -= 1
+            closed = self._closed
+            if not closed:
+                self._all.append(pooled)
+        if closed:
+            # 启动期间池已关闭
+            pooled.quit()
+            raise RuntimeError("浏览器池已关闭")
+        return pooled
+
+    def _discard(self, pooled: PooledDriver):
+        """关闭并移除一个浏览器实例"""
+        with self._lock:
+            if pooled in self._all:
+                self._all.remove(pooled)
+        pooled.quit()
+
+    def _needs_recycle(self, pooled: PooledDriver) -> bool:
+        """检查浏览器是否需要回收"""
+        if pooled.pages_served >= self.max_pages_per_driver:
+            logger.info(f"浏览器已服务 {pooled.pages_served} 页，回收重建")
+            return True
+        heap_mb = get_js_heap_mb(pooled.driver)
+        if heap_mb is not None and heap_mb > self.max_memory_mb:
+            logger.info(f"浏览器内存 {heap_mb:.0f}MB 超过上限 {self.max_memory_mb}MB，回收重建")
+            return True
+        return False
+
+    def acquire(self, timeout: Optional[float] = None) -> PooledDriver:
+        """
+        借出一个浏览器，池中没有空闲实例且未达上限时启动新实例
+
+        Args:
+            timeout: 等待空闲实例的超时时间（秒），None 表示一直等待
+
+        Raises:
+            RuntimeError: 浏览器池已关闭（包括等待期间被关闭）
+            TimeoutError: 超时仍没有空闲实例
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if self._closed:
+                raise RuntimeError("浏览器池已关闭")
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                if self._reserve():
+                    return self._spawn()
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(f"等待空闲浏览器超时（{timeout} 秒）")
+                try:
+                    pooled = self._idle.get(timeout=remaining)
+                except queue.Empty:
+                    raise TimeoutError(f"等待空闲浏览器超时（{timeout} 秒）") from None
+            if pooled is _WAKEUP:
+                if self._closed:
+                    # 继续唤醒其他等待的线程
+                    self._idle.put(_WAKEUP)
+                continue
+            if self._closed:
+                raise RuntimeError("浏览器池已关闭")
+            return pooled
+
+    def release(self, pooled: PooledDriver, broken: bool = False):
+        """
+        归还浏览器，需要时回收重建
+
+        Args:
+            pooled: 借出的浏览器
+            broken: 浏览器已经不可用（会话断开、崩溃等），直接关闭并重建
+        """
+        if self._closed:
+            self._discard(pooled)
+            return
+        if broken or self._needs_recycle(pooled):
+            self._discard(pooled)
+            # 腾出的名额可能已被并发的 acquire 占用，此时不再重建
+            if not self._reserve():
+                return
+            try:
+                pooled = self._spawn()
+            except Exception as e:
+                logger.error(f"重建浏览器失败: {e}")
+                # 名额已归还，唤醒一个等待的线程自行启动
+                self._idle.put(_WAKEUP)
+                return
+        self._idle.put(pooled)
+
+    @contextmanager
+    def lease(self, timeout: Optional[float] = None):
+        """以上下文管理器的方式借用浏览器"""
+        pooled = self.acquire(timeout)
+        try:
+            yield pooled
+        finally:
+            self.release(pooled)
+
+    def close(self):
+        """关闭池中所有浏览器，并唤醒阻塞在 acquire 中的线程（它们会抛出 RuntimeError）"""
+        with self._lock:
+            self._closed = True
+            drivers = list(self._all)
+            self._all.clear()
+        self._idle.put(_WAKEUP)
+        for pooled in drivers:
+            pooled.quit()
+        logger.info(f"浏览器池已关闭，共关闭 {len(drivers)} 个浏览器")
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+商品详情补全
+
+搜索结果页上没有卖家信息，店铺名称和店铺评分只能从商品详情页（/dp/<ASIN>）和卖家主页（/sp?seller=<ID>）获取。
+DetailEnricher 在独立的线程池中以有限并发获取详情页，补全以下字段（由 EXTRACTION_CONFIG 控制）：
+
+    店铺名称    extract_store_name      详情页的卖家名称
+    店铺评分    extract_store_rating    卖家主页的评分（5 分制），亚马逊自营商品没有店铺评分
+    库存状态    extract_availability    详情页的库存信息
+    配送信息    extract_shipping        详情页的配送信息（覆盖搜索结果页上的配送信息）
+
+详情页使用独立的连接池和限速器，补全在后台进行，不会拖慢搜索结果页的爬取。
+传入 SellerCache 时，卖家评分在有效期内只获取一次（见 seller_cache.py）。
+
+用法:
+    with SellerCache() as sellers, DetailEnricher(max_workers=4, seller_cache=sellers) as enricher:
+        crawler = AmazonCrawler(enricher=enricher)        # 爬虫关闭时不会关闭传入的 enricher
+        products = crawler.search_products("laptop", filters={"min_store_rating": 4.5})
+
+        # 或者单独补全已有的商品，按输入顺序流式产出
+        for product in enricher.enrich(products, filters={"max_price": 500}):
+            ...
+"""
+
+import logging
+import re
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Deque, Dict, Iterable, Iterator, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from lxml import etree
+from lxml import html as lxml_html
+
+from config import EXTRACTION_CONFIG
+from fetcher import BaseFetcher, HttpFetcher
+from filter_engine import product_matches
+from marketplace import Marketplace, get_marketplace
+from product import MISSING, parse_marketplace
+from rate_limiter import AdaptiveRateLimiter, RateLimitedFetcher
+from seller_cache import SellerCache
+
+logger = logging.getLogger(__name__)
+
+AVAILABILITY_FIELD = "库存状态"
+
+# 只能在补全之后判断的筛选条件
+DETAIL_FILTERS = ("min_store_rating",)
+
+_DETAIL_XPATHS = {
+    "seller": "//*[@id='sellerProfileTriggerId']",
+    "seller_fallback": ("//*[@id='merchantInfoFeature_feature_div']"
+                        "//*[contains(concat(' ', normalize-space(@class), ' '), ' offer-display-feature-text-message ')]"),
+    "merchant_info": "//*[@id='merchant-info']",
+    "merchant_id": "//input[@id='merchantID']/@value",
+    "availability": "//*[@id='availability']",
+    "shipping": "//*[@id='mir-layout-DELIVERY_BLOCK-slot-PRIMARY_DELIVERY_MESSAGE_LARGE']",
+    "shipping_fallback": "//*[@id='deliveryBlockMessage']",
+}
+DETAIL_XPATHS = {name: etree.XPath(expr) for name, expr in _DETAIL_XPATHS.items()}
+
+_SELLER_XPATHS = {
+    "rating": "//*[@id='effective-timeperiod-rating-year-description']",
+    "feedback": "//*[@id='seller-info-feedback-summary']",
+}
+SELLER_XPATHS = {name: etree.XPath(expr) for name, expr in _SELLER_XPATHS.items()}
+
+_STARS_RE = re.compile(r"(\d+(?:\.\d+)?) out of 5")
+_POSITIVE_RE = re.compile(r"(\d+(?:\.\d+)?)\s*% positive")
+# 亚马逊自营时卖家名称中包含的文字
+_AMAZON_SELLER_RE = re.compile(r"^Amazon(\.[a-z.]+)?$|sold by Amazon", re.IGNORECASE)
+
+
+def _text(elem) -> Optional[str]:
+    """合并空白字符后的元素文本"""
+    if elem is None:
+        return None
+    text = " ".join(elem.text_content().split())
+    return text or None
+
+
+def parse_detail_page(page_html: str) -> Dict[str, Optional[str]]:
+    """
+    解析商品详情页
+
+    Args:
+        page_html: /dp/<ASIN> 页面 HTML
+
+    Returns:
+        seller（卖家名称）、seller_id、availability、shipping，缺失为 None
+    """
+    if not page_html:
+        return {"seller": None, "seller_id": None, "availability": None, "shipping": None}
+    root = lxml_html.fromstring(page_html)
+
+    def first(name):
+        found = DETAIL_XPATHS[name](root)
+        return found[0] if found else None
+
+    seller_elem = first("seller")
+    seller_id = None
+    if seller_elem is not None:
+        seller = _text(seller_elem)
+        href = seller_elem.get("href") or ""
+        seller_id = (parse_qs(urlsplit(href).query).get("seller") or [None])[0]
+    else:
+        seller = _text(first("seller_fallback"))
+    if not seller:
+        merchant_info = _text(first("merchant_info"))
+        if merchant_info and _AMAZON_SELLER_RE.search(merchant_info):
+            seller = "Amazon"
+    if not seller_id:
+        seller_id = first("merchant_id")
+
+    shipping_elem = first("shipping")
+    if shipping_elem is None:
+        shipping_elem = first("shipping_fallback")
+
+    return {
+        "seller": seller,
+        "seller_id": seller_id or None,
+        "availability": _text(first("availability")),
+        "shipping": _text(shipping_elem),
+    }
+
+
+def parse_seller_page(page_html: str) -> Optional[float]:
+    """
+    解析卖家主页的评分
+
+    Args:
+        page_html: /sp?seller=<ID> 页面 HTML
+
+    Returns:
+        5 分制评分，没有评分时返回 None
+    """
+    if not page_html:
+        return None
+    root = lxml_html.fromstring(page_html)
+    for name in ("rating", "feedback"):
+        for elem in SELLER_XPATHS[name](root):
+            text = _text(elem) or ""
+            match = _STARS_RE.search(text)
+            if match:
+                return float(match.group(1))
+            match = _POSITIVE_RE.search(text)
+            if match:
+                # 旧版页面只有好评率，换算为 5 分制
+                return round(float(match.group(1)) / 20, 2)
+    return None
+
+
+def is_amazon_seller(seller: Optional[str]) -> bool:
+    """卖家是否为亚马逊自营"""
+    return bool(seller) and bool(_AMAZON_SELLER_RE.search(seller.strip()))
+
+
+class DetailEnricher:
+    """有限并发的商品详情补全（线程安全）"""
+
+    def __init__(self, fetcher: Optional[BaseFetcher] = None, max_workers: int = 4,
+                 marketplace=None, rate_limiter: Optional[AdaptiveRateLimiter] = None,
+                 config: Optional[Dict] = None, seller_cache: Optional[SellerCache] = None):
+        """
+        初始化详情补全
+
+        Args:
+            fetcher: 页面获取后端（需线程安全），默认为独立的连接池 HttpFetcher，传入的后端由调用方关闭
+            max_workers: 同时获取的详情页数量
+            marketplace: 商品链接无法识别站点时使用的站点，默认读取 CRAWLER_CONFIG["marketplace"]
+            rate_limiter: 详情页使用的限速器，默认新建一个，与搜索结果页的限速互不影响
+            config: 字段开关，默认读取 EXTRACTION_CONFIG
+            seller_cache: 卖家信息缓存，多个商品、关键词和运行之间共享卖家评分，关闭补全时不会关闭，由调用方关闭
+        """
+        self.max_workers = max_workers
+        self.marketplace = get_marketplace(marketplace)
+        self.config = dict(EXTRACTION_CONFIG if config is None else config)
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter()
+        self.seller_cache = seller_cache
+        self._shared_fetcher = fetcher is not None
+        fetcher = fetcher or HttpFetcher(pool_size=max_workers, headers=self.marketplace.headers)
+        self.fetcher = RateLimitedFetcher(fetcher, self.rate_limiter)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="enrich")
+
+    def _marketplace_of(self, product: Dict) -> Marketplace:
+        """商品所属站点，无法识别时使用默认站点"""
+        try:
+            return get_marketplace(parse_marketplace(product.get("商品链接")) or self.marketplace)
+        except ValueError:
+            return self.marketplace
+
+    def _fetch_html(self, url: str) -> Optional[str]:
+        """获取页面，被拦截时返回 None"""
+        result = self.fetcher.fetch(url)
+        if result.blocked:
+            logger.warning(f"详情页被拦截: {url}")
+            return None
+        return result.html
+
+    def seller_rating(self, seller_id: str, marketplace: Marketplace, name: Optional[str] = None) -> Optional[float]:
+        """获取卖家评分，配置了缓存时优先读取缓存"""
+        url = marketplace.absolute_url(f"/sp?seller={seller_id}")
+
+        def fetch() -> Optional[float]:
+            html = self._fetch_html(url)
+            if html is None:
+                # 被拦截的结果不写入缓存
+                raise RuntimeError(f"卖家主页被拦截: {url}")
+            return parse_seller_page(html)
+
+        if self.seller_cache is None:
+            return fetch()
+        return self.seller_cache.get_or_fetch(seller_id, marketplace.domain, fetch, name).rating
+
+    def enrich_product(self, product: Dict) -> Dict:
+        """
+        补全单个商品（阻塞），失败时原样返回
+
+        Args:
+            product: 商品字典
+
+        Returns:
+            补全后的商品字典（新字典，不修改输入）
+        """
+        asin = product.get("ASIN")
+        if not asin or asin == MISSING:
+            return product
+        enriched = dict(product)
+        marketplace = self._marketplace_of(product)
+        try:
+            html = self._fetch_html(marketplace.absolute_url(f"/dp/{asin}"))
+            if html is None:
+                return product
+            detail = parse_detail_page(html)
+
+            seller = detail["seller"]
+            if self.config.get("extract_store_name") and seller:
+                enriched["店铺名称"] = seller
+            if self.config.get("extract_store_rating") and detail["seller_id"] and not is_amazon_seller(seller):
+                try:
+                    rating = self.seller_rating(detail["seller_id"], marketplace, seller)
+                except Exception as e:
+                    logger.warning(f"获取卖家 {detail['seller_id']} 评分失败: {e}")
+                    rating = None
+                if rating is not None:
+                    enriched["店铺评分"] = str(rating)
+            if self.config.get("extract_availability"):
+                enriched[AVAILABILITY_FIELD] = detail["availability"] or MISSING
+            if self.config.get("extract_shipping") and detail["shipping"]:
+                enriched["配送信息"] = detail["shipping"]
+        except Exception as e:
+            logger.warning(f"补全商品 {asin} 失败: {e}")
+            return product
+        return enriched
+
+    def submit(self, product: Dict) -> "Future[Dict]":
+        """提交到后台线程池补全，立即返回"""
+        return self._executor.submit(self.enrich_product, product)
+
+    @staticmethod
+    def completed(pending: Deque["Future[Dict]"], wait: bool = False) -> List[Dict]:
+        """
+        按提交顺序取出已完成的补全结果
+
+        Args:
+            pending: submit 返回的 Future 队列，取出的结果会从队列中移除
+            wait: 是否等待队列中的全部任务完成
+        """
+        results = []
+        while pending and (wait or pending[0].done()):
+            results.append(pending.popleft().result())
+        return results
+
+    def enrich(self, products: Iterable[Dict], filters: Optional[Dict] = None) -> Iterator[Dict]:
+        """
+        流式补全商品，按输入顺序产出
+
+        只有满足搜索结果页筛选条件的商品才会获取详情页，店铺评分条件在补全之后判断。
+        同时处理中的商品数量有上限，输入可以是惰性的迭代器。
+
+        Args:
+            products: 商品字典
+            filters: 筛选条件（与 DEFAULT_FILTERS 相同的键）
+
+        Yields:
+            补全后满足全部筛选条件的商品
+        """
+        cheap, detail = split_filters(filters)
+        pending: Deque[Future] = deque()
+        window = self.max_workers * 2
+        for product in products:
+            if cheap and not product_matches(product, cheap, self._marketplace_of(product)):
+                continue
+            pending.append(self.submit(product))
+            if len(pending) >= window:
+                pending[0].result()
+            for enriched in self.completed(pending):
+                if not detail or product_matches(enriched, detail, self._marketplace_of(enriched)):
+                    yield enriched
+        for enriched in self.completed(pending, wait=True):
+            if not detail or product_matches(enriched, detail, self._marketplace_of(enriched)):
+                yield enriched
+
+    def close(self):
+        """等待后台任务结束并释放自己创建的连接池，传入的获取后端和卖家缓存保持打开"""
+        self._executor.shutdown(wait=True)
+        if not self._shared_fetcher:
+            self.fetcher.close()
+
+    def __enter__(self) -> "DetailEnricher":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def split_filters(filters: Optional[Dict]):
+    """
+    把筛选条件拆分为搜索结果页即可判断的条件和需要补全后才能判断的条件
+
+    Returns:
+        (搜索结果页条件, 详情页条件)
+    """
+    filters = filters or {}
+    cheap = {name: value for name, value in filters.items() if name not in DETAIL_FILTERS}
+    detail = {name: value for name, value in filters.items() if name in DETAIL_FILTERS}
+    return cheap, detail
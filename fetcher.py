@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+页面获取后端
+
+- HttpFetcher: 基于连接池 requests.Session 的 HTTP 获取（默认，支持 keep-alive、gzip、UA 轮换）
+- SeleniumFetcher: 使用 Chrome 渲染页面
+- FallbackFetcher: 优先使用主后端，检测到验证码/机器人校验页面时才升级到备用后端
+"""
+
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from selenium.common.exceptions import WebDriverException
+from urllib3.util.retry import Retry
+
+from config import ANTI_DETECTION_CONFIG, BROWSER_CONFIG, CRAWLER_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# 验证码 / 机器人校验页面特征
+BLOCK_MARKERS = (
+    "/errors/validateCaptcha",
+    "Type the characters you see in this image",
+    "Enter the characters you see below",
+    "api-services-support@amazon.com",
+    "<title>Robot Check</title>",
+    "captchacharacters",
+)
+
+# 被拦截时常见的状态码
+BLOCK_STATUS_CODES = (403, 429, 503)
+
+# 各获取后端请求失败时抛出的异常（TimeoutException 是 WebDriverException 的子类）
+FETCH_ERRORS = (requests.RequestException, WebDriverException)
+
+DEFAULT_HEADERS = {
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive",
+    "Upgrade-Insecure-Requests": "1",
+}
+
+
+def is_blocked_page(html: Optional[str], status_code: int = 200) -> bool:
+    """
+    判断页面是否为验证码 / 机器人校验页面
+
+    Args:
+        html: 页面 HTML
+        status_code: HTTP 状态码
+
+    Returns:
+        是否被拦截
+    """
+    if status_code in BLOCK_STATUS_CODES:
+        return True
+    if not html:
+        return False
+    return any(marker in html for marker in BLOCK_MARKERS)
+
+
+@dataclass
+class FetchResult:
+    """一次页面获取的结果"""
+    url: str
+    html: str
+    status_code: int
+    backend: str
+    elapsed: float = 0.0
+    blocked: bool = False
+    # 各环节耗时（秒），例如 rate_limit_wait、http_get、driver_get、page_wait，由各层获取后端填写
+    timings: Dict[str, float] = field(default_factory=dict)
+
+    def add_timing(self, phase: str, seconds: float):
+        """累加一个环节的耗时"""
+        self.timings[phase] = self.timings.get(phase, 0.0) + seconds
+
+
+class BaseFetcher:
+    """页面获取后端基类"""
+
+    backend = "base"
+
+    def fetch(self, url: str) -> FetchResult:
+        """获取页面"""
+        raise NotImplementedError
+
+    def close(self):
+        """释放资源"""
+        pass
+
+
+class HttpFetcher(BaseFetcher):
+    """基于连接池 requests.Session 的 HTTP 页面获取"""
+
+    backend = "http"
+
+    def __init__(self, user_agent=None, pool_size: int = 10, timeout: float = None,
+                 max_retries: int = None, rotate_user_agent: bool = None, headers: Optional[Dict[str, str]] = None):
+        """
+        初始化 HTTP 获取后端
+
+        Args:
+            user_agent: fake_useragent.UserAgent 实例或固定的 UA 字符串，None 表示自动创建 UserAgent
+            pool_size: 每个主机的连接池大小
+            timeout: 请求超时时间（秒），默认读取 BROWSER_CONFIG["timeout"]
+            max_retries: 连接错误的重试次数，默认读取 CRAWLER_CONFIG["max_retries"]
+            rotate_user_agent: 是否每次请求轮换 UA，默认读取 ANTI_DETECTION_CONFIG
+            headers: 额外的请求头（例如站点对应的 Accept-Language）
+        """
+        if user_agent is None:
+            from fake_useragent import UserAgent
+            user_agent = BROWSER_CONFIG["user_agent"] or UserAgent()
+        self.user_agent = user_agent
+        self.timeout = timeout if timeout is not None else BROWSER_CONFIG["timeout"]
+        self.rotate_user_agent = (ANTI_DETECTION_CONFIG["enable_user_agent_rotation"]
+                                  if rotate_user_agent is None else rotate_user_agent)
+        if max_retries is None:
+            max_retries = CRAWLER_CONFIG["max_retries"]
+
+        self.session = requests.Session()
+        retry = Retry(total=max_retries, connect=max_retries, read=max_retries, status=0,
+                      backoff_factor=0.5, allowed_methods=frozenset(["GET", "HEAD"]))
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update(DEFAULT_HEADERS)
+        if headers:
+            self.session.headers.update(headers)
+        self.session.headers["User-Agent"] = self._next_user_agent()
+
+        if ANTI_DETECTION_CONFIG["enable_proxy"] and ANTI_DETECTION_CONFIG["proxies"]:
+            proxy = ANTI_DETECTION_CONFIG["proxies"][0]
+            self.session.proxies.update({"http": proxy, "https": proxy})
+
+    def _next_user_agent(self) -> str:
+        """获取 User-Agent"""
+        if isinstance(self.user_agent, str):
+            return self.user_agent
+        return self.user_agent.random
+
+    def fetch(self, url: str) -> FetchResult:
+        """通过 HTTP 获取页面"""
+        headers = None
+        if self.rotate_user_agent and not isinstance(self.user_agent, str):
+            headers = {"User-Agent": self._next_user_agent()}
+
+        start = time.perf_counter()
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+        elapsed = time.perf_counter() - start
+
+        if "charset" not in response.headers.get("Content-Type", "").lower():
+            # 未声明编码时 requests 会回退到 ISO-8859-1，亚马逊页面统一使用 UTF-8
+            response.encoding = "utf-8"
+        html = response.text
+        blocked = is_blocked_page(html, response.status_code)
+        logger.debug(f"HTTP 获取 {url}: 状态码 {response.status_code}，耗时 {elapsed:.2f}s")
+        return FetchResult(url=url, html=html, status_code=response.status_code,
+                           backend=self.backend, elapsed=elapsed, blocked=blocked,
+                           timings={"http_get": elapsed})
+
+    def close(self):
+        """关闭连接池"""
+        self.session.close()
+
+
+class SeleniumFetcher(BaseFetcher):
+    """使用 Chrome 浏览器渲染页面"""
+
+    backend = "browser"
+
+    def __init__(self, driver_factory: Callable, wait_timeout: float = 10):
+        """
+        初始化浏览器获取后端
+
+        Args:
+            driver_factory: 返回 WebDriver 的可调用对象，首次获取页面时才调用，避免不必要地启动浏览器
+            wait_timeout: 等待页面就绪的最长时间（秒），识别出结果列表、验证码或无结果页面时会立即返回
+        """
+        self.driver_factory = driver_factory
+        self.wait_timeout = wait_timeout
+
+    def fetch(self, url: str) -> FetchResult:
+        """通过浏览器获取页面"""
+        from page_ready import BLOCKED, TIMEOUT, wait_for_page
+
+        start = time.perf_counter()
+        driver = self.driver_factory()
+        started = time.perf_counter()
+        driver.get(url)
+        loaded = time.perf_counter()
+        state = wait_for_page(driver, self.wait_timeout)
+        if state == TIMEOUT:
+            logger.warning(f"等待搜索结果超时: {url}")
+        ready = time.perf_counter()
+        elapsed = ready - started
+
+        html = driver.page_source
+        blocked = state == BLOCKED or is_blocked_page(html)
+        logger.debug(f"页面状态 {state}，耗时 {elapsed:.2f}s: {url}")
+        timings = {
+            "driver_start": started - start,  # 首次获取时启动浏览器
+            "driver_get": loaded - started,
+            "page_wait": ready - loaded,
+            "page_source": time.perf_counter() - ready,
+        }
+        return FetchResult(url=url, html=html, status_code=200,
+                           backend=self.backend, elapsed=elapsed, blocked=blocked, timings=timings)
+
+
+class FallbackFetcher(BaseFetcher):
+    """优先使用主后端，被拦截时升级到备用后端（通常是浏览器）"""
+
+    def __init__(self, primary: BaseFetcher, fallback: BaseFetcher):
+        """
+        Args:
+            primary: 主获取后端
+            fallback: 被拦截时使用的备用后端
+        """
+        self.primary = primary
+        self.fallback = fallback
+        self.backend = primary.backend
+
+    def fetch(self, url: str) -> FetchResult:
+        """获取页面，遇到验证码页面或请求失败时升级到备用后端"""
+        timings = {}
+        try:
+            result = self.primary.fetch(url)
+            if not result.blocked:
+                return result
+            timings = result.timings
+            logger.warning(f"{self.primary.backend} 后端被拦截（状态码 {result.status_code}），升级到 {self.fallback.backend} 后端")
+        except FETCH_ERRORS as e:
+            logger.warning(f"{self.primary.backend} 后端请求失败: {e}，升级到 {self.fallback.backend} 后端")
+
+        result = self.fallback.fetch(url)
+        # 被拦截的那次请求同样计入各环节耗时
+        for phase, seconds in timings.items():
+            result.add_timing(phase, seconds)
+        return result
+
+    def close(self):
+        """释放所有后端资源"""
+        self.primary.close()
+        self.fallback.close()
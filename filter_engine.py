@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+列式筛选引擎
+
+把一批商品转换为带类型的 NumPy 列（价格、评分、评论数、店铺评分，缺失为 NaN），
+再把 DEFAULT_FILTERS 中的所有条件作为向量化掩码应用，返回保留下来的商品。
+与 AmazonCrawler._meets_criteria 的语义一致：无法解析的值不参与该项筛选。
+数字按站点格式解析（amazon.de 为 "1.299,99"），未指定站点时按美式格式 "1,299.99" 解析。
+
+用法:
+    frame = ProductFrame(products)         # 每列只在第一次用到时解析一次
+    cheap = frame.filter({"max_price": 500})
+    good = frame.filter({"min_rating": 4.5, "min_reviews": 100})
+    de = ProductFrame(products, marketplace="de")
+"""
+
+import math
+import re
+from functools import partial
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from marketplace import number_separators
+
+# 筛选条件 -> (商品字段, 列名, 比较方式)
+FILTER_COLUMNS = {
+    "min_price": ("价格", "price", "min"),
+    "max_price": ("价格", "price", "max"),
+    "min_store_rating": ("店铺评分", "store_rating", "min"),
+    "min_rating": ("评分", "rating", "min"),
+    "min_reviews": ("评论数", "reviews", "min"),
+}
+
+# 列名 -> 商品字段
+COLUMN_FIELDS = {column: field for field, column, _ in FILTER_COLUMNS.values()}
+
+# 按站点数字格式书写的列；评分和店铺评分在提取时已统一为 "4.5" 的写法
+LOCALIZED_COLUMNS = ("price", "reviews")
+
+NUMBER_PATTERN = r"(\d+(?:\.\d+)?)"
+_NUMBER_RE = re.compile(NUMBER_PATTERN)
+_COUNT_RE = re.compile(r"(\d+(?:\.\d+)?)\s*([KkMm]?)")
+_COUNT_MULTIPLIERS = {"": 1, "k": 1000, "m": 1000000}
+
+
+def _normalize_number(text: str, decimal: str, thousands: str) -> str:
+    """去掉千分位符号，并把小数点统一为 "." """
+    if thousands:
+        text = text.replace(thousands, "")
+    if decimal != ".":
+        text = text.replace(decimal, ".")
+    return text
+
+
+def parse_number(text, decimal: str = ".", thousands: str = ",") -> float:
+    """
+    从文本中解析第一个数字（忽略千分位符号和货币符号），无法解析时返回 NaN
+
+    例如 "$1,299.99" -> 1299.99，"S$293.26" -> 293.26，"4.5" -> 4.5，"N/A" -> NaN，
+    欧式格式 parse_number("1.299,99 €", ",", ".") -> 1299.99
+
+    Args:
+        text: 价格、评分等文本
+        decimal: 小数点，见 Marketplace.decimal_separator
+        thousands: 千分位符号，见 Marketplace.thousands_separator
+    """
+    if text is None:
+        return math.nan
+    if isinstance(text, (int, float)):
+        return float(text)
+    match = _NUMBER_RE.search(_normalize_number(text, decimal, thousands))
+    return float(match.group(1)) if match else math.nan
+
+
+def parse_count(text, decimal: str = ".", thousands: str = ",") -> float:
+    """解析评论数等计数，支持 "1,234"、"1.2K"（欧式 "1.234"、"1,2K"）这样的写法，无法解析时返回 NaN"""
+    if text is None:
+        return math.nan
+    if isinstance(text, (int, float)):
+        return float(text)
+    match = _COUNT_RE.search(_normalize_number(text, decimal, thousands))
+    if not match:
+        return math.nan
+    return float(match.group(1)) * _COUNT_MULTIPLIERS[match.group(2).lower()]
+
+
+COLUMN_PARSERS = {
+    "price": parse_number,
+    "rating": parse_number,
+    "store_rating": parse_number,
+    "reviews": parse_count,
+}
+
+
+def column_parser(column: str, marketplace=None):
+    """返回某列的解析函数，价格和评论数按站点的数字格式解析"""
+    if column in LOCALIZED_COLUMNS and marketplace:
+        decimal, thousands = number_separators(marketplace)
+        if (decimal, thousands) != (".", ","):
+            return partial(COLUMN_PARSERS[column], decimal=decimal, thousands=thousands)
+    return COLUMN_PARSERS[column]
+
+
+def _parse_column(values: List, column: str, marketplace=None) -> np.ndarray:
+    """把一列文本按站点的数字格式解析为 float64 数组"""
+    parser = column_parser(column, marketplace)
+    return np.fromiter(map(parser, values), dtype=np.float64, count=len(values))
+
+
+def product_matches(product: Dict, filters: Dict, marketplace=None) -> bool:
+    """
+    检查单个商品是否满足筛选条件（逐个商品的惰性筛选使用）
+
+    Args:
+        product: 商品字典
+        filters: 筛选条件
+        marketplace: 商品所属站点（决定数字格式），None 表示美式格式
+    """
+    parsed = {}
+    for name, (field, column, kind) in FILTER_COLUMNS.items():
+        threshold = filters.get(name)
+        if not threshold:
+            continue
+        if column not in parsed:
+            parsed[column] = column_parser(column, marketplace)(product.get(field))
+        value = parsed[column]
+        # NaN 与任何数比较都为 False，无法解析的值自然不会被过滤
+        if kind == "min" and value < threshold:
+            return False
+        if kind == "max" and value > threshold:
+            return False
+    return True
+
+
+class ProductFrame:
+    """一批商品的列式表示，数值列只解析一次，之后的每次筛选都是向量化掩码运算"""
+
+    def __init__(self, products: Iterable[Dict], marketplace=None):
+        """
+        Args:
+            products: 商品列表
+            marketplace: 商品所属站点（决定数字格式），None 表示美式格式
+        """
+        self.products = products if isinstance(products, list) else list(products)
+        self.marketplace = marketplace
+        self.columns: Dict[str, np.ndarray] = {}
+
+    def column(self, name: str) -> np.ndarray:
+        """返回某个数值列，第一次使用时解析并缓存"""
+        if name not in self.columns:
+            field = COLUMN_FIELDS[name]
+            self.columns[name] = _parse_column([product.get(field) for product in self.products], name,
+                                               self.marketplace)
+        return self.columns[name]
+
+    @classmethod
+    def from_columns(cls, products: List[Dict], columns: Dict[str, np.ndarray]) -> "ProductFrame":
+        """使用已经解析好的数值列创建（避免重复解析）"""
+        frame = cls.__new__(cls)
+        frame.products = products
+        frame.marketplace = None
+        frame.columns = {column: np.asarray(values, dtype=np.float64) for column, values in columns.items()}
+        return frame
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    def mask(self, filters: Dict) -> np.ndarray:
+        """计算满足筛选条件的布尔掩码"""
+        mask = np.ones(len(self.products), dtype=bool)
+        with np.errstate(invalid="ignore"):
+            for name, (_, column, kind) in FILTER_COLUMNS.items():
+                threshold = filters.get(name)
+                if not threshold:
+                    continue
+                values = self.column(column)
+                # 与逐个筛选一致：NaN 不会被排除
+                if kind == "min":
+                    mask &= ~(values < threshold)
+                else:
+                    mask &= ~(values > threshold)
+        return mask
+
+    def filter_indices(self, filters: Dict) -> np.ndarray:
+        """返回满足筛选条件的商品下标"""
+        return np.flatnonzero(self.mask(filters))
+
+    def filter(self, filters: Dict, limit: Optional[int] = None) -> List[Dict]:
+        """
+        返回满足筛选条件的商品
+
+        Args:
+            filters: 筛选条件
+            limit: 最多返回的商品数量
+        """
+        indices = self.filter_indices(filters)
+        if limit is not None:
+            indices = indices[:limit]
+        products = self.products
+        return [products[i] for i in indices]
+
+    def to_frame(self) -> pd.DataFrame:
+        """导出为带类型数值列的 DataFrame"""
+        return pd.DataFrame({name: self.column(name) for name in COLUMN_FIELDS})
+
+
+def filter_products(products: Iterable[Dict], filters: Dict, limit: Optional[int] = None,
+                    marketplace=None) -> List[Dict]:
+    """向量化筛选一批商品"""
+    return ProductFrame(products, marketplace).filter(filters, limit)
@@ -3,7 +3,17 @@
 
 import sys
 import os
+import argparse
+from contextlib import nullcontext
 from amazon_crawler import AmazonCrawler
+from product_store import ProductStore
+from dedup import ExactDeduper
+from enrichment import DetailEnricher
+from seller_cache import SellerCache
+from metrics import export_metrics
+from page_cache import PageCache
+from profiling import Profiler
+from config import METRICS_CONFIG, PROFILING_CONFIG
 import logging
 
 def print_banner():
@@ -98,8 +108,19 @@ def get_filter_options():
     
     return filters
 
+def parse_args():
+    """命令行参数（均为可选，关键词和筛选条件仍通过交互输入）"""
+    parser = argparse.ArgumentParser(description="亚马逊商品爬虫工具")
+    parser.add_argument("--profile", nargs="?", const=PROFILING_CONFIG["modes"], default=None,
+                        help="性能剖析，可指定方式：cpu,sample,memory（默认 %(const)s）")
+    parser.add_argument("--profile-dir", default=None, help="剖析结果目录，默认读取 PROFILING_CONFIG")
+    parser.add_argument("--cache", action="store_true", help="缓存搜索结果页，供之后 --replay 使用")
+    parser.add_argument("--replay", action="store_true", help="只从页面缓存回放，不产生任何网络请求")
+    return parser.parse_args()
+
 def main():
     """主函数"""
+    args = parse_args()
     print_banner()
     
     # 获取用户输入
@@ -125,34 +146,46 @@ def main():
     
     # 创建爬虫实例
     crawler = None
+    cache = None
+    enricher = None
+    seller_cache = None
     try:
         print("\n正在初始化爬虫...")
-        crawler = AmazonCrawler(headless=True)
-        
-        # 搜索商品
-        print(f"\n开始搜索关键词: {keyword}")
-        products = crawler.search_products(keyword, max_pages)
-        
-        if not products:
-            print("未找到任何商品")
-            return
-        
-        print(f"\n搜索完成，共找到 {len(products)} 个商品")
-        
-        # 应用筛选条件
-        if filters:
-            print("正在应用筛选条件...")
-            filtered_products = crawler.filter_products(products, filters)
-            products = filtered_products
+        # 店铺评分只在商品详情页上，设置了该条件时才在后台补全详情
+        if filters.get("min_store_rating"):
+            seller_cache = SellerCache()
+            enricher = DetailEnricher(seller_cache=seller_cache)
+        # 回放模式只读页面缓存，可以在没有网络的情况下重复剖析解析和筛选
+        cache = PageCache() if args.cache or args.replay else None
+        # 广告位和相邻页面中重复出现的商品只保留一次
+        crawler = AmazonCrawler(headless=True, deduper=ExactDeduper(), enricher=enricher, cache=cache,
+                                cache_mode="replay" if args.replay else "normal")
+        if METRICS_CONFIG["port"]:
+            crawler.metrics.serve(METRICS_CONFIG["port"])
         
-        if not products:
-            print("筛选后没有符合条件的商品")
-            return
+        profiler = Profiler(args.profile_dir, args.profile) if args.profile else nullcontext()
+        with profiler:
+            # 搜索商品（价格区间和最低评分直接写入搜索 URL，其余筛选条件在爬取时应用）
+            print(f"\n开始搜索关键词: {keyword}")
+            products = crawler.search_products(keyword, max_pages, filters=filters or None)
+            
+            if not products:
+                print("筛选后没有符合条件的商品" if filters else "未找到任何商品")
+                return
+            
+            print(f"\n搜索完成，共找到 {len(products)} 个{'符合条件的' if filters else ''}商品")
+            
+            # 保存到Excel
+            filename = f"amazon_{keyword.replace(' ', '_')}.xlsx"
+            print(f"\n正在保存到文件: {filename}")
+            crawler.save_to_excel(products, filename)
+        if args.profile:
+            print(f"剖析结果已保存到: {profiler.output_dir}")
         
-        # 保存到Excel
-        filename = f"amazon_{keyword.replace(' ', '_')}.xlsx"
-        print(f"\n正在保存到文件: {filename}")
-        crawler.save_to_excel(products, filename)
+        # 增量写入本地商品库，保留历次爬取的价格变化
+        with ProductStore() as store:
+            stats = store.upsert(products, keyword=keyword)
+        print(f"商品库 {store.path}：新增 {stats['inserted']} 个，更新 {stats['updated']} 个")
         
         print(f"\n爬取完成！")
         print(f"共获取 {len(products)} 个商品")
@@ -173,7 +206,16 @@ def main():
         logging.error(f"爬取错误: {e}")
     finally:
         if crawler:
+            # 各阶段耗时写入 crawl_metrics.json，便于排查爬取慢在哪里
+            export_metrics(crawler.metrics)
+            logging.info("各阶段耗时：\n" + crawler.metrics.report())
             crawler.close()
+        if enricher:
+            enricher.close()
+        if seller_cache:
+            seller_cache.close()
+        if cache:
+            cache.close()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
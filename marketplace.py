@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+亚马逊站点定义
+
+不同站点的域名、货币、页面语言和筛选节点各不相同，站点相关的信息统一放在这里：
+搜索 URL 和相对链接都基于站点的 base_url 构造，HTTP 请求使用站点对应的 Accept-Language，
+配送信息的兜底匹配使用站点语言的关键词，价格、评分、评论数按站点的小数点和千分位符号解析，
+导出价格时也按站点的格式（千分位、货币符号位置）还原。
+各站点搜索结果页的结构相同，CSS / XPath 选择器共用 page_parser 中的定义。
+
+用法:
+    sg = get_marketplace("sg")
+    sg.search_url("laptop", page=2)     # https://www.amazon.sg/s?k=laptop&page=2
+    sg.absolute_url("/dp/B0TEST")       # https://www.amazon.sg/dp/B0TEST
+    number_separators("amazon.de")      # (",", ".")
+    price_format("amazon.de")           # (",", ".", True)，即 "1.299,99 €"
+"""
+
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlencode
+
+from config import CRAWLER_CONFIG
+
+# 浏览器界面为中文时各站点都会显示的配送关键词
+CHINESE_DELIVERY_KEYWORDS = ("配送", "送达")
+ENGLISH_DELIVERY_KEYWORDS = ("delivery", "Delivery", "Ships to")
+
+
+@dataclass(frozen=True)
+class Marketplace:
+    """一个亚马逊站点"""
+    code: str
+    domain: str
+    currency: str
+    currency_symbol: str
+    language: str
+    delivery_keywords: Tuple[str, ...] = CHINESE_DELIVERY_KEYWORDS
+    # "N 星及以上" 筛选节点 ID（p_72），各站点不同，未知的站点不下推评分筛选
+    star_rating_nodes: Dict[int, str] = field(default_factory=dict, compare=False, hash=False)
+    base_url: str = ""
+    # 数字格式：美式 "1,299.99"，欧式（de）"1.299,99"
+    decimal_separator: str = "."
+    thousands_separator: str = ","
+    # 货币符号写在数字之后，例如 de 的 "1.299,99 €"
+    currency_suffix: bool = False
+
+    def __post_init__(self):
+        if not self.base_url:
+            object.__setattr__(self, "base_url", f"https://www.{self.domain}")
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        """该站点使用的请求头"""
+        return {"Accept-Language": f"{self.language},{self.language.split('-')[0]};q=0.9"}
+
+    def search_url(self, keyword: str, page: int = 1, params: Optional[Dict[str, str]] = None) -> str:
+        """
+        构造搜索结果页 URL
+
+        Args:
+            keyword: 搜索关键词
+            page: 页码
+            params: 额外的筛选 / 排序参数（见 query_planner.plan_query）
+        """
+        url = f"{self.base_url}/s?k={keyword.replace(' ', '+')}"
+        if params:
+            url = f"{url}&{urlencode(params)}"
+        if page > 1:
+            url = f"{url}&page={page}"
+        return url
+
+    def absolute_url(self, url: Optional[str]) -> Optional[str]:
+        """补全站内相对链接"""
+        if url and url.startswith("/"):
+            return self.base_url + url
+        return url
+
+
+MARKETPLACES: Dict[str, Marketplace] = {
+    "us": Marketplace("us", "amazon.com", "USD", "$", "en-US",
+                      CHINESE_DELIVERY_KEYWORDS + ENGLISH_DELIVERY_KEYWORDS,
+                      {4: "1248882011", 3: "1248883011", 2: "1248884011", 1: "1248885011"}),
+    "ca": Marketplace("ca", "amazon.ca", "CAD", "$", "en-CA",
+                      CHINESE_DELIVERY_KEYWORDS + ENGLISH_DELIVERY_KEYWORDS),
+    "uk": Marketplace("uk", "amazon.co.uk", "GBP", "£", "en-GB",
+                      CHINESE_DELIVERY_KEYWORDS + ENGLISH_DELIVERY_KEYWORDS),
+    "de": Marketplace("de", "amazon.de", "EUR", "€", "de-DE",
+                      CHINESE_DELIVERY_KEYWORDS + ("Lieferung", "Zustellung"),
+                      decimal_separator=",", thousands_separator=".", currency_suffix=True),
+    "au": Marketplace("au", "amazon.com.au", "AUD", "$", "en-AU",
+                      CHINESE_DELIVERY_KEYWORDS + ENGLISH_DELIVERY_KEYWORDS),
+    "sg": Marketplace("sg", "amazon.sg", "SGD", "S$", "en-SG",
+                      CHINESE_DELIVERY_KEYWORDS + ENGLISH_DELIVERY_KEYWORDS),
+}
+
+
+def get_marketplace(marketplace=None) -> Marketplace:
+    """
+    获取站点定义
+
+    Args:
+        marketplace: 站点代码（见 MARKETPLACES）、域名或 Marketplace，默认读取 CRAWLER_CONFIG["marketplace"]
+    """
+    if isinstance(marketplace, Marketplace):
+        return marketplace
+    name = (marketplace or CRAWLER_CONFIG["marketplace"]).lower()
+    if name in MARKETPLACES:
+        return MARKETPLACES[name]
+    domain = name[4:] if name.startswith("www.") else name
+    for candidate in MARKETPLACES.values():
+        if candidate.domain == domain:
+            return candidate
+    raise ValueError(f"不支持的站点: {marketplace}，可选值: {tuple(MARKETPLACES)}")
+
+
+@lru_cache(maxsize=64)
+def number_separators(marketplace=None) -> Tuple[str, str]:
+    """
+    站点的数字格式
+
+    Args:
+        marketplace: 站点代码、域名或 Marketplace，None 或无法识别时使用美式格式
+
+    Returns:
+        (小数点, 千分位符号)
+    """
+    if not marketplace:
+        return ".", ","
+    try:
+        site = get_marketplace(marketplace)
+    except ValueError:
+        return ".", ","
+    return site.decimal_separator, site.thousands_separator
+
+
+@lru_cache(maxsize=64)
+def price_format(marketplace=None) -> Tuple[str, str, bool]:
+    """
+    站点的价格格式
+
+    Args:
+        marketplace: 站点代码、域名或 Marketplace，None 或无法识别时使用美式格式（货币符号在前）
+
+    Returns:
+        (小数点, 千分位符号, 货币符号是否在数字之后)
+    """
+    decimal, thousands = number_separators(marketplace)
+    try:
+        suffix = bool(marketplace) and get_marketplace(marketplace).currency_suffix
+    except ValueError:
+        suffix = False
+    return decimal, thousands, suffix
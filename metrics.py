@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+爬取指标
+
+CrawlMetrics 记录一次爬取中各阶段的耗时和计数，用于定位爬取慢在哪里：
+- 阶段耗时：fetch（其中 fetch.rate_limit_wait、fetch.http_get、fetch.driver_get、fetch.page_wait 等由获取后端填写）、
+  parse、extract.<字段>（逐元素提取模式下每个字段的 find_element）、dedup、checkpoint、filter、save 等
+- 计数器：页面数（按获取后端）、解析 / 保留的商品数、重复商品、被拦截页面等
+- 字段缺失：每个字段提取到 / 没有提取到的商品数（选择器失效时缺失率会突然升高）
+- 异常：按阶段和异常类型计数
+- 页面明细：每页的耗时、商品数和各环节耗时
+- 采集器：导出时读取的当前值，例如限速器的速率、卖家缓存的命中数
+
+导出为 JSON 汇总或 Prometheus 文本格式（写文件，或启动 HTTP 端点供 Prometheus 抓取）。
+
+用法:
+    crawler = AmazonCrawler()
+    crawler.search_products("laptop", max_pages=3)
+    crawler.metrics.write_json("crawl_metrics.json")
+    print(crawler.metrics.report())
+
+    server = crawler.metrics.serve(9108)   # http://127.0.0.1:9108/metrics
+"""
+
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from config import METRICS_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# 视为没有提取到的字段值
+MISSING_VALUES = (None, "", "N/A")
+
+_KEY_RE = re.compile(r"^([^{]+)(?:\{(.*)\})?$")
+_LABEL_RE = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+
+def _escape(value) -> str:
+    """Prometheus 标签值转义"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _unescape(value: str) -> str:
+    return re.sub(r"\\(.)", lambda m: "\n" if m.group(1) == "n" else m.group(1), value)
+
+
+def _format_value(value: float) -> str:
+    """Prometheus 样本值，无穷大写作 +Inf / -Inf"""
+    if isinstance(value, float) and math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return str(value)
+
+
+def _metric_name(*parts: str) -> str:
+    """拼接并清理 Prometheus 指标名"""
+    return re.sub(r"[^a-zA-Z0-9_]", "_", "_".join(part for part in parts if part))
+
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    labels = list(labels)
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def counter_key(name: str, **labels) -> str:
+    """计数器在汇总中的键，例如 pages{backend="http"}"""
+    return name + _format_labels(sorted((label, str(value)) for label, value in labels.items()))
+
+
+def parse_counter_key(key: str) -> Tuple[str, Dict[str, str]]:
+    """counter_key 的逆操作"""
+    match = _KEY_RE.match(key)
+    labels = {name: _unescape(value) for name, value in _LABEL_RE.findall(match.group(2) or "")}
+    return match.group(1), labels
+
+
+class CrawlMetrics:
+    """爬取阶段计时器和计数器（线程安全，可在多个爬虫之间共享）"""
+
+    def __init__(self, max_pages: Optional[int] = None, prefix: Optional[str] = None):
+        """
+        Args:
+            max_pages: 汇总中保留的最近页面明细数量，默认读取 METRICS_CONFIG["max_pages"]
+            prefix: Prometheus 指标名前缀，默认读取 METRICS_CONFIG["prefix"]
+        """
+        self.max_pages = METRICS_CONFIG["max_pages"] if max_pages is None else max_pages
+        self.prefix = prefix or METRICS_CONFIG["prefix"]
+        self._lock = threading.Lock()
+        self._collectors: Dict[str, Tuple[Callable[[], Dict], Optional[str]]] = {}
+        self.reset()
+
+    def reset(self):
+        """清空已记录的指标（采集器保留）"""
+        with self._lock:
+            self.started_at = time.time()
+            self._phases: Dict[str, List[float]] = {}  # 阶段 -> [次数, 总耗时, 最大耗时]
+            self._counters: Dict[str, float] = {}
+            self._fields: Dict[str, List[int]] = {}  # 字段 -> [提取到, 缺失]
+            self._errors: Dict[Tuple[str, str], int] = {}
+            self._pages = deque(maxlen=self.max_pages)
+
+    def observe(self, phase: str, seconds: float):
+        """记录一个阶段的一次耗时"""
+        with self._lock:
+            stats = self._phases.get(phase)
+            if stats is None:
+                self._phases[phase] = [1, seconds, seconds]
+            else:
+                stats[0] += 1
+                stats[1] += seconds
+                stats[2] = max(stats[2], seconds)
+
+    def observe_timings(self, timings: Dict[str, float], prefix: str = "fetch"):
+        """记录获取后端填写的各环节耗时（FetchResult.timings）"""
+        for phase, seconds in timings.items():
+            self.observe(f"{prefix}.{phase}", seconds)
+
+    @contextmanager
+    def timer(self, phase: str):
+        """
+        阶段计时，块内抛出的异常会按阶段计数后继续抛出
+
+        用法:
+            with metrics.timer("parse"):
+                ...
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.error(phase, e)
+            raise
+        finally:
+            self.observe(phase, time.perf_counter() - start)
+
+    def incr(self, name: str, value: float = 1, **labels):
+        """计数器加 value"""
+        key = counter_key(name, **labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def error(self, phase: str, exc: BaseException):
+        """记录一个阶段的异常"""
+        key = (phase, type(exc).__name__)
+        with self._lock:
+            self._errors[key] = self._errors.get(key, 0) + 1
+
+    def record_fields(self, products: Iterable[Dict], fields: Iterable[str]):
+        """
+        统计字段提取到 / 缺失的商品数
+
+        Args:
+            products: 商品字典
+            fields: 参与统计的字段（只统计搜索结果页上应当存在的字段）
+        """
+        fields = list(fields)
+        counts = {field: [0, 0] for field in fields}
+        for product in products:
+            for field in fields:
+                counts[field][product.get(field) in MISSING_VALUES] += 1
+        with self._lock:
+            for field, (hits, misses) in counts.items():
+                stats = self._fields.setdefault(field, [0, 0])
+                stats[0] += hits
+                stats[1] += misses
+
+    def record_page(self, **info):
+        """记录一页的明细（关键词、页码、获取后端、耗时、商品数等）"""
+        with self._lock:
+            self._pages.append(info)
+
+    def register(self, name: str, collector: Callable[[], Dict], label: Optional[str] = None):
+        """
+        注册采集器，导出时调用并记录其返回的当前值
+
+        Args:
+            name: 采集器名称（同名覆盖）
+            collector: 返回 {指标: 数值}，或带 label 时返回 {标签值: {指标: 数值}}
+            label: 第二种返回格式的标签名，例如限速器按 host 区分
+        """
+        with self._lock:
+            self._collectors[name] = (collector, label)
+
+    def _collect(self) -> Dict[str, Dict]:
+        with self._lock:
+            collectors = dict(self._collectors)
+        values = {}
+        for name, (collector, _) in collectors.items():
+            try:
+                values[name] = collector() or {}
+            except Exception as e:
+                logger.debug(f"读取指标采集器 {name} 失败: {e}")
+        return values
+
+    def summary(self) -> Dict:
+        """JSON 可序列化的运行汇总"""
+        collected = self._collect()
+        with self._lock:
+            phases = {phase: {"count": count, "total": round(total, 6), "mean": round(total / count, 6),
+                              "max": round(peak, 6)}
+                      for phase, (count, total, peak) in sorted(self._phases.items())}
+            fields = {field: {"hits": hits, "misses": misses,
+                              "miss_rate": round(misses / (hits + misses), 4) if hits + misses else 0.0}
+                      for field, (hits, misses) in self._fields.items()}
+            errors = {}
+            for (phase, name), count in sorted(self._errors.items()):
+                errors.setdefault(phase, {})[name] = count
+            return {
+                "started_at": datetime.fromtimestamp(self.started_at).isoformat(timespec="seconds"),
+                "elapsed": round(time.time() - self.started_at, 3),
+                "phases": phases,
+                "counters": dict(sorted(self._counters.items())),
+                "fields": fields,
+                "errors": errors,
+                "pages": list(self._pages),
+                "collectors": collected,
+            }
+
+    def merge(self, summary: Dict):
+        """
+        合并另一份汇总（例如批量爬取中工作进程返回的汇总）
+
+        阶段耗时、计数器、字段和异常累加，页面明细追加；采集器的当前值不可相加，不合并。
+        """
+        with self._lock:
+            for phase, stats in summary.get("phases", {}).items():
+                current = self._phases.setdefault(phase, [0, 0.0, 0.0])
+                current[0] += stats["count"]
+                current[1] += stats["total"]
+                current[2] = max(current[2], stats["max"])
+            for key, value in summary.get("counters", {}).items():
+                self._counters[key] = self._counters.get(key, 0) + value
+            for field, stats in summary.get("fields", {}).items():
+                current = self._fields.setdefault(field, [0, 0])
+                current[0] += stats["hits"]
+                current[1] += stats["misses"]
+            for phase, counts in summary.get("errors", {}).items():
+                for name, count in counts.items():
+                    self._errors[(phase, name)] = self._errors.get((phase, name), 0) + count
+            self._pages.extend(summary.get("pages", []))
+
+    def to_prometheus(self) -> str:
+        """Prometheus 文本格式"""
+        summary = self.summary()
+        prefix = self.prefix
+        lines = []
+
+        def metric(name: str, kind: str, help_text: str, samples: List[Tuple[str, Dict, float]]):
+            if not samples:
+                return
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for sample_name, labels, value in samples:
+                lines.append(f"{sample_name}{_format_labels(labels.items())} {_format_value(value)}")
+
+        phase_name = _metric_name(prefix, "phase_seconds")
+        phases = summary["phases"]
+        metric(phase_name, "summary", "各阶段耗时（秒）",
+               [(f"{phase_name}_sum", {"phase": p}, s["total"]) for p, s in phases.items()]
+               + [(f"{phase_name}_count", {"phase": p}, s["count"]) for p, s in phases.items()])
+        metric(f"{phase_name}_max", "gauge", "各阶段单次最大耗时（秒）",
+               [(f"{phase_name}_max", {"phase": p}, s["max"]) for p, s in phases.items()])
+
+        grouped: Dict[str, List] = {}
+        for key, value in summary["counters"].items():
+            name, labels = parse_counter_key(key)
+            grouped.setdefault(name, []).append((labels, value))
+        for name, samples in grouped.items():
+            full_name = _metric_name(prefix, name, "total")
+            metric(full_name, "counter", f"{name} 计数", [(full_name, labels, value) for labels, value in samples])
+
+        fields = summary["fields"]
+        for kind in ("hits", "misses"):
+            full_name = _metric_name(prefix, "field", kind, "total")
+            metric(full_name, "counter", f"字段{'提取到' if kind == 'hits' else '缺失'}的商品数",
+                   [(full_name, {"field": field}, stats[kind]) for field, stats in fields.items()])
+
+        errors_name = _metric_name(prefix, "errors_total")
+        metric(errors_name, "counter", "各阶段的异常数",
+               [(errors_name, {"phase": phase, "type": name}, count)
+                for phase, counts in summary["errors"].items() for name, count in counts.items()])
+
+        uptime_name = _metric_name(prefix, "uptime_seconds")
+        metric(uptime_name, "gauge", "指标开始记录以来的秒数", [(uptime_name, {}, summary["elapsed"])])
+
+        with self._lock:
+            labels_of = {name: label for name, (_, label) in self._collectors.items()}
+        for source, values in summary["collectors"].items():
+            label = labels_of.get(source)
+            samples: Dict[str, List] = {}
+            if label:
+                for label_value, stats in values.items():
+                    for key, value in stats.items():
+                        if isinstance(value, (int, float)):
+                            samples.setdefault(key, []).append(({label: label_value}, value))
+            else:
+                for key, value in values.items():
+                    if isinstance(value, (int, float)):
+                        samples.setdefault(key, []).append(({}, value))
+            for key, items in samples.items():
+                full_name = _metric_name(prefix, source, key)
+                metric(full_name, "gauge", f"{source} {key}", [(full_name, labels, value) for labels, value in items])
+
+        return "\n".join(lines) + "\n"
+
+    def write_json(self, path: str):
+        """写入 JSON 汇总"""
+        _atomic_write(path, json.dumps(self.summary(), ensure_ascii=False, indent=2))
+
+    def write_prometheus(self, path: str):
+        """写入 Prometheus 文本格式文件（原子替换，可被 node_exporter textfile 采集器读取）"""
+        _atomic_write(path, self.to_prometheus())
+
+    def serve(self, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """
+        在后台线程中启动 HTTP 端点：/metrics 为 Prometheus 文本格式，/summary 为 JSON 汇总
+
+        Args:
+            port: 端口，0 表示随机端口（见返回值的 server_address）
+            host: 监听地址
+
+        Returns:
+            HTTP 服务器，停止时先调用 shutdown() 结束后台线程，再调用 server_close() 关闭监听端口
+        """
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] == "/metrics":
+                    body, content_type = metrics.to_prometheus(), "text/plain; version=0.0.4; charset=utf-8"
+                elif self.path.split("?")[0] == "/summary":
+                    body = json.dumps(metrics.summary(), ensure_ascii=False)
+                    content_type = "application/json; charset=utf-8"
+                else:
+                    self.send_error(404)
+                    return
+                data = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                logger.debug("指标端点: " + format % args)
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        logger.info(f"指标端点已启动: http://{host}:{server.server_address[1]}/metrics")
+        return server
+
+    def report(self, top: int = 12) -> str:
+        """按总耗时排序的阶段耗时和字段缺失率，用于日志和终端输出"""
+        summary = self.summary()
+        lines = [f"{'阶段':28s} {'次数':>6s} {'总耗时(s)':>10s} {'平均(ms)':>10s} {'最大(ms)':>10s}"]
+        phases = sorted(summary["phases"].items(), key=lambda item: item[1]["total"], reverse=True)
+        for phase, stats in phases[:top]:
+            lines.append(f"{phase:28s} {stats['count']:>6d} {stats['total']:>10.3f} "
+                         f"{stats['mean'] * 1000:>10.1f} {stats['max'] * 1000:>10.1f}")
+        missing = [f"{field} {stats['miss_rate']:.0%}" for field, stats in summary["fields"].items()
+                   if stats["misses"]]
+        if missing:
+            lines.append("字段缺失率: " + ", ".join(missing))
+        errors = [f"{phase}/{name} x{count}" for phase, counts in summary["errors"].items()
+                  for name, count in counts.items()]
+        if errors:
+            lines.append("异常: " + ", ".join(errors))
+        return "\n".join(lines)
+
+
+def _atomic_write(path: str, text: str):
+    """先写临时文件再替换，读取方不会读到写了一半的文件"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def export_metrics(metrics: CrawlMetrics, summary_file: Optional[str] = None,
+                   prometheus_file: Optional[str] = None):
+    """
+    按 METRICS_CONFIG（或传入的路径）写出汇总和 Prometheus 文件
+
+    Args:
+        metrics: 指标
+        summary_file: JSON 汇总路径，默认读取 METRICS_CONFIG["summary_file"]
+        prometheus_file: Prometheus 文本文件路径，默认读取 METRICS_CONFIG["prometheus_file"]
+    """
+    summary_file = summary_file or METRICS_CONFIG["summary_file"]
+    prometheus_file = prometheus_file or METRICS_CONFIG["prometheus_file"]
+    try:
+        if summary_file:
+            metrics.write_json(summary_file)
+            logger.info(f"爬取指标已写入 {summary_file}")
+        if prometheus_file:
+            metrics.write_prometheus(prometheus_file)
+    except OSError as e:
+        logger.warning(f"写入爬取指标失败: {e}")
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+持久化页面缓存
+
+以 URL 的 SHA-256 作为键，把 gzip 压缩后的页面 HTML 存放在磁盘上，
+SQLite 索引记录写入时间和最近访问时间，支持 TTL 过期和按总大小的 LRU 淘汰。
+
+CachingFetcher 把缓存包装成页面获取后端，支持以下模式:
+    normal  命中且未过期时直接返回缓存，否则获取页面并写入缓存
+    refresh 总是重新获取页面并更新缓存
+    replay  只读缓存（忽略 TTL），未命中时抛出 CacheMissError，不产生任何网络或浏览器请求
+
+调用方传入 CachingFetcher 的 PageCache 可以在多个爬虫之间共享，CachingFetcher.close() 不会关闭它，
+由创建它的调用方负责关闭。
+"""
+
+import gzip
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+from config import CACHE_CONFIG
+from fetcher import BaseFetcher, FetchResult
+
+logger = logging.getLogger(__name__)
+
+
+class CacheMissError(Exception):
+    """回放模式下缓存未命中"""
+    pass
+
+
+def cache_key(url: str) -> str:
+    """计算 URL 对应的缓存键"""
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+class PageCache:
+    """基于磁盘的页面缓存（线程安全，可被多个进程共享）"""
+
+    def __init__(self, cache_dir: str = None, ttl: float = None, max_size_mb: float = None):
+        """
+        初始化页面缓存
+
+        Args:
+            cache_dir: 缓存目录，默认读取 CACHE_CONFIG["dir"]
+            ttl: 缓存有效期（秒），默认读取 CACHE_CONFIG["ttl"]
+            max_size_mb: 缓存总大小上限（MB），超过后按最近访问时间淘汰，默认读取 CACHE_CONFIG["max_size_mb"]
+        """
+        self.cache_dir = cache_dir or CACHE_CONFIG["dir"]
+        self.ttl = CACHE_CONFIG["ttl"] if ttl is None else ttl
+        max_size_mb = CACHE_CONFIG["max_size_mb"] if max_size_mb is None else max_size_mb
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(self.cache_dir, "index.sqlite3"),
+                                     check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries (last_access)")
+        self._conn.commit()
+
+    def _path(self, key: str) -> str:
+        """缓存文件路径（按键的前两位分目录）"""
+        return os.path.join(self.cache_dir, key[:2], f"{key}.html.gz")
+
+    def get(self, url: str, ignore_ttl: bool = False) -> Optional[str]:
+        """
+        读取缓存
+
+        Args:
+            url: 页面 URL
+            ignore_ttl: 是否忽略有效期（回放模式使用）
+
+        Returns:
+            页面 HTML，未命中或已过期时返回 None
+        """
+        key = cache_key(url)
+        with self._lock:
+            row = self._conn.execute("SELECT created FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if not ignore_ttl and time.time() - row[0] > self.ttl:
+                return None
+            try:
+                with gzip.open(self._path(key), "rt", encoding="utf-8") as f:
+                    html = f.read()
+            except (OSError, EOFError):
+                # 索引存在但文件丢失或损坏
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        return html
+
+    def put(self, url: str, html: str):
+        """写入缓存，并在超过大小上限时淘汰最久未访问的条目"""
+        key = cache_key(url)
+        path = self._path(key)
+        data = gzip.compress(html.encode("utf-8"), compresslevel=6)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, url, size, created, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, url, len(data), now, now),
+            )
+            self._conn.commit()
+            self._evict_locked()
+
+    def _evict_locked(self):
+        """按最近访问时间淘汰条目直到总大小不超过上限（调用方需持有锁）"""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        for key, size in self._conn.execute("SELECT key, size FROM entries ORDER BY last_access").fetchall():
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        self._conn.commit()
+        logger.debug(f"页面缓存淘汰 {evicted} 个条目")
+
+    def purge_expired(self) -> int:
+        """删除所有过期条目，返回删除数量"""
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            keys = [row[0] for row in self._conn.execute("SELECT key FROM entries WHERE created < ?", (cutoff,))]
+            for key in keys:
+                try:
+                    os.remove(self._path(key))
+                except FileNotFoundError:
+                    pass
+            self._conn.execute("DELETE FROM entries WHERE created < ?", (cutoff,))
+            self._conn.commit()
+        return len(keys)
+
+    def stats(self) -> Dict:
+        """缓存统计信息"""
+        with self._lock:
+            count, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {"entries": count, "size_bytes": size, "max_bytes": self.max_bytes}
+
+    def close(self):
+        """关闭索引数据库"""
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> "PageCache":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class CachingFetcher(BaseFetcher):
+    """带页面缓存的获取后端"""
+
+    MODES = ("normal", "refresh", "replay")
+    backend = "cache"
+
+    def __init__(self, fetcher: Optional[BaseFetcher], cache: Optional[PageCache] = None, mode: str = "normal"):
+        """
+        Args:
+            fetcher: 缓存未命中时使用的获取后端，replay 模式下可以为 None
+            cache: 页面缓存，可在多个获取后端之间共享，close() 时不会关闭；None 表示使用默认目录新建一个
+            mode: 缓存模式，"normal"、"refresh" 或 "replay"
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"不支持的缓存模式: {mode}，可选值: {self.MODES}")
+        if fetcher is None and mode != "replay":
+            raise ValueError("非回放模式需要提供获取后端")
+        self.fetcher = fetcher
+        self._shared_cache = cache is not None
+        self.cache = cache if cache is not None else PageCache()
+        self.mode = mode
+        self.hits = 0
+        self.misses = 0
+
+    def fetch(self, url: str) -> FetchResult:
+        """优先从缓存读取页面"""
+        if self.mode != "refresh":
+            start = time.perf_counter()
+            html = self.cache.get(url, ignore_ttl=self.mode == "replay")
+            if html is not None:
+                self.hits += 1
+                elapsed = time.perf_counter() - start
+                return FetchResult(url=url, html=html, status_code=200, backend=self.backend,
+                                   elapsed=elapsed, timings={"cache_read": elapsed})
+            self.misses += 1
+            if self.mode == "replay":
+                raise CacheMissError(f"回放模式下缓存未命中: {url}")
+
+        result = self.fetcher.fetch(url)
+        if result.status_code == 200 and not result.blocked:
+            self.cache.put(url, result.html)
+        return result
+
+    def close(self):
+        """释放获取后端，以及自己创建的缓存（调用方传入的缓存保持打开，由调用方关闭）"""
+        if self.fetcher is not None:
+            self.fetcher.close()
+        if not self._shared_cache:
+            self.cache.close()
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+搜索结果页离线解析模块
+
+直接解析搜索结果页 HTML（driver.page_source、HTTP 响应或归档页面），
+返回与 AmazonCrawler._extract_product_info 相同结构的商品字典，无需启动浏览器。
+
+用法（基准测试）:
+    python page_parser.py "docs/Amazon.sg _ laptop.html" --repeat 50
+"""
+
+import argparse
+import logging
+import re
+import time
+from typing import Container, Dict, List, Optional, Tuple
+
+from lxml import etree
+from lxml import html as lxml_html
+
+from marketplace import get_marketplace
+
+logger = logging.getLogger(__name__)
+
+# 商品字段（导出列）顺序
+PRODUCT_FIELDS = ["商品名称", "商品链接", "价格", "评分", "评论数", "ASIN",
+                  "图片URL", "促销信息", "配送信息", "店铺名称", "店铺评分"]
+
+SEARCH_RESULT_CSS = "[data-component-type='s-search-result']"
+
+
+def build_product(name=None, url=None, price=None, rating=None, reviews=None, asin=None,
+                  image=None, promotion=None, delivery=None,
+                  store_name: str = "Amazon", store_rating: str = "N/A", marketplace=None) -> Dict:
+    """
+    将提取到的原始字段整理为统一的商品字典，缺失字段填充为 "N/A"
+
+    Args:
+        marketplace: 补全相对链接使用的站点，默认读取 CRAWLER_CONFIG["marketplace"]
+
+    Returns:
+        与 _extract_product_info 相同结构的商品字典
+    """
+    site = get_marketplace(marketplace)
+    if url and url.startswith("/"):
+        # 补全相对链接
+        url = site.absolute_url(url)
+
+    rating_value = None
+    if rating:
+        # 欧式站点的评分为 "4,5 von 5 Sternen"，统一为 "4.5"
+        rating_match = re.search(r'(\d+(?:[.,]\d+)?)', rating)
+        if rating_match:
+            rating_value = rating_match.group(1).replace(',', '.')
+
+    values = [
+        name.strip() if name else None,
+        url,
+        price.strip() if price else None,
+        rating_value,
+        reviews.strip().replace(site.thousands_separator, '') if reviews else None,
+        asin,
+        image,
+        promotion.strip() if promotion else None,
+        delivery.strip() if delivery else None,
+        store_name,
+        store_rating,
+    ]
+    return {field: (value if value else "N/A") for field, value in zip(PRODUCT_FIELDS, values)}
+
+
+def _has_class(name: str) -> str:
+    """生成匹配 class 属性中某个类名的 XPath 谓词"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# 预编译的 XPath 选择器，与 _extract_product_info 中的 CSS 选择器一一对应
+_XPATHS = {
+    "cards": "//*[@data-component-type='s-search-result']",
+    "title": f".//*[@data-cy='title-recipe']//a[{_has_class('a-link-normal')}]",
+    "title_fallback": f".//*[{_has_class('a-text-normal')}]",
+    "price": f".//*[{_has_class('a-price')}]//*[{_has_class('a-offscreen')}]",
+    "rating": f".//i[{_has_class('a-icon-star-small')}]//span[{_has_class('a-icon-alt')}]",
+    "reviews": f".//span[{_has_class('a-size-base')}][{_has_class('s-underline-text')}]",
+    "image": f".//img[{_has_class('s-image')}]",
+    "promotion": f".//*[{_has_class('a-price')}][{_has_class('a-text-price')}]//*[{_has_class('a-offscreen')}]",
+    "promotion_fallback": f".//*[{_has_class('a-size-base')}][{_has_class('a-color-secondary')}]",
+    "delivery": (f".//*[@data-cy='delivery-recipe']"
+                 f"//*[{_has_class('a-row')}][{_has_class('a-size-base')}][{_has_class('a-color-secondary')}]"),
+    "spans": ".//span",
+    # 可点击的“下一页”是 a 标签，禁用时为 span
+    "next_page": f"//a[{_has_class('s-pagination-next')}][not({_has_class('s-pagination-disabled')})]",
+}
+XPATHS = {name: etree.XPath(expr) for name, expr in _XPATHS.items()}
+
+# BeautifulSoup 引擎使用的 CSS 选择器
+CSS_SELECTORS = {
+    "cards": SEARCH_RESULT_CSS,
+    "title": '[data-cy="title-recipe"] a.a-link-normal',
+    "title_fallback": ".a-text-normal",
+    "price": ".a-price .a-offscreen",
+    "rating": "i.a-icon-star-small span.a-icon-alt",
+    "reviews": "span.a-size-base.s-underline-text",
+    "image": "img.s-image",
+    "promotion": ".a-price.a-text-price .a-offscreen",
+    "promotion_fallback": ".a-size-base.a-color-secondary",
+    "delivery": '[data-cy="delivery-recipe"] .a-row.a-size-base.a-color-secondary',
+    "spans": "span",
+    "next_page": ".s-pagination-next:not(.s-pagination-disabled)",
+}
+
+
+def _normalize(text: Optional[str]) -> Optional[str]:
+    """合并空白字符，近似浏览器 innerText 的效果"""
+    if text is None:
+        return None
+    return " ".join(text.split())
+
+
+class SearchPageParser:
+    """搜索结果页解析器，支持 lxml（默认）和 BeautifulSoup 两种引擎"""
+
+    ENGINES = ("lxml", "bs4")
+
+    def __init__(self, engine: str = "lxml", marketplace=None):
+        """
+        初始化解析器
+
+        Args:
+            engine: 解析引擎，"lxml" 使用预编译 XPath，"bs4" 使用 BeautifulSoup + 预编译 CSS 选择器
+            marketplace: 页面所属站点（用于补全相对链接和匹配配送信息），默认读取 CRAWLER_CONFIG["marketplace"]
+        """
+        if engine not in self.ENGINES:
+            raise ValueError(f"不支持的解析引擎: {engine}，可选值: {self.ENGINES}")
+        self.engine = engine
+        self.marketplace = get_marketplace(marketplace)
+        self._css = None
+        if engine == "bs4":
+            import soupsieve
+            self._css = {name: soupsieve.compile(sel) for name, sel in CSS_SELECTORS.items()}
+
+    def parse(self, page_html: str, skip_asins: Optional[Container[str]] = None) -> List[Dict]:
+        """解析页面中的所有商品"""
+        products, _ = self.parse_page(page_html, skip_asins)
+        return products
+
+    def parse_batch(self, page_html: str, marketplace: Optional[str] = None,
+                    skip_asins: Optional[Container[str]] = None):
+        """
+        解析页面并转换为列式的 ProductBatch（数值字段只在这里解析一次）
+
+        Args:
+            page_html: 搜索结果页 HTML
+            marketplace: 站点域名，默认从商品链接中提取
+            skip_asins: 已出现过的 ASIN（集合或 dedup 中的去重器），这些卡片不提取字段
+
+        Returns:
+            (ProductBatch, 是否有下一页)
+        """
+        from product import ProductBatch
+
+        products, has_next = self.parse_page(page_html, skip_asins)
+        return ProductBatch.from_dicts(products, marketplace), has_next
+
+    def has_next_page(self, page_html: str) -> bool:
+        """检查页面是否有下一页"""
+        _, has_next = self.parse_page(page_html)
+        return has_next
+
+    def parse_page(self, page_html: str, skip_asins: Optional[Container[str]] = None) -> Tuple[List[Dict], bool]:
+        """
+        解析整页 HTML
+
+        Args:
+            page_html: 搜索结果页 HTML
+            skip_asins: 已出现过的 ASIN（集合或 dedup 中的去重器），这些卡片只读取 data-asin，不提取其余字段
+
+        Returns:
+            (商品信息列表, 是否有下一页)
+        """
+        if not page_html:
+            return [], False
+
+        if self.engine == "lxml":
+            root = lxml_html.fromstring(page_html)
+            cards = XPATHS["cards"](root)
+            extract = self._extract_lxml
+            has_next = bool(XPATHS["next_page"](root))
+        else:
+            from bs4 import BeautifulSoup
+            soup = BeautifulSoup(page_html, "lxml")
+            cards = self._css["cards"].select(soup)
+            extract = self._extract_bs4
+            has_next = self._css["next_page"].select_one(soup) is not None
+
+        products = []
+        skipped = 0
+        for i, card in enumerate(cards):
+            if skip_asins is not None and card.get("data-asin") in skip_asins:
+                skipped += 1
+                continue
+            try:
+                products.append(extract(card))
+            except Exception as e:
+                logger.warning(f"解析第 {i+1} 个商品时出错: {e}")
+
+        logger.debug(f"离线解析到 {len(products)} 个商品，跳过 {skipped} 个已出现的商品")
+        return products, has_next
+
+    def _extract_lxml(self, card) -> Dict:
+        """使用 lxml 从单个商品卡片中提取字段"""
+        def first(name):
+            found = XPATHS[name](card)
+            return found[0] if found else None
+
+        def text(elem):
+            return _normalize(elem.text_content()) if elem is not None else None
+
+        def block_text(elem):
+            return _normalize(" ".join(elem.itertext())) if elem is not None else None
+
+        item = {}
+        title_elem = first("title")
+        if title_elem is not None:
+            item["url"] = title_elem.get("href")
+            item["name"] = text(title_elem)
+        else:
+            item["name"] = text(first("title_fallback"))
+
+        item["price"] = text(first("price"))
+        item["rating"] = text(first("rating"))
+        item["reviews"] = text(first("reviews"))
+        item["asin"] = card.get("data-asin")
+
+        img_elem = first("image")
+        item["image"] = img_elem.get("src") if img_elem is not None else None
+
+        promo_elem = first("promotion")
+        if promo_elem is None:
+            promo_elem = first("promotion_fallback")
+        item["promotion"] = block_text(promo_elem)
+
+        delivery_elem = first("delivery")
+        if delivery_elem is not None:
+            item["delivery"] = block_text(delivery_elem)
+        else:
+            for span in XPATHS["spans"](card):
+                span_text = text(span)
+                if span_text and any(word in span_text for word in self.marketplace.delivery_keywords):
+                    item["delivery"] = span_text
+                    break
+
+        return build_product(**item, marketplace=self.marketplace)
+
+    def _extract_bs4(self, card) -> Dict:
+        """使用 BeautifulSoup 从单个商品卡片中提取字段"""
+        def first(name):
+            return self._css[name].select_one(card)
+
+        def text(elem):
+            return _normalize(elem.get_text()) if elem is not None else None
+
+        def block_text(elem):
+            return _normalize(elem.get_text(" ")) if elem is not None else None
+
+        item = {}
+        title_elem = first("title")
+        if title_elem is not None:
+            item["url"] = title_elem.get("href")
+            item["name"] = text(title_elem)
+        else:
+            item["name"] = text(first("title_fallback"))
+
+        item["price"] = text(first("price"))
+        item["rating"] = text(first("rating"))
+        item["reviews"] = text(first("reviews"))
+        item["asin"] = card.get("data-asin")
+
+        img_elem = first("image")
+        item["image"] = img_elem.get("src") if img_elem is not None else None
+
+        promo_elem = first("promotion")
+        if promo_elem is None:
+            promo_elem = first("promotion_fallback")
+        item["promotion"] = block_text(promo_elem)
+
+        delivery_elem = first("delivery")
+        if delivery_elem is not None:
+            item["delivery"] = block_text(delivery_elem)
+        else:
+            for span in self._css["spans"].select(card):
+                span_text = text(span)
+                if span_text and any(word in span_text for word in self.marketplace.delivery_keywords):
+                    item["delivery"] = span_text
+                    break
+
+        return build_product(**item, marketplace=self.marketplace)
+
+
+def parse_search_page(page_html: str, engine: str = "lxml") -> List[Dict]:
+    """
+    解析搜索结果页 HTML
+
+    Args:
+        page_html: 搜索结果页 HTML
+        engine: 解析引擎
+
+    Returns:
+        商品信息列表
+    """
+    return SearchPageParser(engine).parse(page_html)
+
+
+def benchmark(path: str, repeat: int = 20, engines=SearchPageParser.ENGINES) -> Dict[str, Dict]:
+    """
+    使用保存的搜索结果页对解析器做基准测试
+
+    Args:
+        path: HTML 文件路径
+        repeat: 每个引擎重复解析次数
+        engines: 参与测试的引擎
+
+    Returns:
+        每个引擎的测试结果
+    """
+    with open(path, encoding="utf-8") as f:
+        page_html = f.read()
+
+    results = {}
+    for engine in engines:
+        parser = SearchPageParser(engine)
+        cards = len(parser.parse(page_html))  # 预热
+        start = time.perf_counter()
+        for _ in range(repeat):
+            parser.parse(page_html)
+        elapsed = time.perf_counter() - start
+        results[engine] = {
+            "cards": cards,
+            "pages_per_sec": repeat / elapsed,
+            "cards_per_sec": cards * repeat / elapsed,
+            "ms_per_page": elapsed / repeat * 1000,
+        }
+    return results
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="搜索结果页离线解析基准测试")
+    arg_parser.add_argument("path", nargs="?", default="docs/Amazon.sg _ laptop.html", help="HTML 文件路径")
+    arg_parser.add_argument("--repeat", type=int, default=20, help="重复解析次数")
+    args = arg_parser.parse_args()
+
+    for engine, result in benchmark(args.path, args.repeat).items():
+        print(f"{engine:5s}: {result['cards']} 个商品/页, "
+              f"{result['pages_per_sec']:.1f} 页/秒, "
+              f"{result['cards_per_sec']:.0f} 商品/秒, "
+              f"{result['ms_per_page']:.2f} ms/页")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+事件驱动的页面就绪检测
+
+在浏览器中注册 MutationObserver，每次 DOM 变化时判断页面状态，一旦可以确定结果就立即返回，
+而不是固定等待或等满 WebDriverWait 的超时时间：
+
+    ready    搜索结果列表已渲染完成（分页栏已出现，或文档加载完成且有商品卡片）
+    blocked  验证码 / 机器人校验页面
+    empty    没有搜索结果的页面
+    timeout  超时仍无法判断
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+READY = "ready"
+BLOCKED = "blocked"
+EMPTY = "empty"
+TIMEOUT = "timeout"
+
+# execute_async_script 的参数：arguments[0] 为超时时间（毫秒），最后一个参数为回调
+READINESS_JS = r"""
+const timeoutMs = arguments[0];
+const done = arguments[arguments.length - 1];
+const BLOCK_TEXT = ["Enter the characters you see below", "Type the characters you see in this image"];
+const EMPTY_TEXT = ["No results for", "did not match any products"];
+
+function classify() {
+    if (document.querySelector("form[action*='validateCaptcha'], #captchacharacters")
+            || document.title === "Robot Check") {
+        return "blocked";
+    }
+    const complete = document.readyState === "complete";
+    const hasResults = document.querySelector("[data-component-type='s-search-result']") !== null;
+    if (hasResults && (document.querySelector(".s-pagination-strip, .s-pagination-container") || complete)) {
+        return "ready";
+    }
+    const text = document.body ? document.body.innerText || "" : "";
+    if (BLOCK_TEXT.some((t) => text.includes(t))) {
+        return "blocked";
+    }
+    if (!hasResults && (complete || document.querySelector("[data-component-type='s-result-info-bar']"))
+            && EMPTY_TEXT.some((t) => text.includes(t))) {
+        return "empty";
+    }
+    return null;
+}
+
+let finished = false;
+let scheduled = false;
+let observer = null;
+let timer = null;
+
+function finish(state) {
+    if (finished) return;
+    finished = true;
+    if (observer) observer.disconnect();
+    if (timer) clearTimeout(timer);
+    document.removeEventListener("readystatechange", check);
+    done(state);
+}
+
+function check() {
+    scheduled = false;
+    const state = classify();
+    if (state) finish(state);
+}
+
+function schedule() {
+    // 同一批 DOM 变化只判断一次
+    if (scheduled || finished) return;
+    scheduled = true;
+    Promise.resolve().then(check);
+}
+
+check();
+if (!finished) {
+    observer = new MutationObserver(schedule);
+    observer.observe(document.documentElement, {childList: true, subtree: true});
+    document.addEventListener("readystatechange", check);
+    timer = setTimeout(() => finish(classify() || "timeout"), timeoutMs);
+}
+"""
+
+
+def wait_for_page(driver, timeout: float = 10) -> str:
+    """
+    等待当前页面就绪
+
+    Args:
+        driver: WebDriver 实例（已调用 get 打开页面）
+        timeout: 最长等待时间（秒）
+
+    Returns:
+        页面状态：READY、BLOCKED、EMPTY 或 TIMEOUT
+    """
+    from selenium.common.exceptions import TimeoutException, WebDriverException
+
+    try:
+        # 脚本超时要比页面内的超时长，保证回调总能先返回
+        driver.set_script_timeout(timeout + 5)
+        state = driver.execute_async_script(READINESS_JS, int(timeout * 1000))
+    except TimeoutException:
+        state = TIMEOUT
+    except WebDriverException as e:
+        logger.warning(f"页面就绪检测失败: {e}")
+        state = TIMEOUT
+
+    if state not in (READY, BLOCKED, EMPTY):
+        state = TIMEOUT
+    return state
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多进程解析池
+
+lxml 解析整页 HTML 是 CPU 密集的，放在获取页面的线程里执行时会占住 GIL，获取和解析互相阻塞。
+ParsePool 把页面 HTML 交给独立的工作进程解析，返回列式的 ProductBatch：
+
+- 较大的页面（默认 64KB 以上，搜索结果页通常 1MB 以上）写入 multiprocessing.shared_memory，
+  只把共享内存名称和长度发给工作进程，不对 HTML 做 pickle；较小的页面直接随任务传递
+- 工作进程返回 ProductBatch（数值列为 array('d')，序列化后很紧凑），任务完成后父进程释放共享内存
+- 获取并发数（AsyncCrawlEngine 的 concurrency）和解析进程数（workers）分别配置，互不占用
+
+用法:
+    with ParsePool(workers=4) as pool:
+        batch, has_next = pool.parse_page(page_html)
+        future = pool.submit(page_html, marketplace="sg")   # 异步提交，返回 concurrent.futures.Future
+
+    # 基准测试：单线程解析与多进程解析的吞吐量对比
+    python parse_pool.py "docs/Amazon.sg _ laptop.html" --pages 200 --workers 4
+"""
+
+import argparse
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Container, Dict, Optional, Tuple
+
+from config import CRAWLER_CONFIG
+from page_parser import SearchPageParser
+from product import ProductBatch
+
+logger = logging.getLogger(__name__)
+
+# 工作进程内的解析器，按 (引擎, 站点代码) 缓存
+_worker_engine = "lxml"
+_worker_parsers: Dict[Tuple[str, Optional[str]], SearchPageParser] = {}
+
+
+def _init_worker(engine: str):
+    """工作进程初始化：记录解析引擎"""
+    global _worker_engine
+    _worker_engine = engine
+    _worker_parsers.clear()
+
+
+def _read_payload(payload) -> str:
+    """还原页面 HTML：("shm", 名称, 字节数) 从共享内存读取，("inline", 文本) 直接返回"""
+    if payload[0] == "inline":
+        return payload[1]
+    _, name, size = payload
+    segment = shared_memory.SharedMemory(name=name)
+    try:
+        return bytes(segment.buf[:size]).decode("utf-8")
+    finally:
+        segment.close()
+
+
+def _parse_task(payload, marketplace: Optional[str], skip_asins: Optional[Container[str]]):
+    """在工作进程中执行：解析页面并返回 (ProductBatch, 是否有下一页)"""
+    key = (_worker_engine, marketplace)
+    parser = _worker_parsers.get(key)
+    if parser is None:
+        parser = _worker_parsers[key] = SearchPageParser(_worker_engine, marketplace=marketplace)
+    return parser.parse_batch(_read_payload(payload), skip_asins=skip_asins)
+
+
+class ParsePool:
+    """把搜索结果页解析分发到进程池，页面通过共享内存交给工作进程"""
+
+    def __init__(self, workers: int = None, engine: str = "lxml", shm_threshold: int = None):
+        """
+        初始化解析池
+
+        Args:
+            workers: 工作进程数，默认为 CPU 核数
+            engine: 解析引擎，"lxml" 或 "bs4"
+            shm_threshold: HTML 编码后达到该字节数时通过共享内存传递，默认读取 CRAWLER_CONFIG["parse_shm_threshold"]
+        """
+        if engine not in SearchPageParser.ENGINES:
+            raise ValueError(f"不支持的解析引擎: {engine}，可选值: {SearchPageParser.ENGINES}")
+        self.workers = workers or os.cpu_count() or 1
+        self.engine = engine
+        self.shm_threshold = (CRAWLER_CONFIG["parse_shm_threshold"]
+                              if shm_threshold is None else shm_threshold)
+        self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                             initializer=_init_worker, initargs=(engine,))
+        # 尚未释放的共享内存，名称 -> SharedMemory
+        self._segments: Dict[str, shared_memory.SharedMemory] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, page_html: str, marketplace: Optional[str] = None,
+               skip_asins: Optional[Container[str]] = None) -> Future:
+        """
+        提交一个页面的解析任务
+
+        Args:
+            page_html: 搜索结果页 HTML
+            marketplace: 站点代码（用于补全相对链接和匹配配送信息），默认读取 CRAWLER_CONFIG["marketplace"]
+            skip_asins: 已出现过的 ASIN，需要能被 pickle（集合等），dedup 中的去重器请在父进程中处理
+
+        Returns:
+            结果为 (ProductBatch, 是否有下一页) 的 Future
+        """
+        data = (page_html or "").encode("utf-8")
+        if not data or len(data) < self.shm_threshold:
+            return self._executor.submit(_parse_task, ("inline", page_html or ""), marketplace, skip_asins)
+
+        segment = shared_memory.SharedMemory(create=True, size=len(data))
+        segment.buf[:len(data)] = data
+        with self._lock:
+            self._segments[segment.name] = segment
+        try:
+            future = self._executor.submit(_parse_task, ("shm", segment.name, len(data)),
+                                           marketplace, skip_asins)
+        except Exception:
+            self._release(segment.name)
+            raise
+        future.add_done_callback(lambda _, name=segment.name: self._release(name))
+        return future
+
+    def parse_page(self, page_html: str, marketplace: Optional[str] = None,
+                   skip_asins: Optional[Container[str]] = None) -> Tuple[ProductBatch, bool]:
+        """同步解析一个页面，返回 (ProductBatch, 是否有下一页)"""
+        return self.submit(page_html, marketplace, skip_asins).result()
+
+    def _release(self, name: str):
+        """任务结束后关闭并删除共享内存"""
+        with self._lock:
+            segment = self._segments.pop(name, None)
+        if segment is None:
+            return
+        segment.close()
+        try:
+            segment.unlink()
+        except FileNotFoundError:
+            pass
+
+    def close(self):
+        """关闭进程池并释放剩余的共享内存"""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        for name in list(self._segments):
+            self._release(name)
+
+    def __enter__(self) -> "ParsePool":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def benchmark(path: str, pages: int = 200, workers: int = None) -> Dict[str, Dict]:
+    """
+    对比单线程解析和进程池解析的吞吐量
+
+    Args:
+        path: HTML 文件路径
+        pages: 解析的页数（同一页面重复解析）
+        workers: 工作进程数
+
+    Returns:
+        {"inline": {...}, "pool": {...}}
+    """
+    with open(path, encoding="utf-8") as f:
+        page_html = f.read()
+
+    results = {}
+    parser = SearchPageParser()
+    start = time.perf_counter()
+    for _ in range(pages):
+        batch, _ = parser.parse_batch(page_html)
+    elapsed = time.perf_counter() - start
+    results["inline"] = {"cards": len(batch), "pages_per_sec": pages / elapsed}
+
+    with ParsePool(workers) as pool:
+        # 预热：启动工作进程并导入解析模块
+        for future in [pool.submit(page_html) for _ in range(pool.workers)]:
+            future.result()
+        start = time.perf_counter()
+        futures = [pool.submit(page_html) for _ in range(pages)]
+        cards = sum(len(future.result()[0]) for future in futures) // pages
+        elapsed = time.perf_counter() - start
+        results["pool"] = {"cards": cards, "pages_per_sec": pages / elapsed, "workers": pool.workers}
+    return results
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="多进程解析池基准测试")
+    arg_parser.add_argument("path", nargs="?", default="docs/Amazon.sg _ laptop.html", help="HTML 文件路径")
+    arg_parser.add_argument("--pages", type=int, default=200, help="解析的页数")
+    arg_parser.add_argument("--workers", type=int, default=None, help="工作进程数，默认为 CPU 核数")
+    args = arg_parser.parse_args()
+
+    results = benchmark(args.path, args.pages, args.workers)
+    for name, result in results.items():
+        workers = f"（{result['workers']} 个进程）" if "workers" in result else ""
+        print(f"{name:6s}: {result['cards']} 个商品/页, {result['pages_per_sec']:.1f} 页/秒{workers}")
+    print(f"加速比: {results['pool']['pages_per_sec'] / results['inline']['pages_per_sec']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
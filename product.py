@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+紧凑的商品记录
+
+商品字典的每个值都是原始文本（"$1,299.99"、"4.5"、"1234"、"N/A"），内存占用大，
+而且每个使用方都要重新解析。这里在提取时只解析一次：
+
+- Product: 使用 __slots__ 的单个商品，价格、评分、评论数、店铺评分为 float（缺失为 NaN），
+  货币符号和站点名称使用驻留字符串
+- ProductBatch: 列式存储的一批商品，数值列为 array('d')（每个值 8 字节），可直接转换为 NumPy 数组，
+  百万级商品也能常驻内存
+
+两者都提供 to_dict()，导出与 PRODUCT_FIELDS 相同的中文列名。
+"""
+
+import math
+import re
+import sys
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional
+from urllib.parse import urlsplit
+
+import numpy as np
+import pandas as pd
+
+from filter_engine import ProductFrame, column_parser
+from marketplace import price_format
+from page_parser import PRODUCT_FIELDS
+
+MISSING = "N/A"
+
+# 价格文本中数字之前的部分视为货币符号，例如 "S$293.26" -> "S$"
+_CURRENCY_RE = re.compile(r"^\s*([^\d\s]*)")
+# 数字之前没有货币符号时取数字之后的部分，例如 "1.299,99 €" -> "€"
+_CURRENCY_SUFFIX_RE = re.compile(r"([^\d\s.,]*)\s*$")
+
+# 文本字段（属性名, 中文列名）
+TEXT_FIELDS = (
+    ("name", "商品名称"),
+    ("url", "商品链接"),
+    ("asin", "ASIN"),
+    ("image", "图片URL"),
+    ("promotion", "促销信息"),
+    ("delivery", "配送信息"),
+    ("store_name", "店铺名称"),
+)
+
+# 数值字段（属性名, 中文列名），属性名与 filter_engine 的列名一致
+NUMERIC_FIELDS = (
+    ("price", "价格"),
+    ("rating", "评分"),
+    ("reviews", "评论数"),
+    ("store_rating", "店铺评分"),
+)
+
+
+def _intern(value: Optional[str]) -> str:
+    """驻留重复出现的短字符串（货币符号、站点、店铺名称）"""
+    return sys.intern(value) if value else ""
+
+
+def parse_currency(price_text) -> str:
+    """提取价格文本中的货币符号，例如 "$19.99" -> "$"、"1.299,99 €" -> "€"，无法识别时返回空字符串"""
+    if not price_text or price_text == MISSING:
+        return ""
+    match = _CURRENCY_RE.match(price_text)
+    if match and match.group(1):
+        return _intern(match.group(1))
+    match = _CURRENCY_SUFFIX_RE.search(price_text)
+    return _intern(match.group(1)) if match else ""
+
+
+def parse_marketplace(url) -> str:
+    """从商品链接中提取站点域名，例如 "https://www.amazon.sg/dp/..." -> "amazon.sg" """
+    if not url or url == MISSING:
+        return ""
+    host = urlsplit(url).netloc.lower()
+    return _intern(host[4:] if host.startswith("www.") else host)
+
+
+def _text(value) -> Optional[str]:
+    """把 "N/A" 和空值统一为 None"""
+    return None if not value or value == MISSING else value
+
+
+def format_price(currency: str, price: float, marketplace: Optional[str] = None) -> str:
+    """
+    把数值价格按站点的格式还原为文本，例如 ("S$", 1293.26) -> "S$1,293.26"，
+    ("€", 1299.99, "amazon.de") -> "1.299,99 €"
+
+    Args:
+        currency: 货币符号
+        price: 数值价格，NaN 表示缺失
+        marketplace: 站点域名，None 或无法识别时使用美式格式
+    """
+    if math.isnan(price):
+        return MISSING
+    decimal, thousands, suffix = price_format(marketplace)
+    text = f"{price:,.2f}"
+    if (decimal, thousands) != (".", ","):
+        text = text.translate(str.maketrans({",": thousands, ".": decimal}))
+    if suffix:
+        return f"{text} {currency}" if currency else text
+    return f"{currency}{text}"
+
+
+def format_number(value: float) -> str:
+    """评分等数值格式化为文本"""
+    return MISSING if math.isnan(value) else str(value)
+
+
+def format_count(value: float) -> str:
+    """评论数等计数格式化为文本"""
+    return MISSING if math.isnan(value) else str(int(value))
+
+
+class Product:
+    """单个商品（数值字段已解析为 float，缺失为 NaN）"""
+
+    __slots__ = ("name", "url", "asin", "image", "promotion", "delivery", "store_name",
+                 "price", "rating", "reviews", "store_rating", "currency", "marketplace")
+
+    def __init__(self, name: Optional[str] = None, url: Optional[str] = None, asin: Optional[str] = None,
+                 image: Optional[str] = None, promotion: Optional[str] = None, delivery: Optional[str] = None,
+                 store_name: Optional[str] = None, price: float = math.nan, rating: float = math.nan,
+                 reviews: float = math.nan, store_rating: float = math.nan,
+                 currency: str = "", marketplace: str = ""):
+        self.name = name
+        self.url = url
+        self.asin = asin
+        self.image = image
+        self.promotion = promotion
+        self.delivery = delivery
+        self.store_name = _intern(store_name) or None
+        self.price = price
+        self.rating = rating
+        self.reviews = reviews
+        self.store_rating = store_rating
+        self.currency = _intern(currency)
+        self.marketplace = _intern(marketplace)
+
+    @classmethod
+    def from_dict(cls, product: Dict, marketplace: Optional[str] = None) -> "Product":
+        """
+        从商品字典创建
+
+        Args:
+            product: build_product / _extract_product_info 返回的商品字典
+            marketplace: 站点域名，默认从商品链接中提取（决定数字格式）
+        """
+        price_text = product.get("价格")
+        url = _text(product.get("商品链接"))
+        if marketplace is None:
+            marketplace = parse_marketplace(url)
+        return cls(
+            name=_text(product.get("商品名称")),
+            url=url,
+            asin=_text(product.get("ASIN")),
+            image=_text(product.get("图片URL")),
+            promotion=_text(product.get("促销信息")),
+            delivery=_text(product.get("配送信息")),
+            store_name=_text(product.get("店铺名称")),
+            price=column_parser("price", marketplace)(price_text),
+            rating=column_parser("rating")(product.get("评分")),
+            reviews=column_parser("reviews", marketplace)(product.get("评论数")),
+            store_rating=column_parser("store_rating")(product.get("店铺评分")),
+            currency=parse_currency(price_text),
+            marketplace=marketplace,
+        )
+
+    def to_dict(self) -> Dict:
+        """导出为与 PRODUCT_FIELDS 相同列名的商品字典"""
+        return {
+            "商品名称": self.name or MISSING,
+            "商品链接": self.url or MISSING,
+            "价格": format_price(self.currency, self.price, self.marketplace),
+            "评分": format_number(self.rating),
+            "评论数": format_count(self.reviews),
+            "ASIN": self.asin or MISSING,
+            "图片URL": self.image or MISSING,
+            "促销信息": self.promotion or MISSING,
+            "配送信息": self.delivery or MISSING,
+            "店铺名称": self.store_name or MISSING,
+            "店铺评分": format_number(self.store_rating),
+        }
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Product):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        return f"Product(asin={self.asin!r}, price={self.price!r}, rating={self.rating!r})"
+
+
+class ProductBatch:
+    """列式存储的一批商品，数值列为 array('d')，字符串列为列表"""
+
+    def __init__(self):
+        self.text: Dict[str, List[Optional[str]]] = {attr: [] for attr, _ in TEXT_FIELDS}
+        self.numeric: Dict[str, array] = {attr: array("d") for attr, _ in NUMERIC_FIELDS}
+        self.currency: List[str] = []
+        self.marketplace: List[str] = []
+
+    @classmethod
+    def from_dicts(cls, products: Iterable[Dict], marketplace: Optional[str] = None) -> "ProductBatch":
+        """从商品字典创建（可以是生成器，逐个转换而不保留原始字典）"""
+        batch = cls()
+        for product in products:
+            batch.append(Product.from_dict(product, marketplace))
+        return batch
+
+    @classmethod
+    def from_products(cls, products: Iterable[Product]) -> "ProductBatch":
+        """从 Product 对象创建"""
+        batch = cls()
+        for product in products:
+            batch.append(product)
+        return batch
+
+    def __len__(self) -> int:
+        return len(self.currency)
+
+    def append(self, product: Product):
+        """追加一个商品"""
+        for attr, column in self.text.items():
+            column.append(getattr(product, attr))
+        for attr, column in self.numeric.items():
+            column.append(getattr(product, attr))
+        self.currency.append(product.currency)
+        self.marketplace.append(product.marketplace)
+
+    def extend(self, other: "ProductBatch"):
+        """追加另一批商品"""
+        for attr, column in self.text.items():
+            column.extend(other.text[attr])
+        for attr, column in self.numeric.items():
+            column.extend(other.numeric[attr])
+        self.currency.extend(other.currency)
+        self.marketplace.extend(other.marketplace)
+
+    def __getitem__(self, index: int) -> Product:
+        values = {attr: column[index] for attr, column in self.text.items()}
+        values.update({attr: column[index] for attr, column in self.numeric.items()})
+        return Product(currency=self.currency[index], marketplace=self.marketplace[index], **values)
+
+    def __iter__(self) -> Iterator[Product]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def column(self, name: str) -> np.ndarray:
+        """数值列转换为 NumPy 数组（复制一份，避免导出缓冲区后 array 无法继续追加）"""
+        return np.frombuffer(self.numeric[name], dtype=np.float64).copy()
+
+    def take(self, indices: Iterable[int]) -> "ProductBatch":
+        """按下标选取商品，返回新的批次"""
+        indices = list(indices)
+        batch = ProductBatch()
+        for attr, column in self.text.items():
+            batch.text[attr] = [column[i] for i in indices]
+        for attr, column in self.numeric.items():
+            batch.numeric[attr] = array("d", self.column(attr)[indices].tolist() if indices else [])
+        batch.currency = [self.currency[i] for i in indices]
+        batch.marketplace = [self.marketplace[i] for i in indices]
+        return batch
+
+    def filter(self, filters: Dict) -> "ProductBatch":
+        """用向量化掩码筛选（数值列已解析，不需要再次解析文本）"""
+        columns = {attr: self.column(attr) for attr in self.numeric}
+        frame = ProductFrame.from_columns(self, columns)
+        return self.take(frame.filter_indices(filters))
+
+    def to_dicts(self) -> List[Dict]:
+        """导出为商品字典列表"""
+        return [product.to_dict() for product in self]
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        导出为 DataFrame，数值列保持 float64（缺失为 NaN），列名与 PRODUCT_FIELDS 一致，
+        另外附加货币和站点两列
+        """
+        data = {}
+        for attr, field in TEXT_FIELDS:
+            data[field] = self.text[attr]
+        for attr, field in NUMERIC_FIELDS:
+            data[field] = self.column(attr)
+        frame = pd.DataFrame(data)[PRODUCT_FIELDS]
+        frame["货币"] = pd.Categorical(self.currency)
+        frame["站点"] = pd.Categorical(self.marketplace)
+        return frame
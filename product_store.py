@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+本地商品库
+
+以 ASIN 为主键把商品增量写入 SQLite，每次爬取只写入变化的部分：
+- products: 每个 ASIN 一行，保存最新的字段和首次 / 最近出现时间
+- product_keywords: 商品与搜索关键词的对应关系
+- price_history: 价格或评分发生变化时追加一行历史记录
+
+筛选条件可以直接在 SQL 中执行，分析时不需要再读取历次导出的 Excel 文件。
+
+用法:
+    with ProductStore("amazon_products.db") as store:
+        store.upsert(products, keyword="laptop")
+        cheap = store.query({"max_price": 500, "min_rating": 4.0}, keyword="laptop")
+        history = store.history("B0CXYZ1234")
+"""
+
+import logging
+import math
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from config import OUTPUT_CONFIG
+from filter_engine import FILTER_COLUMNS
+from product import Product
+
+logger = logging.getLogger(__name__)
+
+KEYWORD_FIELD = "关键词"
+
+# 商品表中保存的 Product 属性
+STORE_COLUMNS = ("name", "url", "image", "promotion", "delivery", "store_name",
+                 "price", "rating", "reviews", "store_rating", "currency", "marketplace")
+# 发生变化时需要记录历史的字段
+HISTORY_COLUMNS = ("price", "rating", "reviews")
+# query 支持的排序字段
+ORDER_COLUMNS = ("price", "rating", "reviews", "store_rating", "last_seen", "first_seen")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    asin TEXT PRIMARY KEY,
+    name TEXT,
+    url TEXT,
+    image TEXT,
+    promotion TEXT,
+    delivery TEXT,
+    store_name TEXT,
+    price REAL,
+    rating REAL,
+    reviews REAL,
+    store_rating REAL,
+    currency TEXT,
+    marketplace TEXT,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_products_price ON products (price);
+CREATE INDEX IF NOT EXISTS idx_products_rating ON products (rating);
+CREATE INDEX IF NOT EXISTS idx_products_last_seen ON products (last_seen);
+
+CREATE TABLE IF NOT EXISTS product_keywords (
+    asin TEXT NOT NULL,
+    keyword TEXT NOT NULL,
+    last_seen REAL NOT NULL,
+    PRIMARY KEY (asin, keyword)
+);
+CREATE INDEX IF NOT EXISTS idx_product_keywords_keyword ON product_keywords (keyword);
+
+CREATE TABLE IF NOT EXISTS price_history (
+    asin TEXT NOT NULL,
+    price REAL,
+    rating REAL,
+    reviews REAL,
+    seen_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_price_history_asin ON price_history (asin, seen_at);
+"""
+
+
+def _sql_value(value):
+    """NaN 存为 NULL"""
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def _row_to_product(row: sqlite3.Row) -> Product:
+    """数据库行转换为 Product"""
+    values = {column: row[column] for column in STORE_COLUMNS}
+    for column in ("price", "rating", "reviews", "store_rating"):
+        if values[column] is None:
+            values[column] = math.nan
+    return Product(asin=row["asin"], **values)
+
+
+class ProductStore:
+    """基于 SQLite 的商品库（线程安全，可被多个进程共享）"""
+
+    def __init__(self, path: str = None):
+        """
+        打开（或创建）商品库
+
+        Args:
+            path: 数据库文件路径，默认读取 OUTPUT_CONFIG["store_path"]
+        """
+        self.path = path or OUTPUT_CONFIG["store_path"]
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def upsert(self, products: Iterable[Dict], keyword: Optional[str] = None,
+               seen_at: Optional[float] = None) -> Dict[str, int]:
+        """
+        按 ASIN 增量写入商品
+
+        新商品插入；已有商品只在字段变化时更新，价格、评分或评论数变化时追加历史记录；
+        没有变化的商品只更新最近出现时间。没有 ASIN 的商品会被跳过。
+
+        Args:
+            products: 商品字典（可以带 "关键词" 字段，多个关键词以逗号分隔）
+            keyword: 搜索关键词，所有商品都关联到该关键词
+            seen_at: 出现时间（时间戳），默认为当前时间
+
+        Returns:
+            统计：inserted、updated、unchanged、skipped、history
+        """
+        seen_at = time.time() if seen_at is None else seen_at
+        stats = {"inserted": 0, "updated": 0, "unchanged": 0, "skipped": 0, "history": 0}
+
+        batch: Dict[str, Product] = {}
+        keywords = []
+        for product in products:
+            record = Product.from_dict(product)
+            if not record.asin:
+                stats["skipped"] += 1
+                continue
+            batch[record.asin] = record
+            names = [keyword] if keyword else []
+            if product.get(KEYWORD_FIELD):
+                names.extend(name for name in str(product[KEYWORD_FIELD]).split(",") if name)
+            keywords.extend((record.asin, name, seen_at) for name in names)
+        if not batch:
+            return stats
+
+        with self._lock:
+            existing = {}
+            asins = list(batch)
+            # SQLite 单条语句的参数个数有限，分批查询
+            for start in range(0, len(asins), 500):
+                chunk = asins[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                for row in self._conn.execute(f"SELECT * FROM products WHERE asin IN ({placeholders})", chunk):
+                    existing[row["asin"]] = row
+
+            inserts, updates, touches, history = [], [], [], []
+            for asin, record in batch.items():
+                values = [_sql_value(getattr(record, column)) for column in STORE_COLUMNS]
+                row = existing.get(asin)
+                if row is None:
+                    inserts.append([asin] + values + [seen_at, seen_at])
+                    history.append([asin] + [_sql_value(getattr(record, c)) for c in HISTORY_COLUMNS] + [seen_at])
+                    continue
+                if values == [row[column] for column in STORE_COLUMNS]:
+                    touches.append((seen_at, asin))
+                    continue
+                updates.append(values + [seen_at, asin])
+                current = [_sql_value(getattr(record, column)) for column in HISTORY_COLUMNS]
+                if current != [row[column] for column in HISTORY_COLUMNS]:
+                    history.append([asin] + current + [seen_at])
+
+            columns = ", ".join(STORE_COLUMNS)
+            if inserts:
+                self._conn.executemany(
+                    f"INSERT INTO products (asin, {columns}, first_seen, last_seen) "
+                    f"VALUES ({','.join('?' * (len(STORE_COLUMNS) + 3))})", inserts)
+            if updates:
+                assignments = ", ".join(f"{column} = ?" for column in STORE_COLUMNS)
+                self._conn.executemany(f"UPDATE products SET {assignments}, last_seen = ? WHERE asin = ?", updates)
+            if touches:
+                self._conn.executemany("UPDATE products SET last_seen = ? WHERE asin = ?", touches)
+            if history:
+                self._conn.executemany(
+                    "INSERT INTO price_history (asin, price, rating, reviews, seen_at) VALUES (?, ?, ?, ?, ?)",
+                    history)
+            if keywords:
+                self._conn.executemany(
+                    "INSERT INTO product_keywords (asin, keyword, last_seen) VALUES (?, ?, ?) "
+                    "ON CONFLICT (asin, keyword) DO UPDATE SET last_seen = excluded.last_seen", keywords)
+            self._conn.commit()
+
+        stats.update(inserted=len(inserts), updated=len(updates), unchanged=len(touches), history=len(history))
+        logger.info(f"商品库写入完成：新增 {stats['inserted']}，更新 {stats['updated']}，"
+                    f"未变化 {stats['unchanged']}，跳过 {stats['skipped']}")
+        return stats
+
+    def _where(self, filters: Optional[Dict], keyword: Optional[str], seen_since: Optional[float]):
+        """把筛选条件转换为 SQL 条件和参数"""
+        clauses, params = [], []
+        for name, (_, column, kind) in FILTER_COLUMNS.items():
+            threshold = (filters or {}).get(name)
+            if not threshold:
+                continue
+            # 与 _meets_criteria 一致：缺失的值不参与该项筛选
+            operator = ">=" if kind == "min" else "<="
+            clauses.append(f"(p.{column} IS NULL OR p.{column} {operator} ?)")
+            params.append(threshold)
+        if keyword:
+            clauses.append("p.asin IN (SELECT asin FROM product_keywords WHERE keyword = ?)")
+            params.append(keyword)
+        if seen_since is not None:
+            clauses.append("p.last_seen >= ?")
+            params.append(seen_since)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query_products(self, filters: Optional[Dict] = None, keyword: Optional[str] = None,
+                       seen_since: Optional[float] = None, order_by: Optional[str] = None,
+                       descending: bool = False, limit: Optional[int] = None) -> List[Product]:
+        """
+        在 SQL 中执行筛选，返回 Product 列表
+
+        Args:
+            filters: 筛选条件（与 DEFAULT_FILTERS 相同的键）
+            keyword: 只返回关联到该关键词的商品
+            seen_since: 只返回该时间之后出现过的商品
+            order_by: 排序字段，可选值见 ORDER_COLUMNS
+            descending: 是否降序
+            limit: 最多返回的商品数量
+        """
+        where, params = self._where(filters, keyword, seen_since)
+        sql = f"SELECT p.* FROM products p{where}"
+        if order_by:
+            if order_by not in ORDER_COLUMNS:
+                raise ValueError(f"不支持的排序字段: {order_by}，可选值: {ORDER_COLUMNS}")
+            sql += f" ORDER BY p.{order_by} {'DESC' if descending else 'ASC'}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [_row_to_product(row) for row in rows]
+
+    def query(self, filters: Optional[Dict] = None, keyword: Optional[str] = None,
+              seen_since: Optional[float] = None, order_by: Optional[str] = None,
+              descending: bool = False, limit: Optional[int] = None) -> List[Dict]:
+        """与 query_products 相同，返回与 PRODUCT_FIELDS 相同列名的商品字典"""
+        return [product.to_dict() for product in
+                self.query_products(filters, keyword, seen_since, order_by, descending, limit)]
+
+    def count(self, filters: Optional[Dict] = None, keyword: Optional[str] = None,
+              seen_since: Optional[float] = None) -> int:
+        """满足条件的商品数量"""
+        where, params = self._where(filters, keyword, seen_since)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM products p{where}", params).fetchone()[0]
+
+    def history(self, asin: str) -> List[Dict]:
+        """某个商品的价格 / 评分历史（按时间顺序）"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT price, rating, reviews, seen_at FROM price_history WHERE asin = ? ORDER BY seen_at, rowid",
+                (asin,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def keywords(self, asin: str) -> List[str]:
+        """某个商品关联的搜索关键词"""
+        with self._lock:
+            rows = self._conn.execute("SELECT keyword FROM product_keywords WHERE asin = ? ORDER BY keyword",
+                                      (asin,)).fetchall()
+        return [row[0] for row in rows]
+
+    def close(self):
+        """关闭数据库"""
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
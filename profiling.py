@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+性能剖析
+
+Profiler 包装一次爬取，按 PROFILING_CONFIG["modes"] 组合以下剖析方式，结果写入输出目录：
+
+    cpu     cProfile（只统计调用 Profiler 的线程）  cpu.pstats（可用 snakeviz 查看）、cpu_top.txt
+    sample  定时采样所有线程的调用栈              samples.collapsed（flamegraph.pl / speedscope 可直接读取）、samples_top.txt
+    memory  tracemalloc 分配统计                  memory_top.txt（按分配位置排序的前 N 项和内存峰值）
+
+main.py 和 batch_runner.py 的 --profile 参数使用 Profiler；配合 --replay 从页面缓存回放，
+不产生任何网络请求，剖析结果可以重复。本模块也可以直接剖析保存的搜索结果页：
+把 HTML 写入临时缓存后以回放模式爬取、筛选，重复多次。
+
+用法:
+    python profiling.py laptop --html "docs/Amazon.sg _ laptop.html" --repeat 50 --min-rating 4
+    python profiling.py laptop --max-pages 3 --profile cpu,memory      # 回放 .page_cache 中已缓存的页面
+    flamegraph.pl profiles/samples.collapsed > flame.svg
+
+    with Profiler("profiles/laptop", modes="sample,memory"):
+        crawler.search_products("laptop")
+"""
+
+import argparse
+import cProfile
+import io
+import logging
+import os
+import pstats
+import sys
+import tempfile
+import threading
+import tracemalloc
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from config import PROFILING_CONFIG
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ("cpu", "sample", "memory")
+
+
+def parse_modes(modes) -> Tuple[str, ...]:
+    """
+    解析剖析方式
+
+    Args:
+        modes: 逗号分隔的字符串（例如 "cpu,memory"）或字符串序列，None 表示 PROFILING_CONFIG["modes"]
+
+    Returns:
+        去重后的剖析方式
+    """
+    if modes is None:
+        modes = PROFILING_CONFIG["modes"]
+    if isinstance(modes, str):
+        modes = modes.split(",")
+    modes = tuple(dict.fromkeys(mode.strip() for mode in modes if mode.strip()))
+    unknown = [mode for mode in modes if mode not in PROFILE_MODES]
+    if unknown or not modes:
+        raise ValueError(f"不支持的剖析方式: {','.join(unknown) or modes}，可选值: {PROFILE_MODES}")
+    return modes
+
+
+def _frame_name(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """后台线程定时采样所有线程的调用栈，汇总为折叠栈（collapsed stacks）"""
+
+    def __init__(self, interval: Optional[float] = None):
+        """
+        Args:
+            interval: 采样间隔（秒），默认读取 PROFILING_CONFIG["interval"]
+        """
+        self.interval = PROFILING_CONFIG["interval"] if interval is None else interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler-sampler", daemon=True)
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_name(frame.f_code))
+                    frame = frame.f_back
+                # 根节点为线程名，火焰图中按线程分开
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self) -> str:
+        """折叠栈文本，每行为 "线程;外层函数;...;内层函数 采样数" """
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def top(self, n: int = 30) -> List[Tuple[str, int, int]]:
+        """
+        采样次数最多的函数
+
+        Returns:
+            [(函数, 自身采样数, 包含子调用的采样数)]，按自身采样数排序
+        """
+        own, total = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")[1:]
+            if not frames:
+                continue
+            own[frames[-1]] += count
+            for frame in set(frames):
+                total[frame] += count
+        return [(frame, count, total[frame]) for frame, count in own.most_common(n)]
+
+
+class Profiler:
+    """组合 cProfile、调用栈采样和 tracemalloc 的剖析上下文"""
+
+    def __init__(self, output_dir: Optional[str] = None, modes=None, interval: Optional[float] = None,
+                 top: Optional[int] = None):
+        """
+        Args:
+            output_dir: 结果输出目录，默认读取 PROFILING_CONFIG["dir"]
+            modes: 剖析方式（见 parse_modes），默认读取 PROFILING_CONFIG["modes"]
+            interval: 采样间隔（秒）
+            top: 报告中列出的条目数量
+        """
+        self.output_dir = output_dir or PROFILING_CONFIG["dir"]
+        self.modes = parse_modes(modes)
+        self.interval = interval
+        self.top = PROFILING_CONFIG["top"] if top is None else top
+        self.outputs: Dict[str, str] = {}
+        self._cpu: Optional[cProfile.Profile] = None
+        self._sampler: Optional[StackSampler] = None
+        self._owns_tracemalloc = False
+
+    def start(self):
+        """开始剖析"""
+        if "memory" in self.modes:
+            # 调用方已经在跟踪时沿用现有的跟踪，结束时不停止
+            self._owns_tracemalloc = not tracemalloc.is_tracing()
+            if self._owns_tracemalloc:
+                tracemalloc.start(PROFILING_CONFIG["memory_frames"])
+            tracemalloc.reset_peak()
+        if "sample" in self.modes:
+            self._sampler = StackSampler(self.interval)
+            self._sampler.start()
+        if "cpu" in self.modes:
+            self._cpu = cProfile.Profile()
+            self._cpu.enable()
+        logger.info(f"开始性能剖析（{','.join(self.modes)}），结果写入 {self.output_dir}")
+
+    def stop(self) -> Dict[str, str]:
+        """
+        停止剖析并写出结果
+
+        Returns:
+            结果名称 -> 文件路径
+        """
+        if self._cpu is not None:
+            self._cpu.disable()
+        if self._sampler is not None:
+            self._sampler.stop()
+        snapshot, peak = None, 0
+        if "memory" in self.modes:
+            snapshot = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+            if self._owns_tracemalloc:
+                tracemalloc.stop()
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        if self._cpu is not None:
+            self._write_cpu()
+        if self._sampler is not None:
+            self._write_samples()
+        if snapshot is not None:
+            self._write_memory(snapshot, peak)
+        for name, path in self.outputs.items():
+            logger.info(f"剖析结果 {name}: {path}")
+        return self.outputs
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.output_dir, name)
+
+    def _write_cpu(self):
+        path = self._path("cpu.pstats")
+        self._cpu.dump_stats(path)
+        stream = io.StringIO()
+        stats = pstats.Stats(self._cpu, stream=stream).strip_dirs()
+        stats.sort_stats("cumulative").print_stats(self.top)
+        stats.sort_stats("tottime").print_stats(self.top)
+        top_path = self._path("cpu_top.txt")
+        with open(top_path, "w", encoding="utf-8") as f:
+            f.write(stream.getvalue())
+        self.outputs["cpu"] = path
+        self.outputs["cpu_top"] = top_path
+
+    def _write_samples(self):
+        path = self._path("samples.collapsed")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self._sampler.collapsed())
+        lines = [f"采样 {self._sampler.samples} 次，间隔 {self._sampler.interval * 1000:.1f}ms",
+                 f"{'自身':>8s} {'累计':>8s}  函数"]
+        for frame, own, total in self._sampler.top(self.top):
+            lines.append(f"{own:>8d} {total:>8d}  {frame}")
+        top_path = self._path("samples_top.txt")
+        with open(top_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        self.outputs["samples"] = path
+        self.outputs["samples_top"] = top_path
+
+    def _write_memory(self, snapshot: tracemalloc.Snapshot, peak: int):
+        snapshot = snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ))
+        statistics = snapshot.statistics("lineno")
+        total = sum(stat.size for stat in statistics)
+        lines = [f"内存峰值: {peak / 1024 / 1024:.1f} MB，结束时仍占用: {total / 1024 / 1024:.1f} MB",
+                 f"{'大小(KB)':>10s} {'分配次数':>10s}  位置"]
+        for stat in statistics[:self.top]:
+            frame = stat.traceback[0]
+            lines.append(f"{stat.size / 1024:>10.1f} {stat.count:>10d}  {frame.filename}:{frame.lineno}")
+        # 占用最多的几处分配附带调用栈，便于找到调用方
+        lines.append("")
+        for stat in snapshot.statistics("traceback")[:5]:
+            lines.append(f"{stat.size / 1024:.1f} KB，{stat.count} 次分配:")
+            lines.extend(f"    {line}" for line in stat.traceback.format(limit=8))
+        path = self._path("memory_top.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        self.outputs["memory_top"] = path
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def profile_replay(keyword: str, html_files: Iterable[str] = (), cache_dir: Optional[str] = None,
+                   max_pages: int = 1, filters: Optional[Dict] = None, repeat: int = 1,
+                   output_dir: Optional[str] = None, modes=None, marketplace=None) -> Dict[str, str]:
+    """
+    以回放模式剖析爬取（解析）和筛选，不产生任何网络请求
+
+    Args:
+        keyword: 搜索关键词
+        html_files: 保存的搜索结果页，依次作为第 1、2、... 页写入临时缓存；为空时回放 cache_dir 中已缓存的页面
+        cache_dir: 页面缓存目录，默认读取 CACHE_CONFIG["dir"]
+        max_pages: 回放的页数（传入 html_files 时为文件数）
+        filters: 对爬取结果调用 filter_products 的筛选条件
+        repeat: 重复次数（至少 1 次），页面较少时多次重复以获得稳定的剖析结果
+        output_dir: 结果输出目录
+        modes: 剖析方式
+        marketplace: 站点代码
+
+    Returns:
+        结果名称 -> 文件路径
+    """
+    if repeat < 1:
+        raise ValueError(f"重复次数至少为 1: {repeat}")
+    from amazon_crawler import AmazonCrawler, build_search_url
+    from page_cache import PageCache
+
+    html_files = list(html_files)
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = PageCache(tmp if html_files else cache_dir)
+        for page, path in enumerate(html_files, 1):
+            with open(path, encoding="utf-8") as f:
+                cache.put(build_search_url(keyword, page, marketplace=marketplace), f.read())
+        if html_files:
+            max_pages = len(html_files)
+
+        crawler = AmazonCrawler(cache=cache, cache_mode="replay", marketplace=marketplace)
+        try:
+            with Profiler(output_dir, modes) as profiler:
+                for _ in range(repeat):
+                    products = crawler.search_products(keyword, max_pages)
+                    if filters:
+                        crawler.filter_products(products, filters)
+            logger.info(f"回放 {repeat} 次，每次 {len(products)} 个商品")
+        finally:
+            crawler.close()
+            cache.close()
+    return profiler.outputs
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="以回放模式剖析搜索结果页的解析和筛选")
+    arg_parser.add_argument("keyword", help="搜索关键词")
+    arg_parser.add_argument("--html", nargs="+", default=[], help="保存的搜索结果页（依次作为第 1、2、... 页）")
+    arg_parser.add_argument("--cache-dir", default=None, help="回放的页面缓存目录（未传入 --html 时使用）")
+    arg_parser.add_argument("--max-pages", type=int, default=1, help="回放的页数")
+    arg_parser.add_argument("--repeat", type=int, default=20, help="重复次数")
+    arg_parser.add_argument("--profile", default=None, help="剖析方式，逗号分隔：cpu,sample,memory")
+    arg_parser.add_argument("--profile-dir", default=None, help="结果输出目录")
+    arg_parser.add_argument("--marketplace", default=None, help="站点代码")
+    arg_parser.add_argument("--min-price", type=float, help="最低价格")
+    arg_parser.add_argument("--max-price", type=float, help="最高价格")
+    arg_parser.add_argument("--min-rating", type=float, help="最低商品评分")
+    arg_parser.add_argument("--min-reviews", type=int, help="最少评论数")
+    args = arg_parser.parse_args()
+    if args.repeat < 1:
+        arg_parser.error("--repeat 至少为 1")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    # 每页的爬取日志会淹没剖析结果
+    logging.getLogger("amazon_crawler").setLevel(logging.WARNING)
+
+    filters = {name: value for name, value in (
+        ("min_price", args.min_price),
+        ("max_price", args.max_price),
+        ("min_rating", args.min_rating),
+        ("min_reviews", args.min_reviews),
+    ) if value is not None}
+    outputs = profile_replay(args.keyword, args.html, args.cache_dir, args.max_pages, filters,
+                             args.repeat, args.profile_dir, args.profile, args.marketplace)
+    for name, path in outputs.items():
+        print(f"{name}: {path}")
+
+
+if __name__ == "__main__":
+    main()
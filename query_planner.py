@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+搜索查询规划
+
+把筛选条件尽量下推为亚马逊搜索 URL 的筛选参数，让服务端只返回可能满足条件的商品，
+只有无法下推的条件才在客户端筛选，从而减少需要爬取的页数：
+
+    价格区间    rh=p_36:<最低价格*100>-<最高价格*100>（单位为分），服务端按另一个价格字段近似筛选，
+                价格条件仍保留在客户端复核
+    最低评分    rh=p_72:<N 星及以上的节点 ID>，非整数评分下推为向下取整的星级，剩余部分在客户端筛选
+                （节点 ID 因站点而异，没有登记节点的站点在客户端筛选）
+    品类        i=<品类别名>，例如 electronics、computers
+    排序        s=price-asc-rank / price-desc-rank / review-rank / date-desc-rank
+
+店铺评分、评论数等条件没有对应的 URL 参数，保留在客户端筛选。
+
+用法:
+    plan = plan_query("laptop", {"max_price": 500, "min_rating": 4.5, "min_reviews": 100}, sort="price_low")
+    plan.url(2)               # https://www.amazon.com/s?k=laptop&rh=p_36%3A-50000%2Cp_72%3A1248882011&s=price-asc-rank&page=2
+    plan.residual_filters     # {"max_price": 500, "min_rating": 4.5, "min_reviews": 100}
+"""
+
+import math
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+from urllib.parse import urlencode
+
+from marketplace import Marketplace, get_marketplace
+
+# 排序方式 -> s 参数
+SORT_ORDERS = {
+    "relevance": None,
+    "price_low": "price-asc-rank",
+    "price_high": "price-desc-rank",
+    "rating": "review-rank",
+    "newest": "date-desc-rank",
+}
+
+# amazon.com 的 "N 星及以上" 筛选节点 ID（p_72），其他站点见 marketplace.MARKETPLACES
+STAR_RATING_NODES = get_marketplace("us").star_rating_nodes
+
+# 可以下推为 URL 参数的筛选条件
+PUSHDOWN_FILTERS = ("min_price", "max_price", "min_rating")
+
+
+@dataclass
+class QueryPlan:
+    """一次搜索的执行计划：服务端筛选参数 + 客户端剩余筛选条件"""
+    keyword: str
+    params: Dict[str, str] = field(default_factory=dict)
+    residual_filters: Dict = field(default_factory=dict)
+    marketplace: Optional[Marketplace] = None
+
+    def url(self, page: int = 1) -> str:
+        """第 page 页的搜索 URL"""
+        return get_marketplace(self.marketplace).search_url(self.keyword, page, self.params)
+
+    @property
+    def checkpoint_key(self) -> str:
+        """检查点中区分不同站点和筛选参数的键，默认站点且没有下推参数时就是关键词本身"""
+        key = self.keyword
+        if self.params:
+            key = f"{key}?{urlencode(sorted(self.params.items()))}"
+        marketplace = get_marketplace(self.marketplace)
+        if marketplace != get_marketplace():
+            key = f"{marketplace.domain}/{key}"
+        return key
+
+
+def _price_cents(value) -> str:
+    """价格转换为 p_36 使用的分"""
+    return str(int(round(float(value) * 100)))
+
+
+def plan_query(keyword: str, filters: Optional[Dict] = None, department: Optional[str] = None,
+               sort: Optional[str] = None, marketplace=None) -> QueryPlan:
+    """
+    根据筛选条件生成搜索计划
+
+    Args:
+        keyword: 搜索关键词
+        filters: 筛选条件（与 DEFAULT_FILTERS 相同的键）
+        department: 品类别名（i 参数），None 表示全部品类
+        sort: 排序方式，可选值见 SORT_ORDERS
+        marketplace: 站点代码或 Marketplace，默认读取 CRAWLER_CONFIG["marketplace"]
+
+    Returns:
+        搜索计划
+    """
+    if sort is not None and sort not in SORT_ORDERS:
+        raise ValueError(f"不支持的排序方式: {sort}，可选值: {tuple(SORT_ORDERS)}")
+    marketplace = get_marketplace(marketplace)
+
+    # 值为 0 / None 的条件与 _meets_criteria 一致，视为未设置
+    filters = {name: value for name, value in (filters or {}).items() if value}
+    residual = {name: value for name, value in filters.items() if name not in PUSHDOWN_FILTERS}
+    refinements = []
+
+    min_price = filters.get("min_price")
+    max_price = filters.get("max_price")
+    if min_price or max_price:
+        low = _price_cents(min_price) if min_price else ""
+        high = _price_cents(max_price) if max_price else ""
+        refinements.append(f"p_36:{low}-{high}")
+        # p_36 按分取整且使用的价格字段与搜索结果页显示的价格不同，在客户端复核
+        for name in ("min_price", "max_price"):
+            if filters.get(name):
+                residual[name] = filters[name]
+
+    min_rating = filters.get("min_rating")
+    nodes = marketplace.star_rating_nodes
+    if min_rating and not nodes:
+        residual["min_rating"] = min_rating
+    elif min_rating:
+        stars = min(int(math.floor(min_rating)), max(nodes))
+        if stars >= 1:
+            refinements.append(f"p_72:{nodes[stars]}")
+        if stars != min_rating:
+            # 例如 4.5 星：服务端只能筛到 4 星及以上，剩余部分在客户端筛选
+            residual["min_rating"] = min_rating
+
+    params = {}
+    if refinements:
+        params["rh"] = ",".join(refinements)
+    if department:
+        params["i"] = department
+    if sort and SORT_ORDERS[sort]:
+        params["s"] = SORT_ORDERS[sort]
+    return QueryPlan(keyword, params, residual, marketplace)
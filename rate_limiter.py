@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+自适应限速
+
+每个主机一个令牌桶，速率按 AIMD（加性增、乘性减）调整：
+- 正常响应：速率增加 rate_increase（请求/秒），不超过 rate_max
+- 验证码、429/503 等拦截状态码、请求失败或页面过慢：速率乘以 rate_decrease，不低于 rate_min
+
+初始速率由 CRAWLER_CONFIG 的 delay_min / delay_max 推算（平均延迟的倒数），
+之后在安全范围内尽可能快地爬取，而不是固定平均 3 秒一页。
+
+用法:
+    limiter = AdaptiveRateLimiter()
+    fetcher = RateLimitedFetcher(HttpFetcher(), limiter)
+    limiter.rates()     # {"www.amazon.com": 0.45}
+"""
+
+import logging
+import math
+import random
+import threading
+import time
+from typing import Dict
+from urllib.parse import urlsplit
+
+from config import ANTI_DETECTION_CONFIG, CRAWLER_CONFIG
+from fetcher import BLOCK_STATUS_CODES, FETCH_ERRORS, BaseFetcher, FetchResult
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """令牌桶（线程安全），令牌不足时预约未来的令牌并返回需要等待的时间"""
+
+    def __init__(self, rate: float, burst: float = 1):
+        """
+        Args:
+            rate: 每秒补充的令牌数，math.inf 表示不限速
+            burst: 桶容量，允许连续发出的请求数
+        """
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: float = 1) -> float:
+        """取出令牌（可以透支），返回调用方需要等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            if math.isinf(self.rate):
+                self.tokens = self.burst
+                self._last = now
+                return 0.0
+            self.tokens = min(self.burst, self.tokens + (now - self._last) * self.rate)
+            self._last = now
+            self.tokens -= tokens
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def set_rate(self, rate: float):
+        """调整速率（已积累的令牌按旧速率结算）"""
+        with self._lock:
+            now = time.monotonic()
+            if not math.isinf(self.rate):
+                self.tokens = min(self.burst, self.tokens + (now - self._last) * self.rate)
+            self._last = now
+            self.rate = rate
+
+
+class HostState:
+    """单个主机的令牌桶和统计"""
+
+    def __init__(self, rate: float, burst: float):
+        self.bucket = TokenBucket(rate, burst)
+        self.healthy = 0
+        self.backoffs = 0
+
+
+class AdaptiveRateLimiter:
+    """按主机的 AIMD 自适应限速器（线程安全）"""
+
+    def __init__(self, initial_rate: float = None, min_rate: float = None, max_rate: float = None,
+                 increase: float = None, decrease: float = None, slow_page_seconds: float = None,
+                 burst: float = 1, jitter: float = None):
+        """
+        Args:
+            initial_rate: 初始速率（请求/秒），默认为 CRAWLER_CONFIG 中 delay_min / delay_max 平均值的倒数
+            min_rate: 最低速率，默认读取 CRAWLER_CONFIG["rate_min"]
+            max_rate: 最高速率，默认读取 CRAWLER_CONFIG["rate_max"]，math.inf 表示不设上限
+            increase: 每个正常响应增加的速率，默认读取 CRAWLER_CONFIG["rate_increase"]
+            decrease: 遇到拦截或慢页面时速率的乘数，默认读取 CRAWLER_CONFIG["rate_decrease"]
+            slow_page_seconds: 超过该耗时的页面视为过慢，默认读取 CRAWLER_CONFIG["slow_page_seconds"]
+            burst: 每个主机的令牌桶容量
+            jitter: 等待时间的随机放大比例，默认启用随机延迟时为 0.2
+        """
+        if initial_rate is None:
+            initial_rate = 2 / (CRAWLER_CONFIG["delay_min"] + CRAWLER_CONFIG["delay_max"])
+        self.min_rate = CRAWLER_CONFIG["rate_min"] if min_rate is None else min_rate
+        self.max_rate = CRAWLER_CONFIG["rate_max"] if max_rate is None else max_rate
+        self.initial_rate = min(max(initial_rate, self.min_rate), self.max_rate)
+        self.increase = CRAWLER_CONFIG["rate_increase"] if increase is None else increase
+        self.decrease = CRAWLER_CONFIG["rate_decrease"] if decrease is None else decrease
+        self.slow_page_seconds = (CRAWLER_CONFIG["slow_page_seconds"]
+                                  if slow_page_seconds is None else slow_page_seconds)
+        self.burst = burst
+        if jitter is None:
+            jitter = 0.2 if ANTI_DETECTION_CONFIG["enable_random_delay"] else 0.0
+        self.jitter = jitter
+        self._hosts: Dict[str, HostState] = {}
+        self._lock = threading.Lock()
+
+    def _host(self, url: str) -> HostState:
+        """获取（或创建）URL 所在主机的状态"""
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = HostState(self.initial_rate, self.burst)
+            return self._hosts[host]
+
+    def reserve(self, url: str) -> float:
+        """预约一次请求，返回需要等待的秒数（异步调用方自行 await asyncio.sleep）"""
+        wait = self._host(url).bucket.reserve()
+        if wait > 0 and self.jitter:
+            wait *= random.uniform(1, 1 + self.jitter)
+        return wait
+
+    def acquire(self, url: str):
+        """阻塞直到可以向该主机发出请求"""
+        wait = self.reserve(url)
+        if wait > 0:
+            time.sleep(wait)
+
+    def record(self, url: str, status_code: int = 200, blocked: bool = False, elapsed: float = 0.0,
+               failed: bool = False):
+        """
+        记录一次请求的结果并调整该主机的速率
+
+        Args:
+            url: 请求的 URL
+            status_code: HTTP 状态码
+            blocked: 是否为验证码页面
+            elapsed: 请求耗时（秒）
+            failed: 请求是否抛出了异常
+        """
+        state = self._host(url)
+        bucket = state.bucket
+        if failed or blocked or status_code in BLOCK_STATUS_CODES or elapsed > self.slow_page_seconds:
+            rate = max(self.min_rate, bucket.rate * self.decrease)
+            state.backoffs += 1
+            logger.warning(f"{urlsplit(url).netloc} 响应异常（状态码 {status_code}，耗时 {elapsed:.1f}s），"
+                           f"请求速率降至 {rate:.3f}/s")
+        else:
+            rate = min(self.max_rate, bucket.rate + self.increase)
+            state.healthy += 1
+        bucket.set_rate(rate)
+
+    def record_result(self, result: FetchResult):
+        """根据页面获取结果调整速率"""
+        self.record(result.url, result.status_code, result.blocked, result.elapsed)
+
+    def rate(self, url: str) -> float:
+        """URL 所在主机当前的请求速率（请求/秒）"""
+        return self._host(url).bucket.rate
+
+    def rates(self) -> Dict[str, float]:
+        """所有主机当前的请求速率"""
+        with self._lock:
+            return {host: state.bucket.rate for host, state in self._hosts.items()}
+
+    def stats(self) -> Dict[str, Dict]:
+        """所有主机的限速统计：当前速率、正常响应数、降速次数"""
+        with self._lock:
+            return {host: {"rate": state.bucket.rate, "healthy": state.healthy, "backoffs": state.backoffs}
+                    for host, state in self._hosts.items()}
+
+
+class RateLimitedFetcher(BaseFetcher):
+    """在请求前按主机限速、请求后根据响应调整速率的获取后端"""
+
+    def __init__(self, fetcher: BaseFetcher, limiter: AdaptiveRateLimiter):
+        """
+        Args:
+            fetcher: 实际的获取后端
+            limiter: 限速器，可以在多个后端之间共享
+        """
+        self.fetcher = fetcher
+        self.limiter = limiter
+        self.backend = fetcher.backend
+
+    def fetch(self, url: str) -> FetchResult:
+        """限速后获取页面"""
+        start = time.perf_counter()
+        self.limiter.acquire(url)
+        waited = time.perf_counter() - start
+        start = time.perf_counter()
+        try:
+            result = self.fetcher.fetch(url)
+        except FETCH_ERRORS:
+            # HTTP 请求失败，或浏览器加载超时、会话断开
+            self.limiter.record(url, status_code=0, elapsed=time.perf_counter() - start, failed=True)
+            raise
+        self.limiter.record_result(result)
+        result.add_timing("rate_limit_wait", waited)
+        return result
+
+    def close(self):
+        """释放获取后端资源"""
+        self.fetcher.close()
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+卖家信息缓存
+
+同一批卖家会出现在成千上万个商品后面，而每次查询卖家评分都要加载一次卖家主页。
+SellerCache 把卖家信息按（站点, 卖家 ID）缓存在 SQLite 中，在有效期（TTL）内：
+- 同一进程的多个线程同时查询同一个卖家时只发起一次请求，其余线程等待结果（请求合并）
+- 多个工作进程共享同一个数据库文件，通过认领记录保证同一个卖家只由一个进程获取，其余进程等待写入
+- 没有评分的卖家同样会被缓存，不会反复请求
+
+用法:
+    cache = SellerCache("seller_cache.db", ttl=7 * 24 * 3600)
+    profile = cache.get_or_fetch("A1SELLER", "amazon.com", lambda: fetch_rating("A1SELLER"), name="TechStore")
+    profiles = cache.get_many(["A1SELLER", "A2SELLER"], "amazon.com")
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from config import SELLER_CACHE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sellers (
+    marketplace TEXT NOT NULL,
+    seller_id TEXT NOT NULL,
+    name TEXT,
+    rating REAL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (marketplace, seller_id)
+);
+
+CREATE TABLE IF NOT EXISTS seller_claims (
+    marketplace TEXT NOT NULL,
+    seller_id TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    claimed_at REAL NOT NULL,
+    PRIMARY KEY (marketplace, seller_id)
+);
+"""
+
+
+@dataclass
+class SellerProfile:
+    """一个卖家的缓存信息"""
+    seller_id: str
+    marketplace: str
+    name: Optional[str]
+    rating: Optional[float]
+    fetched_at: float
+
+
+class SellerCache:
+    """带有效期、持久化到 SQLite 的卖家信息缓存（线程安全，可被多个进程共享）"""
+
+    def __init__(self, path: Optional[str] = None, ttl: Optional[float] = None,
+                 claim_timeout: Optional[float] = None, poll_interval: float = 0.2):
+        """
+        打开（或创建）卖家缓存
+
+        Args:
+            path: 数据库文件路径，默认读取 SELLER_CACHE_CONFIG["path"]
+            ttl: 有效期（秒），默认读取 SELLER_CACHE_CONFIG["ttl"]
+            claim_timeout: 其他进程认领后最长等待的时间（秒），超时视为该进程已退出，
+                           默认读取 SELLER_CACHE_CONFIG["claim_timeout"]
+            poll_interval: 等待其他进程写入时的轮询间隔（秒）
+        """
+        self.path = path or SELLER_CACHE_CONFIG["path"]
+        self.ttl = SELLER_CACHE_CONFIG["ttl"] if ttl is None else ttl
+        self.claim_timeout = SELLER_CACHE_CONFIG["claim_timeout"] if claim_timeout is None else claim_timeout
+        self.poll_interval = poll_interval
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "fetches": 0}
+
+        self._lock = threading.Lock()
+        self._memory: Dict[Tuple[str, str], SellerProfile] = {}
+        self._inflight: Dict[Tuple[str, str], Future] = {}
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def _fresh(self, profile: Optional[SellerProfile], now: float) -> bool:
+        return profile is not None and now - profile.fetched_at < self.ttl
+
+    def _load(self, keys: Iterable[Tuple[str, str]], now: float) -> Dict[Tuple[str, str], SellerProfile]:
+        """从内存和数据库中读取未过期的卖家信息（调用方持有锁）"""
+        found, missing = {}, []
+        for key in keys:
+            profile = self._memory.get(key)
+            if self._fresh(profile, now):
+                found[key] = profile
+            else:
+                missing.append(key)
+        # SQLite 单条语句的参数个数有限，分批查询
+        for start in range(0, len(missing), 400):
+            chunk = missing[start:start + 400]
+            where = " OR ".join("(marketplace = ? AND seller_id = ?)" for _ in chunk)
+            params = [value for key in chunk for value in key]
+            for row in self._conn.execute(f"SELECT * FROM sellers WHERE fetched_at >= ? AND ({where})",
+                                          [now - self.ttl] + params):
+                profile = SellerProfile(row["seller_id"], row["marketplace"], row["name"], row["rating"],
+                                        row["fetched_at"])
+                key = (profile.marketplace, profile.seller_id)
+                self._memory[key] = profile
+                found[key] = profile
+        return found
+
+    def get(self, seller_id: str, marketplace: str = "") -> Optional[SellerProfile]:
+        """读取未过期的卖家信息，没有时返回 None"""
+        return self.get_many([seller_id], marketplace).get(seller_id)
+
+    def get_many(self, seller_ids: Iterable[str], marketplace: str = "") -> Dict[str, SellerProfile]:
+        """
+        批量读取未过期的卖家信息
+
+        Args:
+            seller_ids: 卖家 ID
+            marketplace: 站点域名
+
+        Returns:
+            卖家 ID -> SellerProfile（只包含缓存中存在且未过期的卖家）
+        """
+        keys = [(marketplace, seller_id) for seller_id in dict.fromkeys(seller_ids)]
+        with self._lock:
+            found = self._load(keys, time.time())
+        return {seller_id: found[(marketplace, seller_id)] for _, seller_id in keys
+                if (marketplace, seller_id) in found}
+
+    def put(self, seller_id: str, marketplace: str = "", rating: Optional[float] = None,
+            name: Optional[str] = None, fetched_at: Optional[float] = None) -> SellerProfile:
+        """写入卖家信息"""
+        profile = SellerProfile(seller_id, marketplace, name, rating,
+                                time.time() if fetched_at is None else fetched_at)
+        with self._lock:
+            self._memory[(marketplace, seller_id)] = profile
+            self._conn.execute(
+                "INSERT INTO sellers (marketplace, seller_id, name, rating, fetched_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (marketplace, seller_id) DO UPDATE SET name = COALESCE(excluded.name, name), "
+                "rating = excluded.rating, fetched_at = excluded.fetched_at",
+                (marketplace, seller_id, name, rating, profile.fetched_at))
+            self._conn.commit()
+        return profile
+
+    def _claim(self, key: Tuple[str, str], now: float) -> bool:
+        """认领一个卖家的获取任务，其他进程已认领且未超时时返回 False"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO seller_claims (marketplace, seller_id, owner, claimed_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (marketplace, seller_id) DO UPDATE SET owner = excluded.owner, "
+                "claimed_at = excluded.claimed_at WHERE seller_claims.claimed_at < ?",
+                key + (self.owner, now, now - self.claim_timeout))
+            self._conn.commit()
+            return cursor.rowcount == 1
+
+    def _release(self, key: Tuple[str, str]):
+        """删除本进程的认领记录"""
+        with self._lock:
+            self._conn.execute("DELETE FROM seller_claims WHERE marketplace = ? AND seller_id = ? AND owner = ?",
+                               key + (self.owner,))
+            self._conn.commit()
+
+    def _wait_for_other(self, key: Tuple[str, str]) -> Optional[SellerProfile]:
+        """
+        等待认领了该卖家的其他进程写入结果
+
+        Returns:
+            写入的卖家信息；认领记录已被删除却没有结果（对方获取失败）或等待超时时返回 None，
+            由调用方重新认领
+        """
+        deadline = time.time() + self.claim_timeout
+        while time.time() < deadline:
+            time.sleep(self.poll_interval)
+            with self._lock:
+                found = self._load([key], time.time())
+                if key in found:
+                    return found[key]
+                claimed = self._conn.execute(
+                    "SELECT 1 FROM seller_claims WHERE marketplace = ? AND seller_id = ?", key).fetchone()
+            if claimed is None:
+                return None
+        return None
+
+    def get_or_fetch(self, seller_id: str, marketplace: str, fetch: Callable[[], Optional[float]],
+                     name: Optional[str] = None) -> SellerProfile:
+        """
+        读取卖家信息，缓存中没有或已过期时调用 fetch 获取评分
+
+        同一个卖家同时只会有一个 fetch 在执行：本进程的其他线程等待同一个结果，
+        其他进程轮询数据库直到结果写入。fetch 抛出的异常会传给所有等待的调用方，且不会被缓存。
+
+        Args:
+            seller_id: 卖家 ID
+            marketplace: 站点域名
+            fetch: 获取卖家评分的函数，没有评分时返回 None
+            name: 卖家名称（来自商品详情页），一并写入缓存
+
+        Returns:
+            卖家信息
+        """
+        key = (marketplace, seller_id)
+        with self._lock:
+            found = self._load([key], time.time())
+            if key in found:
+                self.stats["hits"] += 1
+                return found[key]
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+                self.stats["misses"] += 1
+            else:
+                self.stats["coalesced"] += 1
+        if not owner:
+            # 本进程已有线程在获取该卖家，等待同一个结果
+            return future.result()
+
+        try:
+            profile = None
+            while profile is None:
+                if self._claim(key, time.time()):
+                    with self._lock:
+                        self.stats["fetches"] += 1
+                    try:
+                        profile = self.put(seller_id, marketplace, fetch(), name)
+                    finally:
+                        self._release(key)
+                else:
+                    # 对方获取失败（认领被删除）或超时（认领过期）后重新认领
+                    logger.debug(f"卖家 {seller_id} 正由其他进程获取，等待结果")
+                    profile = self._wait_for_other(key)
+            future.set_result(profile)
+            return profile
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def clear_expired(self) -> int:
+        """删除过期的卖家信息，返回删除的数量"""
+        with self._lock:
+            now = time.time()
+            self._memory = {key: profile for key, profile in self._memory.items() if self._fresh(profile, now)}
+            cursor = self._conn.execute("DELETE FROM sellers WHERE fetched_at < ?", (now - self.ttl,))
+            self._conn.commit()
+            return cursor.rowcount
+
+    def close(self):
+        """关闭数据库"""
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+流式导出
+
+search_products 每解析完一页就把商品写入输出端，而不是全部爬完后再一次性生成 DataFrame。
+内存占用不随爬取规模增长，爬取过程中即可看到部分结果。
+
+- JsonlSink: 追加写入 JSON Lines，每页写完立即刷盘
+- CsvSink: 追加写入 CSV，每页写完立即刷盘
+- ParquetSink: 按行组写入 Parquet（需要安装 pyarrow）
+- XlsxSink: openpyxl 只写模式的 Excel，逐行写入
+- StoreSink: 按 ASIN 增量写入本地 SQLite 商品库（见 product_store.py）
+"""
+
+import csv
+import json
+import logging
+import os
+from typing import Dict, Iterable, List, Optional
+
+from config import OUTPUT_CONFIG
+from page_parser import PRODUCT_FIELDS
+
+logger = logging.getLogger(__name__)
+
+
+class ProductSink:
+    """商品输出端基类"""
+
+    def __init__(self, path: str, fields: Optional[List[str]] = None):
+        """
+        Args:
+            path: 输出文件路径
+            fields: 输出列，默认为 PRODUCT_FIELDS，商品中多出的字段会被忽略
+        """
+        self.path = path
+        self.fields = list(fields or PRODUCT_FIELDS)
+        self.count = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, products: Iterable[Dict]):
+        """写入一批商品（通常是一页）"""
+        raise NotImplementedError
+
+    def close(self):
+        """完成写入并关闭文件"""
+        logger.info(f"成功保存 {self.count} 个商品信息到 {self.path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class JsonlSink(ProductSink):
+    """JSON Lines 输出端"""
+
+    def __init__(self, path: str, fields: Optional[List[str]] = None, append: bool = False):
+        super().__init__(path, fields)
+        self._file = open(path, "a" if append else "w", encoding=OUTPUT_CONFIG["encoding"])
+
+    def write(self, products: Iterable[Dict]):
+        for product in products:
+            self._file.write(json.dumps(product, ensure_ascii=False) + "\n")
+            self.count += 1
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+class CsvSink(ProductSink):
+    """CSV 输出端"""
+
+    def __init__(self, path: str, fields: Optional[List[str]] = None, append: bool = False):
+        super().__init__(path, fields)
+        write_header = not (append and os.path.exists(path) and os.path.getsize(path) > 0)
+        self._file = open(path, "a" if append else "w", encoding=OUTPUT_CONFIG["encoding"], newline="")
+        self._writer = csv.DictWriter(self._file, fieldnames=self.fields, extrasaction="ignore", restval="N/A")
+        if write_header:
+            self._writer.writeheader()
+
+    def write(self, products: Iterable[Dict]):
+        for product in products:
+            self._writer.writerow(product)
+            self.count += 1
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+class ParquetSink(ProductSink):
+    """Parquet 输出端，攒够 row_group_size 行写一个行组"""
+
+    def __init__(self, path: str, fields: Optional[List[str]] = None, row_group_size: int = 10000):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet 输出需要安装 pyarrow: pip install pyarrow")
+
+        super().__init__(path, fields)
+        self._pa = pa
+        self.row_group_size = row_group_size
+        self._schema = pa.schema([(field, pa.string()) for field in self.fields])
+        self._writer = pq.ParquetWriter(path, self._schema)
+        self._buffer: Dict[str, List] = {field: [] for field in self.fields}
+        self._buffered = 0
+
+    def write(self, products: Iterable[Dict]):
+        for product in products:
+            for field in self.fields:
+                value = product.get(field, "N/A")
+                self._buffer[field].append(None if value is None else str(value))
+            self._buffered += 1
+            self.count += 1
+            if self._buffered >= self.row_group_size:
+                self._flush()
+
+    def _flush(self):
+        """把缓冲区写成一个行组"""
+        if not self._buffered:
+            return
+        table = self._pa.table(self._buffer, schema=self._schema)
+        self._writer.write_table(table, row_group_size=self._buffered)
+        self._buffer = {field: [] for field in self.fields}
+        self._buffered = 0
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+        super().close()
+
+
+class XlsxSink(ProductSink):
+    """openpyxl 只写模式的 Excel 输出端，行数据直接写入临时文件而不常驻内存"""
+
+    def __init__(self, path: str, fields: Optional[List[str]] = None, sheet_name: str = "Sheet1"):
+        from openpyxl import Workbook
+
+        super().__init__(path, fields)
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet(sheet_name)
+        self._sheet.append(self.fields)
+
+    def write(self, products: Iterable[Dict]):
+        for product in products:
+            self._sheet.append([product.get(field, "N/A") for field in self.fields])
+            self.count += 1
+
+    def close(self):
+        self._workbook.save(self.path)
+        super().close()
+
+
+class StoreSink(ProductSink):
+    """本地商品库输出端，每页商品按 ASIN 增量写入，只有变化的字段才会写盘"""
+
+    def __init__(self, path: str, fields: Optional[List[str]] = None, keyword: Optional[str] = None):
+        from product_store import ProductStore
+
+        super().__init__(path, fields)
+        self.keyword = keyword
+        self._store = ProductStore(path)
+
+    def write(self, products: Iterable[Dict]):
+        products = list(products)
+        self._store.upsert(products, keyword=self.keyword)
+        self.count += len(products)
+
+    def close(self):
+        self._store.close()
+        super().close()
+
+
+SINK_TYPES = {
+    ".jsonl": JsonlSink,
+    ".csv": CsvSink,
+    ".parquet": ParquetSink,
+    ".xlsx": XlsxSink,
+    ".db": StoreSink,
+    ".sqlite": StoreSink,
+}
+
+
+def create_sink(path: str, fields: Optional[List[str]] = None, **kwargs) -> ProductSink:
+    """
+    根据文件扩展名创建输出端
+
+    Args:
+        path: 输出文件路径（.jsonl / .csv / .parquet / .xlsx / .db）
+        fields: 输出列
+
+    Returns:
+        输出端实例
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in SINK_TYPES:
+        raise ValueError(f"不支持的输出格式: {extension}，可选值: {tuple(SINK_TYPES)}")
+    return SINK_TYPES[extension](path, fields, **kwargs)
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+异步爬取引擎测试脚本（使用本地 HTTP 服务，无需网络）
+"""
+
+import time
+
+from async_engine import AsyncCrawlEngine
+from fetcher import HttpFetcher
+from marketplace import Marketplace
+from test_fetcher import start_server
+
+
+def test_crawl_many_keywords_concurrently():
+    """多个关键词、多页并发爬取，结果全部返回且遵守主机请求间隔"""
+    server, base_url = start_server()
+    fetcher = HttpFetcher(user_agent="test-agent", max_retries=0)
+    engine = AsyncCrawlEngine(
+        fetcher=fetcher,
+        concurrency=8,
+        per_host_concurrency=4,
+        per_host_min_interval=0.05,
+        url_builder=lambda keyword, page: f"{base_url}/s?k={keyword}&page={page}",
+    )
+    try:
+        start = time.perf_counter()
+        results = engine.run(["laptop", "mouse", "keyboard"], pages=3)
+        elapsed = time.perf_counter() - start
+    finally:
+        engine.close()
+        fetcher.close()
+        server.shutdown()
+
+    assert sorted((r.keyword, r.page) for r in results) == sorted(
+        (keyword, page) for keyword in ("laptop", "mouse", "keyboard") for page in (1, 2, 3))
+    assert all(len(r.products) == 48 and r.error is None for r in results)
+    # 9 个请求，同一主机间隔 0.05 秒
+    assert elapsed >= 8 * 0.05
+
+
+def test_stops_after_last_page():
+    """遇到没有下一页的页面后不再爬取该关键词的后续页"""
+    server, base_url = start_server()
+    fetcher = HttpFetcher(user_agent="test-agent", max_retries=0)
+    engine = AsyncCrawlEngine(
+        fetcher=fetcher,
+        concurrency=1,
+        per_host_min_interval=0,
+        url_builder=lambda keyword, page: f"{base_url}/captcha" if page == 2 else f"{base_url}/s?page={page}",
+    )
+    try:
+        results = engine.run(["laptop"], pages=4)
+    finally:
+        engine.close()
+        fetcher.close()
+        server.shutdown()
+
+    assert [(r.page, r.error) for r in results] == [(1, None), (2, "blocked")]
+
+
+class TrackingFetcher(HttpFetcher):
+    """记录是否被关闭的获取后端"""
+
+    closed = False
+
+    def close(self):
+        self.closed = True
+        super().close()
+
+
+def test_close_only_owned_fetchers():
+    """引擎不关闭调用方传入的获取后端；只爬指定站点时不创建默认的获取后端"""
+    server, base_url = start_server()
+    supplied = TrackingFetcher(user_agent="test-agent", max_retries=0)
+    engine = AsyncCrawlEngine(fetcher=supplied, per_host_min_interval=0,
+                              url_builder=lambda keyword, page: f"{base_url}/s?k={keyword}&page={page}")
+    try:
+        engine.run(["laptop"], pages=1)
+        engine.close()
+        assert not supplied.closed
+        assert supplied.fetch(f"{base_url}/s?k=laptop").html
+    finally:
+        supplied.close()
+
+    marketplace = Marketplace("local", "127.0.0.1", "USD", "$", "en-US", base_url=base_url)
+    engine = AsyncCrawlEngine(per_host_min_interval=0)
+    try:
+        results = engine.run(["laptop"], pages=1, marketplaces=[marketplace])
+        assert results[0].count == 48
+        assert engine._fetcher is None
+    finally:
+        engine.close()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    test_crawl_many_keywords_concurrently()
+    test_stops_after_last_page()
+    test_close_only_owned_fetchers()
+    print("✅ 异步爬取引擎测试通过")
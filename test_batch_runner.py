@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+批量爬取测试脚本（回放缓存页面，无需网络）
+"""
+
+import json
+
+import batch_runner
+from amazon_crawler import AmazonCrawler, build_search_url
+from batch_runner import KEYWORD_FIELD, merge_shards, read_keywords
+from page_cache import PageCache
+from test_page_parser import load_fixture
+
+
+def test_read_keywords(tmp_path):
+    """忽略空行和注释，去重并保持顺序"""
+    txt = tmp_path / "keywords.txt"
+    txt.write_text("laptop\n\n# 注释\n  mouse  \nlaptop\nkeyboard\n", encoding="utf-8")
+    assert read_keywords(str(txt)) == ["laptop", "mouse", "keyboard"]
+
+    jsonl = tmp_path / "keywords.jsonl"
+    jsonl.write_text('{"keyword": "laptop"}\nnot json\n{"other": 1}\n["list"]\n'
+                     '{"keyword": " mouse "}\n{"keyword": "laptop"}\n', encoding="utf-8")
+    assert read_keywords(str(jsonl)) == ["laptop", "mouse"]
+
+
+def test_merge_shards_dedup_and_order(tmp_path):
+    """按 ASIN（没有 ASIN 时按链接）去重并合并关键词，ASIN 和链接都缺失的商品全部保留"""
+    def write_shard(name, records):
+        with open(tmp_path / name, "w", encoding="utf-8") as f:
+            for asin, link, keyword in records:
+                f.write(json.dumps({"ASIN": asin, "商品链接": link, KEYWORD_FIELD: keyword},
+                                   ensure_ascii=False) + "\n")
+
+    write_shard("shard-1.jsonl", [("A1", "/dp/A1", "laptop"), ("N/A", "N/A", "laptop"),
+                                  ("N/A", "/item/x", "laptop"), ("A2", "/dp/A2", "laptop")])
+    write_shard("shard-2.jsonl", [("A2", "/dp/A2", "mouse"), ("N/A", "N/A", "mouse"),
+                                  ("N/A", "/item/x", "mouse"), ("A1", "/dp/A1", "laptop"), ("A3", "/dp/A3", "mouse")])
+
+    output = tmp_path / "merged.jsonl"
+    products = merge_shards(str(tmp_path), str(output))
+    assert [(p["ASIN"], p["商品链接"], p[KEYWORD_FIELD]) for p in products] == [
+        ("A1", "/dp/A1", "laptop"),
+        ("N/A", "N/A", "laptop"),
+        ("N/A", "/item/x", "laptop,mouse"),
+        ("A2", "/dp/A2", "laptop,mouse"),
+        ("N/A", "N/A", "mouse"),
+        ("A3", "/dp/A3", "mouse"),
+    ]
+    with open(output, encoding="utf-8") as f:
+        assert len(f.readlines()) == len(products)
+
+
+def test_crawl_keyword_streams_to_shard(tmp_path, monkeypatch):
+    """工作进程逐页写入分片文件，每条记录带上关键词"""
+    cache = PageCache(str(tmp_path / "cache"))
+    cache.put(build_search_url("laptop", 1), load_fixture())
+    crawler = AmazonCrawler(cache=cache, cache_mode="replay")
+    shard = tmp_path / "shard-1.jsonl"
+    monkeypatch.setattr(batch_runner, "_worker_crawler", crawler)
+    monkeypatch.setattr(batch_runner, "_worker_shard_path", str(shard))
+    try:
+        result = batch_runner._crawl_keyword("laptop", 1, {"min_reviews": 10})
+    finally:
+        crawler.close()
+        cache.close()
+
+    with open(shard, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert result["count"] == len(records) > 0
+    assert all(record[KEYWORD_FIELD] == "laptop" for record in records)
+    assert result["metrics"]["phases"]["sink_write"]["count"] == 1
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    import pytest
+    for test in (test_read_keywords, test_merge_shards_dedup_and_order):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(pathlib.Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp, pytest.MonkeyPatch.context() as patch:
+        test_crawl_keyword_streams_to_shard(pathlib.Path(tmp), patch)
+    print("✅ 批量爬取测试通过")
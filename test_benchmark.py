@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+离线基准测试脚本的测试（使用很小的规模，只检查结果结构和回退判断）
+"""
+
+from benchmark import compare, run_benchmarks, synthesize_products
+from page_parser import parse_search_page
+from test_page_parser import load_fixture
+
+
+def test_synthesize_products_is_reproducible():
+    """合成商品的 ASIN 唯一，相同种子结果相同"""
+    templates = parse_search_page(load_fixture())
+    products = synthesize_products(500, templates)
+    assert len({product["ASIN"] for product in products}) == 500
+    assert products == synthesize_products(500, templates)
+    assert products[0]["价格"].startswith("S$") or products[0]["价格"] == "N/A"
+
+
+def test_run_benchmarks_and_compare():
+    """运行全部基准并与基线比较"""
+    current = run_benchmarks(sizes=[300], repeat=1, pages=1, engines=("lxml",))
+    assert sorted(current["results"]) == ["export.xlsx@300", "filter.batch@300", "filter.list@300",
+                                          "filter.stream@300", "parse.lxml"]
+    assert current["results"]["parse.lxml"]["rows"] == 48
+    assert all(result["rows_per_sec"] > 0 for result in current["results"].values())
+    assert compare(current, current) == []
+
+    faster = {"results": {name: dict(result, rows_per_sec=result["rows_per_sec"] * 2)
+                          for name, result in current["results"].items()}}
+    regressions = compare(current, faster, throughput_tolerance=0.2)
+    assert len(regressions) == len(current["results"])
+
+    leaner = {"results": {"filter.list@300": dict(current["results"]["filter.list@300"], peak_mb=0.0)}}
+    current["results"]["filter.list@300"]["peak_mb"] = 10.0
+    assert compare(current, leaner) == ["filter.list@300: 内存峰值 10.0MB，基线 0.0MB"]
+
+
+if __name__ == "__main__":
+    test_synthesize_products_is_reproducible()
+    test_run_benchmarks_and_compare()
+    print("✅ 基准测试脚本测试通过")
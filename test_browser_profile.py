@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+浏览器资源屏蔽配置测试脚本（无需 Chrome）
+"""
+
+import fnmatch
+
+import requests
+
+from browser_profile import PROFILES, apply_profile, get_profile, start_fixture_server
+from config import BROWSER_CONFIG
+from test_fetcher import FIXTURE_PATH
+
+
+class CdpRecorder:
+    """记录 CDP 命令和页面加载超时的假驱动"""
+
+    def __init__(self):
+        self.commands = []
+        self.page_load_timeout = None
+
+    def set_page_load_timeout(self, timeout):
+        self.page_load_timeout = timeout
+
+    def execute_cdp_cmd(self, cmd, params):
+        self.commands.append((cmd, params))
+        return {}
+
+
+def test_apply_profile_blocks_resources():
+    """lean 配置屏蔽图片和广告，保留页面本身和脚本，并设置页面加载超时"""
+    driver = CdpRecorder()
+    profile = apply_profile(driver, "lean")
+    assert driver.page_load_timeout == BROWSER_CONFIG["timeout"]
+    assert driver.commands[-1] == ("Network.setBlockedURLs", {"urls": list(profile.blocked_urls)})
+
+    def blocked(url):
+        return any(fnmatch.fnmatch(url, pattern) for pattern in profile.blocked_urls)
+
+    assert blocked("https://m.media-amazon.com/images/I/71m6abc._AC_UY218_.jpg")
+    assert blocked("https://aax-fe.amazon.sg/e/xsp/getAd?placementId=1")
+    assert not blocked("https://www.amazon.sg/s?k=laptop")
+    assert not blocked("https://m.media-amazon.com/images/I/61abc.js")
+    assert get_profile("full").blocked_urls == ()
+    assert set(PROFILES["lean"].blocked_urls) < set(PROFILES["minimal"].blocked_urls)
+
+
+def test_fixture_server_rewrites_external_assets():
+    """测量用的本地服务把外部资源改写到本地，不产生外网请求"""
+    server, base_url = start_fixture_server(FIXTURE_PATH)
+    try:
+        html = requests.get(f"{base_url}/s?k=laptop", timeout=10).text
+        assert "https://m.media-amazon.com/" not in html
+        assert f"{base_url}/_ext/m.media-amazon.com/" in html
+        asset = requests.get(f"{base_url}/_ext/m.media-amazon.com/images/I/a.jpg", timeout=10)
+        assert len(asset.content) > 0
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    test_apply_profile_blocks_resources()
+    test_fixture_server_rewrites_external_assets()
+    print("✅ 浏览器资源屏蔽配置测试通过")
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+爬取检查点测试脚本
+"""
+
+import os
+
+from checkpoint import CrawlCheckpoint
+
+
+def test_resume_from_journal(tmp_path):
+    """重新打开检查点后能恢复已完成的页面，并忽略写了一半的最后一行"""
+    path = str(tmp_path / "checkpoint.jsonl")
+    with CrawlCheckpoint(path, fsync=False) as checkpoint:
+        checkpoint.record_page("laptop", 1, [{"ASIN": "A"}], True)
+        checkpoint.record_page("laptop", 2, [{"ASIN": "B"}], False)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"keyword": "laptop", "page": 3, "produ')
+
+    with CrawlCheckpoint(path) as restored:
+        pages = restored.completed_pages("laptop")
+
+    assert sorted(pages) == [1, 2]
+    assert pages[2].products == [{"ASIN": "B"}]
+
+
+def test_finish_and_compact(tmp_path):
+    """完成的关键词被清除，重新加载时日志压缩为有效记录，全部完成后文件被截断"""
+    path = str(tmp_path / "checkpoint.jsonl")
+    with CrawlCheckpoint(path, fsync=False) as checkpoint:
+        checkpoint.record_page("laptop", 1, [{"ASIN": "A"}], True)
+        checkpoint.record_page("laptop", 1, [{"ASIN": "A2"}], True)
+        checkpoint.record_page("mouse", 1, [{"ASIN": "M"}], False)
+        checkpoint.finish("mouse")
+        assert checkpoint.completed_pages("mouse") == {}
+    with open(path, encoding="utf-8") as f:
+        assert len(f.readlines()) == 4
+
+    with CrawlCheckpoint(path, fsync=False) as restored:
+        assert restored.completed_pages("mouse") == {}
+        assert restored.completed_pages("laptop")[1].products == [{"ASIN": "A2"}]
+        with open(path, encoding="utf-8") as f:
+            assert len(f.readlines()) == 1
+        restored.finish("laptop")
+    assert os.path.getsize(path) == 0
+
+
+def test_crawler_resumes_from_frontier(tmp_path):
+    """爬虫跳过检查点中已完成的页面，只获取剩余页面；中断时保留检查点，爬完后清除"""
+    from amazon_crawler import AmazonCrawler, build_search_url
+    from page_cache import PageCache
+    from test_page_parser import load_fixture
+
+    path = str(tmp_path / "checkpoint.jsonl")
+    with CrawlCheckpoint(path, fsync=False) as checkpoint:
+        checkpoint.record_page("laptop", 1, [{"ASIN": "FROM-CHECKPOINT"}], True)
+
+    # 第 2 页只存在于回放缓存中，第 1 页如果被重新获取会因缓存未命中而失败
+    cache = PageCache(str(tmp_path / "cache"))
+    cache.put(build_search_url("laptop", 2), load_fixture())
+
+    # 第 3 页缓存未命中，爬取中断，已完成的页面留在检查点中
+    checkpoint = CrawlCheckpoint(path, fsync=False)
+    crawler = AmazonCrawler(cache=cache, cache_mode="replay", checkpoint=checkpoint)
+    try:
+        products = crawler.search_products("laptop", max_pages=3)
+    finally:
+        crawler.close()
+        checkpoint.close()
+    assert len(products) == 49
+    assert products[0]["ASIN"] == "FROM-CHECKPOINT"
+    with CrawlCheckpoint(path) as checkpoint:
+        assert sorted(checkpoint.completed_pages("laptop")) == [1, 2]
+
+    checkpoint = CrawlCheckpoint(path, fsync=False)
+    crawler = AmazonCrawler(cache=cache, cache_mode="replay", checkpoint=checkpoint)
+    try:
+        products = crawler.search_products("laptop", max_pages=2)
+    finally:
+        crawler.close()
+        checkpoint.close()
+        cache.close()
+    assert len(products) == 49
+    with CrawlCheckpoint(path) as checkpoint:
+        assert checkpoint.completed_pages("laptop") == {}
+    assert os.path.getsize(path) == 0
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    for test in (test_resume_from_journal, test_finish_and_compact, test_crawler_resumes_from_frontier):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(pathlib.Path(tmp))
+    print("✅ 爬取检查点测试通过")
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+ASIN 去重测试脚本
+"""
+
+from dedup import BloomDeduper, ExactDeduper, bloom_size
+from page_parser import SearchPageParser
+from test_page_parser import load_fixture
+
+
+def test_exact_deduper():
+    """精确去重：重复返回 False，没有 ASIN 的商品始终视为新商品，已知集合中的 ASIN 视为已出现"""
+    deduper = ExactDeduper(known={"OLD"})
+    assert deduper.add("A")
+    assert not deduper.add("A")
+    assert not deduper.add("OLD")
+    assert deduper.add("N/A") and deduper.add("N/A")
+    assert deduper.add(None)
+    assert "A" in deduper and "B" not in deduper
+    assert len(deduper) == 1
+
+
+def test_bloom_deduper_persists(tmp_path):
+    """布隆过滤器关闭后重新打开仍能识别已加入的 ASIN，只读打开时新加入的 ASIN 不写回文件"""
+    path = str(tmp_path / "seen.bloom")
+    asins = [f"B{i:09d}" for i in range(5000)]
+    with BloomDeduper(path, capacity=10000, error_rate=0.01) as seen:
+        assert all(seen.add(asin) for asin in asins)
+        assert not seen.add(asins[0])
+
+    readonly = BloomDeduper(path, readonly=True)
+    assert len(readonly) == 5000
+    assert all(asin in readonly for asin in asins)
+    false_positives = sum(f"X{i:09d}" in readonly for i in range(10000))
+    assert false_positives < 300
+    readonly.add("NEW-ASIN")
+    readonly.close()
+
+    with BloomDeduper(path) as seen:
+        assert len(seen) == 5000
+        assert "NEW-ASIN" not in seen
+    assert bloom_size(10000, 0.01) == (seen.num_bits, seen.num_hashes)
+
+
+def test_parser_skips_seen_cards():
+    """已出现的卡片不提取字段"""
+    html = load_fixture()
+    parser = SearchPageParser()
+    asins = [product["ASIN"] for product in parser.parse(html)]
+    products = parser.parse(html, skip_asins=set(asins[:10]))
+    assert [product["ASIN"] for product in products] == asins[10:]
+
+
+def test_crawler_dedups_across_pages(tmp_path):
+    """重复页面中的商品只保留一次"""
+    from amazon_crawler import AmazonCrawler, build_search_url
+    from page_cache import PageCache
+
+    cache = PageCache(str(tmp_path / "cache"))
+    for page in (1, 2, 3):
+        cache.put(build_search_url("laptop", page), load_fixture())
+    crawler = AmazonCrawler(cache=cache, cache_mode="replay", deduper=ExactDeduper())
+    try:
+        pages = list(crawler.iter_pages("laptop", max_pages=3))
+    finally:
+        crawler.close()
+        cache.close()
+
+    assert [len(page) for page in pages] == [48, 0, 0]
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    test_exact_deduper()
+    test_parser_skips_seen_cards()
+    for test in (test_bloom_deduper_persists, test_crawler_dedups_across_pages):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(pathlib.Path(tmp))
+    print("✅ 去重测试通过")
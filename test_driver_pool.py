@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+浏览器池测试脚本（使用假的 create_driver，无需启动 Chrome）
+"""
+
+import threading
+import time
+
+import pytest
+
+import driver_pool
+from driver_pool import DriverPool
+
+
+class FakeDriver:
+    """记录是否已关闭的假浏览器"""
+
+    def __init__(self):
+        self.quit_called = False
+
+    def quit(self):
+        self.quit_called = True
+
+
+class FakeUserAgent:
+    random = "test-agent"
+
+
+def make_pool(monkeypatch, fail_first: bool = False, delay: float = 0.0, **kwargs):
+    """创建使用假驱动的浏览器池，返回 (池, 已创建的驱动列表)"""
+    created = []
+    lock = threading.Lock()
+    failures = [fail_first]
+
+    def fake_create_driver(headless, user_agent, profile_dir=None, resource_profile=None):
+        time.sleep(delay)
+        with lock:
+            if failures[0]:
+                failures[0] = False
+                raise RuntimeError("chrome failed to start")
+            driver = FakeDriver()
+            created.append(driver)
+            return driver
+
+    monkeypatch.setattr(driver_pool, "create_driver", fake_create_driver)
+    kwargs.setdefault("prewarm", False)
+    return DriverPool(user_agent=FakeUserAgent(), **kwargs), created
+
+
+def test_size_cap_under_threads(monkeypatch):
+    """并发借用时启动的浏览器数量不超过 size"""
+    pool, created = make_pool(monkeypatch, delay=0.05, size=2)
+    leased = []
+    lock = threading.Lock()
+
+    def worker():
+        with pool.lease(timeout=5) as pooled:
+            with lock:
+                leased.append(pooled)
+            time.sleep(0.02)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(leased) == 8
+    assert len(created) == 2 and len(pool._all) == 2 and pool._pending == 0
+    pool.close()
+
+
+def test_spawn_failure_returns_slot(monkeypatch):
+    """浏览器启动失败时归还预留的名额"""
+    pool, created = make_pool(monkeypatch, fail_first=True, size=1)
+    with pytest.raises(RuntimeError):
+        pool.acquire()
+    assert pool._pending == 0
+    pooled = pool.acquire(timeout=1)
+    assert pooled.driver is created[0]
+    pool.release(pooled)
+    pool.close()
+
+
+def test_recycle_and_broken_release(monkeypatch):
+    """超过页数上限或浏览器已损坏时关闭并重建"""
+    pool, created = make_pool(monkeypatch, size=1, max_pages_per_driver=2)
+    pooled = pool.acquire()
+    pooled.pages_served = 1
+    pool.release(pooled)
+    assert pool.acquire() is pooled and not created[0].quit_called
+
+    pooled.pages_served = 2
+    pool.release(pooled)
+    assert created[0].quit_called and len(created) == 2
+    recycled = pool.acquire()
+    assert recycled.driver is created[1] and recycled.pages_served == 0
+
+    pool.release(recycled, broken=True)
+    assert created[1].quit_called and len(created) == 3 and len(pool._all) == 1
+    pool.close()
+
+
+def test_close(monkeypatch):
+    """关闭时退出所有浏览器，之后不能再借用，归还的浏览器直接关闭"""
+    pool, created = make_pool(monkeypatch, size=2, prewarm=True)
+    pooled = pool.acquire()
+    pool.close()
+    assert len(created) == 2 and all(driver.quit_called for driver in created)
+    with pytest.raises(RuntimeError):
+        pool.acquire()
+    pool.release(pooled)
+    assert pool._all == []
+
+
+def test_timeout_and_close_wake_waiters(monkeypatch):
+    """没有空闲实例时超时抛出 TimeoutError，关闭池时唤醒阻塞在 acquire 中的线程"""
+    pool, _ = make_pool(monkeypatch, size=1)
+    pooled = pool.acquire()
+    with pytest.raises(TimeoutError):
+        pool.acquire(timeout=0.05)
+
+    errors = []
+
+    def waiter():
+        try:
+            pool.acquire()
+        except RuntimeError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=waiter) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    pool.close()
+    for thread in threads:
+        thread.join(timeout=2)
+    assert not any(thread.is_alive() for thread in threads)
+    assert len(errors) == 2
+    pool.release(pooled)
+
+
+def test_waiter_spawns_after_failed_rebuild(monkeypatch):
+    """归还时重建浏览器失败，等待中的线程被唤醒后自行启动新实例"""
+    pool, _ = make_pool(monkeypatch, size=1)
+    pooled = pool.acquire()
+    result = []
+    thread = threading.Thread(target=lambda: result.append(pool.acquire(timeout=5)))
+    thread.start()
+    time.sleep(0.05)
+
+    fake_create_driver = driver_pool.create_driver
+
+    def failing_create_driver(*args, **kwargs):
+        # 只失败一次，等待的线程再启动时成功
+        monkeypatch.setattr(driver_pool, "create_driver", fake_create_driver)
+        raise RuntimeError("chrome failed to start")
+
+    monkeypatch.setattr(driver_pool, "create_driver", failing_create_driver)
+    pool.release(pooled, broken=True)
+    thread.join(timeout=2)
+    assert result and result[0].driver is not pooled.driver
+    pool.close()
+
+
+if __name__ == "__main__":
+    for test in (test_size_cap_under_threads, test_spawn_failure_returns_slot,
+                 test_recycle_and_broken_release, test_close, test_timeout_and_close_wake_waiters,
+                 test_waiter_spawns_after_failed_rebuild):
+        with pytest.MonkeyPatch.context() as patch:
+            test(patch)
+    print("✅ 浏览器池测试通过")
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+商品详情补全测试脚本（使用内存中的假页面，无需网络）
+"""
+
+import math
+import threading
+
+from enrichment import DetailEnricher, parse_detail_page, parse_seller_page
+from fetcher import BaseFetcher, FetchResult
+from rate_limiter import AdaptiveRateLimiter
+
+SELLER_DETAIL_HTML = """
+<html><body>
+<div id="availability"><span> In Stock </span></div>
+<div id="mir-layout-DELIVERY_BLOCK-slot-PRIMARY_DELIVERY_MESSAGE_LARGE">FREE delivery <b>Tuesday, 3 June</b></div>
+<div id="merchantInfoFeature_feature_div">
+  <a id="sellerProfileTriggerId" href="/gp/help/seller/at-a-glance.html?ie=UTF8&amp;seller=A1SELLER">TechStore</a>
+</div>
+</body></html>
+"""
+
+AMAZON_DETAIL_HTML = """
+<html><body>
+<div id="availability"><span>Only 2 left in stock.</span></div>
+<div id="merchant-info">Ships from and sold by Amazon.com.</div>
+</body></html>
+"""
+
+SELLER_HTML = """
+<html><body><span id="effective-timeperiod-rating-year-description">4.6 out of 5 stars</span></body></html>
+"""
+
+
+class FakeFetcher(BaseFetcher):
+    """按 URL 返回假页面并记录请求"""
+
+    backend = "fake"
+
+    def __init__(self):
+        self.urls = []
+        self._lock = threading.Lock()
+
+    def fetch(self, url: str) -> FetchResult:
+        with self._lock:
+            self.urls.append(url)
+        if "/sp?" in url:
+            html = SELLER_HTML
+        elif url.endswith("/dp/AMAZON1"):
+            html = AMAZON_DETAIL_HTML
+        else:
+            html = SELLER_DETAIL_HTML
+        return FetchResult(url, html, 200, self.backend)
+
+
+def make_enricher(fetcher, **kwargs) -> DetailEnricher:
+    config = {"extract_store_name": True, "extract_store_rating": True,
+              "extract_availability": True, "extract_shipping": True}
+    limiter = AdaptiveRateLimiter(initial_rate=math.inf, max_rate=math.inf)
+    return DetailEnricher(fetcher, max_workers=4, rate_limiter=limiter, config=config, **kwargs)
+
+
+def test_parse_detail_and_seller_pages():
+    """解析卖家、库存、配送和卖家评分"""
+    detail = parse_detail_page(SELLER_DETAIL_HTML)
+    assert detail == {"seller": "TechStore", "seller_id": "A1SELLER", "availability": "In Stock",
+                      "shipping": "FREE delivery Tuesday, 3 June"}
+    assert parse_detail_page(AMAZON_DETAIL_HTML)["seller"] == "Amazon"
+    assert parse_seller_page(SELLER_HTML) == 4.6
+    assert parse_seller_page("<span id='seller-info-feedback-summary'>95% positive in the last 12 months</span>") == 4.75
+
+
+def test_enrich_only_cheap_matches():
+    """只有通过搜索结果页筛选的商品才获取详情页，店铺评分条件在补全之后判断，输出保持输入顺序"""
+    products = [
+        {"ASIN": "SELLER1", "价格": "$20.00", "商品链接": "https://www.amazon.sg/dp/SELLER1"},
+        {"ASIN": "EXPENSIVE", "价格": "$900.00", "商品链接": "https://www.amazon.com/dp/EXPENSIVE"},
+        {"ASIN": "AMAZON1", "价格": "$30.00", "商品链接": "https://www.amazon.com/dp/AMAZON1"},
+    ]
+    fetcher = FakeFetcher()
+    enricher = make_enricher(fetcher)
+    try:
+        kept = list(enricher.enrich(products, {"max_price": 100, "min_store_rating": 4.5}))
+        fetched = list(fetcher.urls)
+        strict = list(enricher.enrich(products, {"min_store_rating": 4.8}))
+    finally:
+        enricher.close()
+
+    assert [p["ASIN"] for p in kept] == ["SELLER1", "AMAZON1"]
+    assert kept[0]["店铺名称"] == "TechStore" and kept[0]["店铺评分"] == "4.6"
+    assert kept[0]["库存状态"] == "In Stock"
+    assert kept[1]["店铺名称"] == "Amazon" and "店铺评分" not in kept[1]
+    # 自营商品没有店铺评分，不会被店铺评分条件过滤
+    assert [p["ASIN"] for p in strict] == ["AMAZON1"]
+    assert not any("EXPENSIVE" in url for url in fetched)
+    assert "https://www.amazon.sg/dp/SELLER1" in fetched
+
+
+def test_crawler_enriches_in_background(tmp_path):
+    """search_products 在后台补全商品详情"""
+    from amazon_crawler import AmazonCrawler, build_search_url
+    from page_cache import PageCache
+    from test_page_parser import load_fixture
+
+    cache = PageCache(str(tmp_path / "cache"))
+    cache.put(build_search_url("laptop"), load_fixture())
+    enricher = make_enricher(FakeFetcher())
+    crawler = AmazonCrawler(cache=cache, cache_mode="replay", enricher=enricher)
+    try:
+        products = crawler.search_products("laptop", max_pages=1, filters={"min_store_rating": 4.5})
+    finally:
+        crawler.close()
+        enricher.close()
+        cache.close()
+
+    assert len(products) == 48
+    assert all(p["店铺名称"] == "TechStore" and p["店铺评分"] == "4.6" for p in products)
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    test_parse_detail_and_seller_pages()
+    test_enrich_only_cheap_matches()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_crawler_enriches_in_background(pathlib.Path(tmp))
+    print("✅ 详情补全测试通过")
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+浏览器页面脚本提取测试脚本（使用假的浏览器驱动，无需 Chrome 和网络）
+"""
+
+from amazon_crawler import CARD_ASINS_JS, EXTRACT_PRODUCTS_JS, AmazonCrawler
+from dedup import ExactDeduper
+from page_cache import PageCache
+from page_parser import PRODUCT_FIELDS
+
+
+class FakeScriptDriver:
+    """只实现 execute_script 的假浏览器，按脚本返回预设的原始卡片字段"""
+
+    def __init__(self, items):
+        self.items = items
+        self.calls = []
+
+    def execute_script(self, script, *args):
+        self.calls.append((script, args))
+        if script == CARD_ASINS_JS:
+            return [item.get("asin") for item in self.items]
+        skip = set(args[0])
+        return [item for item in self.items if item.get("asin") not in skip]
+
+    def quit(self):
+        pass
+
+
+def test_parse_products_script(tmp_path):
+    """execute_script 返回的原始卡片字段映射为商品字典，缺失字段填充为 N/A，已出现的卡片不提取"""
+    driver = FakeScriptDriver([
+        {"name": " Laptop 14 ", "url": "/dp/A1", "price": " S$1,299.00 ", "rating": "4.5 out of 5 stars",
+         "reviews": "1,234", "asin": "A1", "image": "https://img/a1.jpg", "promotion": " S$1,499.00 ",
+         "delivery": " FREE delivery Tue "},
+        {"asin": "A2", "name": "Bare card", "price": None, "rating": None, "delivery": None},
+        {"asin": "A3", "name": "Unknown field", "badge": "Best Seller"},
+        {"asin": "SEEN", "name": "Already crawled"},
+    ])
+    cache = PageCache(str(tmp_path / "cache"))
+    crawler = AmazonCrawler(cache=cache, cache_mode="replay", marketplace="sg", deduper=ExactDeduper(["SEEN"]))
+    crawler.driver = driver
+    try:
+        products = crawler._parse_products_script()
+    finally:
+        crawler.close()
+        cache.close()
+
+    script, (skip, delivery_words) = driver.calls[-1]
+    assert script == EXTRACT_PRODUCTS_JS
+    assert skip == ["SEEN"] and "delivery" in delivery_words
+
+    assert [list(product) for product in products] == [PRODUCT_FIELDS, PRODUCT_FIELDS]
+    first, bare = products
+    assert first == {
+        "商品名称": "Laptop 14",
+        "商品链接": "https://www.amazon.sg/dp/A1",
+        "价格": "S$1,299.00",
+        "评分": "4.5",
+        "评论数": "1234",
+        "ASIN": "A1",
+        "图片URL": "https://img/a1.jpg",
+        "促销信息": "S$1,499.00",
+        "配送信息": "FREE delivery Tue",
+        "店铺名称": "Amazon",
+        "店铺评分": "N/A",
+    }
+    assert bare["ASIN"] == "A2" and bare["商品名称"] == "Bare card"
+    assert all(bare[field] == "N/A" for field in ("商品链接", "价格", "评分", "评论数", "图片URL", "促销信息", "配送信息"))
+    # 无法映射的卡片只跳过该卡片并计数
+    assert crawler.metrics.summary()["errors"]["parse.card"] == {"TypeError": 1}
+
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        test_parse_products_script(pathlib.Path(tmp))
+    print("✅ 浏览器页面脚本提取测试通过")
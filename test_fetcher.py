@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+页面获取后端测试脚本（使用本地 HTTP 服务模拟亚马逊搜索页，无需网络）
+"""
+
+import gzip
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from fetcher import BaseFetcher, FallbackFetcher, FetchResult, HttpFetcher, SeleniumFetcher, is_blocked_page
+from page_parser import SearchPageParser
+
+FIXTURE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "docs", "Amazon.sg _ laptop.html")
+
+CAPTCHA_HTML = """<html><head><title>Robot Check</title></head><body>
+<form action="/errors/validateCaptcha"><p>Enter the characters you see below</p></form>
+</body></html>"""
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """/s 返回保存的搜索结果页，/captcha 返回验证码页面"""
+
+    protocol_version = "HTTP/1.1"
+    fixture = b""
+    connections = set()
+
+    def do_GET(self):
+        FixtureHandler.connections.add(self.client_address)
+        if self.path.startswith("/captcha"):
+            body, status = CAPTCHA_HTML.encode("utf-8"), 200
+        else:
+            body, status = self.fixture, 200
+
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StaticFetcher(BaseFetcher):
+    """返回固定页面的备用后端，用于代替浏览器"""
+
+    backend = "static"
+
+    def __init__(self, html: str):
+        self.html = html
+        self.calls = 0
+
+    def fetch(self, url: str) -> FetchResult:
+        self.calls += 1
+        return FetchResult(url=url, html=self.html, status_code=200, backend=self.backend)
+
+
+class FakeDriver:
+    """模拟 WebDriver：就绪检测脚本直接返回预设的页面状态"""
+
+    def __init__(self, state, html: str = "<html></html>"):
+        self.state = state
+        self.page_source = html
+        self.script_timeout = None
+
+    def get(self, url: str):
+        self.url = url
+
+    def set_script_timeout(self, timeout: float):
+        self.script_timeout = timeout
+
+    def execute_async_script(self, script: str, *args):
+        return self.state
+
+
+def start_server():
+    with open(FIXTURE_PATH, "rb") as f:
+        FixtureHandler.fixture = f.read()
+    FixtureHandler.connections = set()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def test_http_fetcher_reuses_connection():
+    """HTTP 后端应返回完整页面并复用同一个 keep-alive 连接"""
+    server, base_url = start_server()
+    fetcher = HttpFetcher(user_agent="test-agent", max_retries=0)
+    try:
+        results = [fetcher.fetch(f"{base_url}/s?k=laptop&page={page}") for page in range(1, 4)]
+    finally:
+        fetcher.close()
+        server.shutdown()
+
+    assert all(result.status_code == 200 and not result.blocked for result in results)
+    assert len(SearchPageParser().parse(results[0].html)) == 48
+    assert len(FixtureHandler.connections) == 1
+
+
+def test_fallback_on_captcha():
+    """遇到验证码页面时才升级到备用后端"""
+    server, base_url = start_server()
+    fallback = StaticFetcher(FixtureHandler.fixture.decode("utf-8"))
+    fetcher = FallbackFetcher(HttpFetcher(user_agent="test-agent", max_retries=0), fallback)
+    try:
+        normal = fetcher.fetch(f"{base_url}/s?k=laptop")
+        escalated = fetcher.fetch(f"{base_url}/captcha")
+    finally:
+        fetcher.close()
+        server.shutdown()
+
+    assert normal.backend == "http"
+    assert escalated.backend == "static"
+    assert fallback.calls == 1
+
+
+def test_is_blocked_page():
+    assert is_blocked_page(CAPTCHA_HTML)
+    assert is_blocked_page("", status_code=503)
+    assert not is_blocked_page("<html><body>ok</body></html>")
+
+
+def test_selenium_fetcher_uses_page_state():
+    """浏览器后端根据就绪检测结果判断拦截，不再等待固定超时"""
+    blocked = SeleniumFetcher(lambda: FakeDriver("blocked"), wait_timeout=3).fetch("https://www.amazon.com/s?k=a")
+    assert blocked.blocked and blocked.backend == "browser"
+
+    driver = FakeDriver("ready", "<html><body>ok</body></html>")
+    ready = SeleniumFetcher(lambda: driver, wait_timeout=3).fetch("https://www.amazon.com/s?k=a")
+    assert not ready.blocked and ready.html.endswith("ok</body></html>")
+    assert driver.script_timeout == 8
+
+    # 无法识别的返回值按超时处理，仍以页面内容判断是否被拦截
+    timeout = SeleniumFetcher(lambda: FakeDriver(None, CAPTCHA_HTML)).fetch("https://www.amazon.com/s?k=a")
+    assert timeout.blocked
+
+if __name__ == "__main__":
+    test_http_fetcher_reuses_connection()
+    test_fallback_on_captcha()
+    test_is_blocked_page()
+    test_selenium_fetcher_uses_page_state()
+    print("✅ 页面获取后端测试通过")
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+列式筛选引擎测试脚本
+"""
+
+import math
+
+from amazon_crawler import AmazonCrawler
+from filter_engine import ProductFrame, parse_count, parse_number
+from marketplace import get_marketplace
+from page_parser import parse_search_page
+from test_page_parser import load_fixture
+
+
+def test_parse_helpers():
+    """价格、评分、评论数解析，无法解析时返回 NaN"""
+    assert parse_number("S$1,293.26") == 1293.26
+    assert parse_number("$19.99") == 19.99
+    assert parse_number("4.5") == 4.5
+    assert math.isnan(parse_number("N/A"))
+    assert math.isnan(parse_number(None))
+    assert parse_count("1,181") == 1181
+    assert parse_count("(1.2K)") == 1200
+    assert math.isnan(parse_count("N/A"))
+
+
+def test_vectorized_matches_per_product():
+    """向量化筛选与逐个商品筛选的结果一致，且无法解析的值不被过滤"""
+    products = parse_search_page(load_fixture())
+    products.append({"商品名称": "无价格商品", "价格": "N/A", "评分": "N/A", "评论数": "N/A"})
+    crawler = AmazonCrawler.__new__(AmazonCrawler)
+    crawler.marketplace = get_marketplace("sg")
+    filters = {"min_price": 200, "max_price": 800, "min_rating": 4.0, "min_reviews": 10, "min_store_rating": 0}
+
+    expected = [product for product in products if crawler._meets_criteria(product, filters)]
+    assert crawler.filter_products(products, filters) == expected
+    assert crawler.filter_products(iter(products), filters) == expected
+    assert expected and len(expected) < len(products)
+    assert expected[-1]["商品名称"] == "无价格商品"
+
+    frame = ProductFrame(products)
+    assert frame.filter(filters, limit=2) == expected[:2]
+    assert list(frame.to_frame().columns) == ["price", "store_rating", "rating", "reviews"]
+
+
+if __name__ == "__main__":
+    test_parse_helpers()
+    test_vectorized_matches_per_product()
+    print("✅ 列式筛选引擎测试通过")
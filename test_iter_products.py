@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+惰性爬取接口测试脚本（使用回放缓存，无需浏览器和网络）
+"""
+
+from amazon_crawler import AmazonCrawler, build_search_url
+from page_cache import PageCache
+from test_page_parser import load_fixture
+
+
+def make_crawler(tmp_path, pages: int = 3) -> AmazonCrawler:
+    """创建一个只回放缓存的爬虫，缓存中有 pages 页相同的搜索结果"""
+    cache = PageCache(str(tmp_path))
+    page_html = load_fixture()
+    for page in range(1, pages + 1):
+        cache.put(build_search_url("laptop", page), page_html)
+    return AmazonCrawler(cache=cache, cache_mode="replay")
+
+
+def test_target_count_stops_early(tmp_path):
+    """达到目标数量后不再获取后续页面"""
+    crawler = make_crawler(tmp_path)
+    try:
+        products = list(crawler.iter_products("laptop", max_pages=3, target_count=50))
+        assert len(products) == 50
+        assert crawler.fetcher.hits == 2
+    finally:
+        crawler.close()
+        # 调用方传入的缓存不随爬虫关闭
+        crawler.fetcher.cache.close()
+
+
+def test_filter_products_consumes_lazily(tmp_path):
+    """filter_products 消费生成器时，筛选数量达到 limit 后停止爬取"""
+    crawler = make_crawler(tmp_path)
+    try:
+        filters = {"min_rating": 4.0}
+        matched_per_page = len(crawler.filter_products(crawler.search_products("laptop", max_pages=1), filters))
+        hits_before = crawler.fetcher.hits
+
+        products = crawler.filter_products(crawler.iter_products("laptop", max_pages=3), filters,
+                                           limit=matched_per_page + 1)
+        assert len(products) == matched_per_page + 1
+        # 与 _meets_criteria 一致：无法解析的评分不参与筛选
+        assert all(product["评分"] == "N/A" or float(product["评分"]) >= 4.0 for product in products)
+        assert crawler.fetcher.hits - hits_before == 2
+    finally:
+        crawler.close()
+        crawler.fetcher.cache.close()
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    for test in (test_target_count_stops_early, test_filter_products_consumes_lazily):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(pathlib.Path(tmp))
+    print("✅ 惰性爬取接口测试通过")
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+站点定义与多站点爬取测试脚本
+"""
+
+import pytest
+
+from amazon_crawler import build_search_url, search_marketplaces
+from async_engine import AsyncCrawlEngine
+from filter_engine import ProductFrame, parse_count, parse_number, product_matches
+from marketplace import Marketplace, get_marketplace, number_separators
+from page_cache import PageCache
+from page_parser import build_product
+from product import Product
+from query_planner import plan_query
+from test_fetcher import start_server
+from test_page_parser import load_fixture
+
+
+def test_marketplace_urls():
+    """搜索 URL 和相对链接都基于站点域名"""
+    sg = get_marketplace("sg")
+    assert get_marketplace("www.amazon.sg") is sg and get_marketplace(sg) is sg
+    assert sg.search_url("gaming laptop", 2) == "https://www.amazon.sg/s?k=gaming+laptop&page=2"
+    assert sg.absolute_url("/dp/B0TEST") == "https://www.amazon.sg/dp/B0TEST"
+    assert build_search_url("laptop") == "https://www.amazon.com/s?k=laptop"
+    assert sg.headers["Accept-Language"].startswith("en-SG")
+    with pytest.raises(ValueError):
+        get_marketplace("amazon.example")
+
+
+def test_de_number_format():
+    """amazon.de 的价格、评分、评论数按欧式格式（"1.299,99 €"）解析"""
+    assert number_separators("de") == number_separators("amazon.de") == (",", ".")
+    assert number_separators("sg") == number_separators(None) == (".", ",")
+    assert parse_number("1.299,99 €", ",", ".") == 1299.99
+    assert parse_number("4,5", ",", ".") == 4.5
+    assert parse_count("1.234", ",", ".") == 1234
+    assert parse_count("(1,2K)", ",", ".") == 1200
+
+    product = build_product(name="Laptop", url="/dp/B0DE", price="1.299,99 €", rating="4,5 von 5 Sternen",
+                            reviews="1.234", asin="B0DE", marketplace="de")
+    assert product["商品链接"] == "https://www.amazon.de/dp/B0DE" and product["评分"] == "4.5"
+    record = Product.from_dict(product)
+    assert (record.marketplace, record.price, record.rating, record.reviews) == ("amazon.de", 1299.99, 4.5, 1234)
+
+    cheap = dict(product, 价格="999,00 €")
+    filters = {"min_price": 1000, "min_reviews": 1000}
+    assert ProductFrame([product, cheap], marketplace="de").filter(filters) == [product]
+    assert product_matches(product, filters, "de") and not product_matches(cheap, filters, "de")
+
+
+def test_plan_query_per_marketplace():
+    """没有登记评分节点的站点在客户端筛选评分，检查点键区分站点"""
+    filters = {"max_price": 500, "min_rating": 4}
+    us = plan_query("laptop", filters)
+    sg = plan_query("laptop", filters, marketplace="sg")
+    assert "p_72" in us.params["rh"] and "min_rating" not in us.residual_filters
+    assert sg.params["rh"] == "p_36:-50000" and sg.residual_filters == {"max_price": 500, "min_rating": 4}
+    assert sg.url().startswith("https://www.amazon.sg/s?k=laptop&")
+    assert sg.checkpoint_key.startswith("amazon.sg/") and not us.checkpoint_key.startswith("amazon.com/")
+
+
+def test_search_marketplaces(tmp_path):
+    """同一关键词在多个站点上并发搜索"""
+    cache = PageCache(str(tmp_path / "cache"))
+    for code in ("us", "sg"):
+        cache.put(build_search_url("laptop", marketplace=code), load_fixture())
+    try:
+        results = search_marketplaces("laptop", ["us", "sg"], max_pages=1, cache=cache, cache_mode="replay")
+    finally:
+        cache.close()
+    assert {code: len(products) for code, products in results.items()} == {"us": 48, "sg": 48}
+
+
+def test_search_marketplaces_shared_cache(tmp_path):
+    """先结束的站点不会关闭其他站点仍在使用的共享缓存"""
+    cache = PageCache(str(tmp_path / "cache"))
+    # us 只缓存了 1 页，第 2 页未命中后立即结束；sg 还要继续回放 9 页
+    cache.put(build_search_url("laptop", marketplace="us"), load_fixture())
+    for page in range(1, 11):
+        cache.put(build_search_url("laptop", page, marketplace="sg"), load_fixture())
+    try:
+        results = search_marketplaces("laptop", ["us", "sg"], max_pages=10, cache=cache, cache_mode="replay")
+        assert cache.stats()["entries"] == 11
+    finally:
+        cache.close()
+    assert {code: len(products) for code, products in results.items()} == {"us": 48, "sg": 480}
+
+
+def test_async_engine_per_marketplace_budgets():
+    """异步引擎按站点分别限速，结果带上站点代码"""
+    server, base_url = start_server()
+    marketplaces = [
+        Marketplace("a", "127.0.0.1", "USD", "$", "en-US", base_url=base_url),
+        Marketplace("b", "localhost", "SGD", "S$", "en-SG", base_url=base_url.replace("127.0.0.1", "localhost")),
+    ]
+    engine = AsyncCrawlEngine(per_host_min_interval=0.01)
+    try:
+        results = engine.run(["laptop"], pages=2, marketplaces=marketplaces)
+    finally:
+        engine.close()
+        server.shutdown()
+
+    assert sorted((r.marketplace, r.page) for r in results) == [("a", 1), ("a", 2), ("b", 1), ("b", 2)]
+    assert all(len(r.products) == 48 for r in results)
+    assert len(engine.rate_limiter.rates()) == 2
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    test_marketplace_urls()
+    test_de_number_format()
+    test_plan_query_per_marketplace()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_search_marketplaces(pathlib.Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_search_marketplaces_shared_cache(pathlib.Path(tmp))
+    test_async_engine_per_marketplace_budgets()
+    print("✅ 站点测试通过")
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+爬取指标测试脚本（回放缓存页面和本地 HTTP 服务器，无需网络）
+"""
+
+import json
+import math
+import urllib.request
+
+from amazon_crawler import AmazonCrawler, build_search_url
+from dedup import ExactDeduper
+from fetcher import HttpFetcher
+from metrics import CrawlMetrics, counter_key, parse_counter_key
+from page_cache import PageCache
+from rate_limiter import AdaptiveRateLimiter, RateLimitedFetcher
+from test_fetcher import start_server
+from test_page_parser import load_fixture
+
+
+def test_crawler_records_phases(tmp_path):
+    """搜索和保存过程中记录各阶段耗时、计数、字段缺失和页面明细"""
+    cache = PageCache(str(tmp_path / "cache"))
+    for page in (1, 2):
+        cache.put(build_search_url("laptop", page), load_fixture())
+    crawler = AmazonCrawler(cache=cache, cache_mode="replay", deduper=ExactDeduper())
+    try:
+        products = crawler.search_products("laptop", max_pages=2, filters={"min_reviews": 10})
+        crawler.save_to_excel(products, str(tmp_path / "out.xlsx"))
+        summary = crawler.metrics.summary()
+    finally:
+        crawler.close()
+        cache.close()
+
+    phases = summary["phases"]
+    for phase in ("fetch", "fetch.cache_read", "parse", "dedup", "filter", "save"):
+        assert phase in phases, phase
+    assert phases["fetch"]["count"] == 2 and phases["save"]["count"] == 1
+    counters = summary["counters"]
+    assert counters["products_parsed"] == 48 and counters["duplicates"] == 0
+    assert counters["products_kept"] == len(products) and counters["rows_saved"] == len(products)
+    assert sum(value for key, value in counters.items() if key.startswith("pages{")) == 2
+    assert summary["fields"]["ASIN"] == {"hits": 48, "misses": 0, "miss_rate": 0.0}
+    assert "店铺评分" not in summary["fields"]
+    assert [(page["page"], page["products"]) for page in summary["pages"]] == [(1, 48), (2, 0)]
+    assert summary["collectors"]["page_cache"] == {"hits": 2, "misses": 0}
+    assert summary["collectors"]["dedup"] == {"seen": 48}
+    json.dumps(summary)
+
+
+def test_fetch_timings_and_errors():
+    """获取后端填写限速等待和请求耗时，计时块内的异常按阶段计数"""
+    server, base_url = start_server()
+    limiter = AdaptiveRateLimiter(initial_rate=math.inf, max_rate=math.inf)
+    fetcher = RateLimitedFetcher(HttpFetcher(user_agent="test-agent"), limiter)
+    try:
+        result = fetcher.fetch(f"{base_url}/s?k=laptop")
+    finally:
+        fetcher.close()
+        server.shutdown()
+        server.server_close()
+    assert set(result.timings) == {"rate_limit_wait", "http_get"}
+
+    metrics = CrawlMetrics()
+    metrics.observe_timings(result.timings)
+    try:
+        with metrics.timer("parse"):
+            raise ValueError("bad page")
+    except ValueError:
+        pass
+    summary = metrics.summary()
+    assert summary["phases"]["fetch.http_get"]["count"] == 1
+    assert summary["phases"]["parse"]["count"] == 1
+    assert summary["errors"] == {"parse": {"ValueError": 1}}
+
+
+def test_prometheus_export_and_merge():
+    """Prometheus 文本格式、HTTP 端点和多份汇总的合并"""
+    metrics = CrawlMetrics(prefix="crawler")
+    metrics.observe("fetch", 0.5)
+    metrics.incr("pages", backend="http")
+    metrics.record_fields([{"价格": "N/A"}, {"价格": "$1"}], ["价格"])
+    metrics.register("rate_limiter", lambda: {"www.amazon.com": {"rate": math.inf, "backoffs": 1}}, label="host")
+
+    text = metrics.to_prometheus()
+    assert 'crawler_phase_seconds_count{phase="fetch"} 1' in text
+    assert 'crawler_pages_total{backend="http"} 1' in text
+    assert 'crawler_field_misses_total{field="价格"} 1' in text
+    assert 'crawler_rate_limiter_rate{host="www.amazon.com"} +Inf' in text
+
+    key = counter_key("pages", backend='a"b')
+    assert parse_counter_key(key) == ("pages", {"backend": 'a"b'})
+
+    total = CrawlMetrics()
+    total.merge(metrics.summary())
+    total.merge(metrics.summary())
+    merged = total.summary()
+    assert merged["phases"]["fetch"]["count"] == 2 and merged["phases"]["fetch"]["max"] == 0.5
+    assert merged["counters"] == {'pages{backend="http"}': 2}
+    assert merged["fields"]["价格"]["miss_rate"] == 0.5
+
+    server = metrics.serve(0)
+    try:
+        port = server.server_address[1]
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+            assert "crawler_pages_total" in response.read().decode("utf-8")
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/summary") as response:
+            assert json.loads(response.read())["phases"]["fetch"]["count"] == 1
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        test_crawler_records_phases(pathlib.Path(tmp))
+    test_fetch_timings_and_errors()
+    test_prometheus_export_and_merge()
+    print("✅ 爬取指标测试通过")
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+页面缓存测试脚本
+"""
+
+import os
+import time
+
+import pytest
+
+from fetcher import BaseFetcher, FetchResult
+from page_cache import CacheMissError, CachingFetcher, PageCache
+
+
+class CountingFetcher(BaseFetcher):
+    """记录调用次数的获取后端"""
+
+    backend = "http"
+
+    def __init__(self):
+        self.calls = 0
+
+    def fetch(self, url: str) -> FetchResult:
+        self.calls += 1
+        return FetchResult(url=url, html=f"<html>{url} {'x' * 2000}</html>", status_code=200, backend=self.backend)
+
+
+def test_cache_hit_skips_fetch(tmp_path):
+    """同一 URL 第二次获取直接命中缓存"""
+    inner = CountingFetcher()
+    cache = PageCache(str(tmp_path))
+    fetcher = CachingFetcher(inner, cache)
+
+    first = fetcher.fetch("https://www.amazon.com/s?k=laptop")
+    second = fetcher.fetch("https://www.amazon.com/s?k=laptop")
+    fetcher.close()
+    # 调用方传入的缓存不随获取后端关闭
+    assert cache.stats()["entries"] == 1
+    cache.close()
+
+    assert inner.calls == 1
+    assert first.backend == "http"
+    assert second.backend == "cache"
+    assert second.html == first.html
+
+
+def test_ttl_expiry_and_replay(tmp_path):
+    """过期条目在普通模式下重新获取，回放模式下仍可读取"""
+    cache = PageCache(str(tmp_path), ttl=0.05)
+    cache.put("https://www.amazon.com/s?k=laptop", "<html>old</html>")
+    time.sleep(0.1)
+
+    assert cache.get("https://www.amazon.com/s?k=laptop") is None
+    replay = CachingFetcher(None, cache, mode="replay")
+    assert replay.fetch("https://www.amazon.com/s?k=laptop").html == "<html>old</html>"
+    with pytest.raises(CacheMissError):
+        replay.fetch("https://www.amazon.com/s?k=mouse")
+    cache.close()
+
+
+def test_lru_eviction(tmp_path):
+    """超过大小上限时淘汰最久未访问的页面"""
+    cache = PageCache(str(tmp_path), max_size_mb=0.003)  # 约 3KB，可容纳两个页面
+    for i in range(3):
+        cache.put(f"https://www.amazon.com/s?page={i}", f"<html>{os.urandom(1000).hex()}</html>")
+        time.sleep(0.01)
+        cache.get("https://www.amazon.com/s?page=0")  # 保持第 0 页为最近访问
+
+    assert cache.get("https://www.amazon.com/s?page=0") is not None
+    assert cache.get("https://www.amazon.com/s?page=1") is None
+    assert cache.stats()["size_bytes"] <= cache.max_bytes
+    cache.close()
+
+
+def test_crawler_replay(tmp_path):
+    """回放模式下爬虫直接从缓存读取搜索页，不启动浏览器、不发网络请求"""
+    from amazon_crawler import AmazonCrawler, build_search_url
+    from test_page_parser import load_fixture
+
+    cache = PageCache(str(tmp_path))
+    cache.put(build_search_url("laptop", 1), load_fixture())
+
+    crawler = AmazonCrawler(cache=cache, cache_mode="replay")
+    try:
+        start = time.perf_counter()
+        products = crawler.search_products("laptop", max_pages=1)
+        elapsed = time.perf_counter() - start
+    finally:
+        crawler.close()
+        cache.close()
+
+    assert len(products) == 48
+    assert crawler.driver is None
+    assert elapsed < 2
+
+
+if __name__ == "__main__":
+    import tempfile
+    for test in (test_cache_hit_skips_fetch, test_ttl_expiry_and_replay, test_lru_eviction, test_crawler_replay):
+        with tempfile.TemporaryDirectory() as tmp:
+            import pathlib
+            test(pathlib.Path(tmp))
+    print("✅ 页面缓存测试通过")
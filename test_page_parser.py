@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+离线解析器测试脚本（使用保存的搜索结果页，无需浏览器和网络）
+"""
+
+import os
+
+from page_parser import PRODUCT_FIELDS, SearchPageParser
+
+FIXTURE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "docs", "Amazon.sg _ laptop.html")
+
+
+def load_fixture() -> str:
+    with open(FIXTURE_PATH, encoding="utf-8") as f:
+        return f.read()
+
+
+def test_parse_fixture_page():
+    """解析保存的搜索结果页，检查商品数量和字段结构"""
+    products, has_next = SearchPageParser().parse_page(load_fixture())
+
+    assert len(products) == 48
+    assert has_next
+    assert all(list(product.keys()) == PRODUCT_FIELDS for product in products)
+
+    first = products[0]
+    assert first["ASIN"] == "B0D5HZVQDL"
+    assert first["价格"] == "S$293.26"
+    assert first["评分"] == "4.3"
+    assert first["评论数"] == "181"
+    assert first["商品名称"].startswith("Lenovo IdeaPad Slim 3 Chromebook")
+    assert first["商品链接"].startswith("https://www.amazon.sg/")
+    assert first["配送信息"] == "FREE delivery Tue, 15 Jul"
+
+
+def test_engines_agree():
+    """lxml 与 BeautifulSoup 两种引擎的解析结果应一致"""
+    page_html = load_fixture()
+    assert SearchPageParser("lxml").parse(page_html) == SearchPageParser("bs4").parse(page_html)
+
+
+def test_empty_page():
+    """空页面不应报错"""
+    assert SearchPageParser().parse_page("") == ([], False)
+    assert SearchPageParser().parse("<html><body></body></html>") == []
+
+
+if __name__ == "__main__":
+    test_parse_fixture_page()
+    test_engines_agree()
+    test_empty_page()
+    print("✅ 离线解析器测试通过")
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多进程解析池测试脚本（使用保存的搜索结果页和本地 HTTP 服务，无需网络）
+"""
+
+from async_engine import AsyncCrawlEngine
+from fetcher import HttpFetcher
+from page_parser import SearchPageParser
+from parse_pool import ParsePool
+from test_fetcher import start_server
+from test_page_parser import load_fixture
+
+
+def test_pool_matches_inline_parser():
+    """共享内存和直接传递两种方式的解析结果都与单线程解析一致，共享内存用完即释放"""
+    page_html = load_fixture()
+    expected, expected_next = SearchPageParser(marketplace="sg").parse_batch(page_html)
+    skip = {expected.text["asin"][0]}
+
+    with ParsePool(workers=2, shm_threshold=0) as pool:
+        futures = [pool.submit(page_html, "sg") for _ in range(4)]
+        results = [future.result() for future in futures]
+        skipped, _ = pool.parse_page(page_html, "sg", skip_asins=skip)
+        assert pool._segments == {}
+    for batch, has_next in results:
+        assert batch.to_dicts() == expected.to_dicts() and has_next == expected_next
+    assert len(skipped) == len(expected) - 1
+
+    with ParsePool(workers=1, shm_threshold=len(page_html.encode("utf-8")) + 1) as pool:
+        batch, has_next = pool.parse_page(page_html, "sg")
+        empty, empty_next = pool.parse_page("")
+    assert batch.to_dicts() == expected.to_dicts() and has_next
+    assert len(empty) == 0 and not empty_next
+
+
+def test_async_engine_parses_in_pool():
+    """异步引擎只在线程中获取页面，解析交给进程池，结果为 ProductBatch"""
+    server, base_url = start_server()
+    fetcher = HttpFetcher(user_agent="test-agent", max_retries=0)
+    engine = AsyncCrawlEngine(
+        fetcher=fetcher,
+        concurrency=4,
+        per_host_min_interval=0,
+        url_builder=lambda keyword, page: f"{base_url}/captcha" if page == 3 else f"{base_url}/s?k={keyword}&page={page}",
+        parse_workers=2,
+    )
+    try:
+        results = engine.run(["laptop", "mouse"], pages=2)
+        blocked = engine.run(["laptop"], pages=[3])
+    finally:
+        engine.close()
+        fetcher.close()
+        server.shutdown()
+
+    assert engine.parse_pool is None
+    assert sorted((r.keyword, r.page) for r in results) == [("laptop", 1), ("laptop", 2), ("mouse", 1), ("mouse", 2)]
+    assert all(r.error is None and r.products == [] and r.count == 48 for r in results)
+    assert all(r.batch.column("price").shape == (48,) for r in results)
+    assert blocked[0].error == "blocked" and blocked[0].batch is None
+
+
+if __name__ == "__main__":
+    test_pool_matches_inline_parser()
+    test_async_engine_parses_in_pool()
+    print("✅ 多进程解析池测试通过")
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+紧凑商品记录测试脚本
+"""
+
+import math
+
+from page_parser import SearchPageParser, parse_search_page
+from product import Product, ProductBatch
+from test_page_parser import load_fixture
+
+
+def test_product_round_trip():
+    """数值字段解析为 float，to_dict 导出原来的中文列名"""
+    product = Product.from_dict({
+        "商品名称": "Laptop", "商品链接": "https://www.amazon.sg/dp/B0TEST", "价格": "S$1,293.26",
+        "评分": "4.5", "评论数": "1181", "ASIN": "B0TEST", "图片URL": "N/A", "促销信息": "N/A",
+        "配送信息": "N/A", "店铺名称": "Amazon", "店铺评分": "N/A",
+    })
+    assert product.price == 1293.26 and product.currency == "S$"
+    assert product.rating == 4.5 and product.reviews == 1181
+    assert math.isnan(product.store_rating)
+    assert product.marketplace == "amazon.sg"
+    assert product.to_dict()["价格"] == "S$1,293.26"
+    assert product.to_dict()["评论数"] == "1181"
+    assert product.to_dict()["图片URL"] == "N/A"
+    assert not hasattr(product, "__dict__")
+
+
+def test_de_price_round_trip():
+    """货币符号在后、逗号作小数点的站点，导出的价格保持站点格式，重新筛选结果不变"""
+    from filter_engine import ProductFrame, product_matches
+    from marketplace import get_marketplace
+
+    original = {"价格": "1.299,99 €", "商品链接": "https://www.amazon.de/dp/B0TEST"}
+    product = Product.from_dict(original)
+    assert product.price == 1299.99 and product.currency == "€"
+    exported = product.to_dict()
+    assert exported["价格"] == "1.299,99 €"
+    assert ProductBatch.from_dicts([original]).to_dicts() == [exported]
+
+    de = get_marketplace("de")
+    for record in (original, exported):
+        assert product_matches(record, {"min_price": 1000}, de)
+        assert len(ProductFrame([record], marketplace=de).filter({"min_price": 1000})) == 1
+
+
+def test_batch_from_fixture():
+    """整页商品转换为列式批次，导出结果与原始字典一致"""
+    products = parse_search_page(load_fixture())
+    batch, has_next = SearchPageParser().parse_batch(load_fixture())
+    assert has_next and len(batch) == len(products)
+
+    for original, exported in zip(products, batch.to_dicts()):
+        assert exported["ASIN"] == original["ASIN"]
+        assert exported["评论数"] == original["评论数"]
+        if original["价格"] != "N/A":
+            assert Product.from_dict(exported).price == Product.from_dict(original).price
+
+    frame = batch.to_frame()
+    assert frame["价格"].dtype == "float64"
+    assert len(frame) == len(products)
+
+    cheap = batch.filter({"max_price": 500})
+    assert 0 < len(cheap) < len(batch)
+    assert all(math.isnan(p.price) or p.price <= 500 for p in cheap)
+
+    merged = ProductBatch()
+    merged.extend(batch)
+    merged.extend(cheap)
+    assert len(merged) == len(batch) + len(cheap)
+
+
+if __name__ == "__main__":
+    test_product_round_trip()
+    test_de_price_round_trip()
+    test_batch_from_fixture()
+    print("✅ 紧凑商品记录测试通过")
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+本地商品库测试脚本
+"""
+
+import os
+
+from amazon_crawler import AmazonCrawler
+from marketplace import get_marketplace
+from page_parser import parse_search_page
+from product_store import ProductStore
+from sinks import create_sink
+from test_page_parser import load_fixture
+
+
+def test_upsert_writes_only_deltas(tmp_path):
+    """重复写入相同商品只更新出现时间，价格变化时追加历史记录"""
+    products = parse_search_page(load_fixture())
+    with_asin = [p for p in products if p["ASIN"] != "N/A"]
+    store = ProductStore(str(tmp_path / "products.db"))
+    try:
+        first = store.upsert(products, keyword="laptop", seen_at=1000)
+        assert first["inserted"] == len({p["ASIN"] for p in with_asin})
+        assert first["skipped"] == len(products) - len(with_asin)
+
+        second = store.upsert(products, keyword="notebook", seen_at=2000)
+        assert second["inserted"] == 0 and second["updated"] == 0 and second["history"] == 0
+
+        changed = dict(with_asin[0], 价格="S$1.00")
+        third = store.upsert([changed], keyword="laptop", seen_at=3000)
+        assert third["updated"] == 1 and third["history"] == 1
+
+        history = store.history(changed["ASIN"])
+        assert [h["seen_at"] for h in history] == [1000, 3000]
+        assert history[-1]["price"] == 1.0
+        assert store.keywords(changed["ASIN"]) == ["laptop", "notebook"]
+        assert store.count(seen_since=2500) == 1
+    finally:
+        store.close()
+
+
+def test_query_matches_filter_products(tmp_path):
+    """SQL 筛选与内存筛选的结果一致（缺失值不参与筛选）"""
+    products = [p for p in parse_search_page(load_fixture()) if p["ASIN"] != "N/A"]
+    products = list({p["ASIN"]: p for p in products}.values())
+    filters = {"min_price": 200, "max_price": 800, "min_rating": 4.0}
+    crawler = AmazonCrawler.__new__(AmazonCrawler)
+    crawler.marketplace = get_marketplace("sg")
+    expected = {p["ASIN"] for p in crawler.filter_products(products, filters)}
+
+    path = str(tmp_path / "products.db")
+    with create_sink(path, keyword="laptop") as sink:
+        sink.write(products)
+    assert os.path.exists(path)
+
+    with ProductStore(path) as store:
+        assert {p["ASIN"] for p in crawler.filter_products(store, filters)} == expected
+        assert {p["ASIN"] for p in store.query(filters, keyword="laptop")} == expected
+        assert store.query(filters, keyword="mouse") == []
+        prices = [p.price for p in store.query_products(filters, order_by="price") if p.price == p.price]
+        assert prices == sorted(prices)
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    for test in (test_upsert_writes_only_deltas, test_query_matches_filter_products):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(pathlib.Path(tmp))
+    print("✅ 本地商品库测试通过")
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+性能剖析测试脚本（以回放模式剖析样例页面，无需网络）
+"""
+
+import os
+import tracemalloc
+
+import pytest
+
+from profiling import Profiler, parse_modes, profile_replay
+from test_page_parser import FIXTURE_PATH
+
+
+def test_parse_modes():
+    """剖析方式去重，未知方式抛出 ValueError"""
+    assert parse_modes("cpu, memory,cpu") == ("cpu", "memory")
+    assert parse_modes(["sample"]) == ("sample",)
+    with pytest.raises(ValueError):
+        parse_modes("gpu")
+
+
+def test_profile_replay_writes_reports(tmp_path):
+    """回放样例页面时写出 cProfile、折叠栈和内存分配报告"""
+    outputs = profile_replay("laptop", [FIXTURE_PATH], filters={"min_rating": 4}, repeat=3,
+                             output_dir=str(tmp_path), modes="cpu,sample,memory")
+    assert sorted(outputs) == ["cpu", "cpu_top", "memory_top", "samples", "samples_top"]
+    assert all(os.path.exists(path) for path in outputs.values())
+
+    with open(outputs["cpu_top"], encoding="utf-8") as f:
+        assert "parse_page" in f.read()
+    with open(outputs["samples"], encoding="utf-8") as f:
+        for line in f:
+            stack, count = line.rsplit(" ", 1)
+            assert stack.startswith("MainThread;") and int(count) > 0
+    with open(outputs["memory_top"], encoding="utf-8") as f:
+        assert f.readline().startswith("内存峰值")
+    with pytest.raises(ValueError):
+        profile_replay("laptop", [FIXTURE_PATH], repeat=0, output_dir=str(tmp_path))
+
+
+def test_profiler_keeps_callers_tracemalloc(tmp_path):
+    """调用方已经开启 tracemalloc 时，剖析结束后不关闭"""
+    tracemalloc.start()
+    try:
+        with Profiler(str(tmp_path), modes="memory"):
+            data = [str(i) for i in range(1000)]
+        assert tracemalloc.is_tracing() and data
+    finally:
+        tracemalloc.stop()
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    test_parse_modes()
+    for test in (test_profile_replay_writes_reports, test_profiler_keeps_callers_tracemalloc):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(pathlib.Path(tmp))
+    print("✅ 性能剖析测试通过")
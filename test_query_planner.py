@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+搜索查询规划测试脚本
+"""
+
+import math
+from urllib.parse import parse_qs, urlsplit
+
+from amazon_crawler import AmazonCrawler, build_search_url
+from filter_engine import parse_number
+from page_cache import PageCache
+from query_planner import plan_query
+from test_page_parser import load_fixture
+
+
+def test_plan_pushes_down_supported_filters():
+    """价格和整数星级下推为 URL 参数，其余条件保留在客户端"""
+    plan = plan_query("gaming laptop", {"min_price": 100, "max_price": 499.99, "min_rating": 4,
+                                        "min_reviews": 50, "min_store_rating": 0},
+                      department="computers", sort="price_low")
+    query = parse_qs(urlsplit(plan.url(2)).query)
+    assert query["k"] == ["gaming laptop"]
+    assert query["rh"] == ["p_36:10000-49999,p_72:1248882011"]
+    assert query["i"] == ["computers"] and query["s"] == ["price-asc-rank"] and query["page"] == ["2"]
+    # 价格下推后仍在客户端复核
+    assert plan.residual_filters == {"min_price": 100, "max_price": 499.99, "min_reviews": 50}
+
+
+def test_plan_partial_rating_and_no_filters():
+    """非整数评分下推为向下取整的星级并保留在客户端；没有条件时 URL 不变"""
+    plan = plan_query("laptop", {"max_price": 50, "min_rating": 4.5})
+    assert parse_qs(urlsplit(plan.url()).query)["rh"] == ["p_36:-5000,p_72:1248882011"]
+    assert plan.residual_filters == {"max_price": 50, "min_rating": 4.5}
+
+    plain = plan_query("laptop")
+    assert plain.url(3) == build_search_url("laptop", 3)
+    assert plain.checkpoint_key == "laptop" and plan.checkpoint_key != "laptop"
+
+
+def test_search_products_uses_planned_url(tmp_path):
+    """search_products 请求带筛选参数的 URL，只在客户端应用剩余条件"""
+    filters = {"max_price": 400, "min_reviews": 10}
+    cache = PageCache(str(tmp_path))
+    cache.put(plan_query("laptop", filters).url(1), load_fixture())
+    crawler = AmazonCrawler(cache=cache, cache_mode="replay")
+    try:
+        products = crawler.search_products("laptop", max_pages=1, filters=filters)
+    finally:
+        crawler.close()
+        cache.close()
+
+    assert crawler.fetcher.hits == 1
+    assert products and all(int(p["评论数"]) >= 10 for p in products if p["评论数"] != "N/A")
+    # 回放的页面没有经过服务端价格筛选，超出价格区间的商品由客户端复核去掉
+    prices = [parse_number(p["价格"]) for p in products]
+    assert all(price <= 400 for price in prices if not math.isnan(price))
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    test_plan_pushes_down_supported_filters()
+    test_plan_partial_rating_and_no_filters()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_search_products_uses_planned_url(pathlib.Path(tmp))
+    print("✅ 搜索查询规划测试通过")
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+自适应限速测试脚本（使用本地 HTTP 服务，无需网络）
+"""
+
+import time
+
+import pytest
+from selenium.common.exceptions import TimeoutException
+
+from fetcher import BaseFetcher, HttpFetcher
+from rate_limiter import AdaptiveRateLimiter, RateLimitedFetcher
+from test_fetcher import start_server
+
+
+def test_aimd_adjusts_rate_per_host():
+    """正常响应加性提速，拦截时乘性降速，不同主机互不影响"""
+    limiter = AdaptiveRateLimiter(initial_rate=1.0, min_rate=0.1, max_rate=1.2,
+                                  increase=0.1, decrease=0.5, slow_page_seconds=5, jitter=0)
+    url = "https://www.amazon.com/s?k=laptop"
+    for _ in range(5):
+        limiter.record(url)
+    assert limiter.rate(url) == 1.2
+
+    limiter.record(url, status_code=503)
+    assert limiter.rate(url) == 0.6
+    limiter.record(url, blocked=True)
+    limiter.record(url, elapsed=10)
+    limiter.record(url, failed=True)
+    assert limiter.rate(url) == 0.1
+
+    assert limiter.rate("https://www.amazon.sg/s?k=laptop") == 1.0
+    stats = limiter.stats()["www.amazon.com"]
+    assert stats["healthy"] == 5 and stats["backoffs"] == 4
+
+
+def test_rate_limited_fetcher_paces_and_backs_off():
+    """请求按令牌桶间隔发出，验证码页面使该主机降速"""
+    server, base_url = start_server()
+    limiter = AdaptiveRateLimiter(initial_rate=20, max_rate=20, jitter=0)
+    fetcher = RateLimitedFetcher(HttpFetcher(user_agent="test-agent", max_retries=0), limiter)
+    try:
+        start = time.perf_counter()
+        for page in range(1, 5):
+            assert not fetcher.fetch(f"{base_url}/s?page={page}").blocked
+        assert time.perf_counter() - start >= 3 * 0.05
+
+        assert fetcher.fetch(f"{base_url}/captcha").blocked
+        assert limiter.rate(base_url) == 10
+    finally:
+        fetcher.close()
+        server.shutdown()
+
+
+class TimeoutFetcher(BaseFetcher):
+    """模拟浏览器加载超时的获取后端"""
+
+    backend = "selenium"
+
+    def fetch(self, url):
+        raise TimeoutException("page load timed out")
+
+
+def test_browser_errors_back_off():
+    """浏览器超时等 WebDriverException 同样计为失败并降速"""
+    limiter = AdaptiveRateLimiter(initial_rate=4, max_rate=4, decrease=0.5, jitter=0)
+    fetcher = RateLimitedFetcher(TimeoutFetcher(), limiter)
+    url = "https://www.amazon.com/s?k=laptop"
+    with pytest.raises(TimeoutException):
+        fetcher.fetch(url)
+    assert limiter.rate(url) == 2
+    assert limiter.stats()["www.amazon.com"]["backoffs"] == 1
+
+
+if __name__ == "__main__":
+    test_aimd_adjusts_rate_per_host()
+    test_rate_limited_fetcher_paces_and_backs_off()
+    test_browser_errors_back_off()
+    print("✅ 自适应限速测试通过")
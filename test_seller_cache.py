@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+卖家信息缓存测试脚本
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from seller_cache import SellerCache
+
+
+def test_ttl_and_persistence(tmp_path):
+    """写入后重新打开仍能读取，过期的记录视为不存在"""
+    path = str(tmp_path / "sellers.db")
+    with SellerCache(path, ttl=3600) as cache:
+        cache.put("A1", "amazon.com", 4.6, "TechStore")
+        cache.put("A2", "amazon.com", None, "NoRating")
+        cache.put("OLD", "amazon.com", 4.0, fetched_at=time.time() - 7200)
+
+    with SellerCache(path, ttl=3600) as cache:
+        profiles = cache.get_many(["A1", "A2", "OLD", "MISSING"], "amazon.com")
+        assert sorted(profiles) == ["A1", "A2"]
+        assert profiles["A1"].rating == 4.6 and profiles["A1"].name == "TechStore"
+        assert profiles["A2"].rating is None
+        assert cache.get("A1", "amazon.sg") is None
+        assert cache.clear_expired() == 1
+
+
+def test_inflight_coalescing(tmp_path):
+    """多个线程同时查询同一个卖家时只获取一次，失败的结果不会被缓存"""
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.2)
+        return 4.8
+
+    with SellerCache(str(tmp_path / "sellers.db")) as cache:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            ratings = list(executor.map(lambda _: cache.get_or_fetch("A1", "amazon.com", fetch).rating, range(8)))
+        assert ratings == [4.8] * 8
+        assert len(calls) == 1
+        assert cache.stats["fetches"] == 1 and cache.stats["coalesced"] + cache.stats["hits"] == 7
+
+        def fail():
+            raise RuntimeError("blocked")
+        with pytest.raises(RuntimeError):
+            cache.get_or_fetch("A2", "amazon.com", fail)
+        assert cache.get_or_fetch("A2", "amazon.com", lambda: 3.9).rating == 3.9
+
+
+def test_waits_for_other_process(tmp_path):
+    """其他进程已认领的卖家不会重复获取，而是等待其写入结果"""
+    path = str(tmp_path / "sellers.db")
+    other = SellerCache(path)
+    cache = SellerCache(path, poll_interval=0.05)
+    assert other._claim(("amazon.com", "A1"), time.time())
+    timer = threading.Timer(0.3, lambda: other.put("A1", "amazon.com", 4.2))
+    timer.start()
+    try:
+        profile = cache.get_or_fetch("A1", "amazon.com", lambda: 1.0)
+    finally:
+        timer.join()
+        other.close()
+        cache.close()
+    assert profile.rating == 4.2
+
+
+def test_reclaims_when_other_process_fails(tmp_path):
+    """其他进程获取失败并删除认领后立即重新认领，不必等到认领超时"""
+    path = str(tmp_path / "sellers.db")
+    other = SellerCache(path)
+    cache = SellerCache(path, claim_timeout=60, poll_interval=0.05)
+    started = threading.Event()
+    errors = []
+
+    def failing_fetch():
+        started.set()
+        time.sleep(0.3)
+        raise RuntimeError("blocked")
+
+    def other_process():
+        with pytest.raises(RuntimeError):
+            other.get_or_fetch("A1", "amazon.com", failing_fetch)
+        errors.append("failed")
+
+    thread = threading.Thread(target=other_process)
+    thread.start()
+    try:
+        assert started.wait(5)
+        start = time.time()
+        profile = cache.get_or_fetch("A1", "amazon.com", lambda: 4.4)
+        elapsed = time.time() - start
+    finally:
+        thread.join()
+        other.close()
+        cache.close()
+    assert errors == ["failed"]
+    assert profile.rating == 4.4 and cache.stats["fetches"] == 1
+    assert elapsed < 5
+
+
+def test_enricher_fetches_each_seller_once(tmp_path):
+    """补全时同一个卖家的主页只获取一次"""
+    from test_enrichment import FakeFetcher, make_enricher
+
+    fetcher = FakeFetcher()
+    cache = SellerCache(str(tmp_path / "sellers.db"))
+    enricher = make_enricher(fetcher, seller_cache=cache)
+    products = [{"ASIN": f"B{i:09d}", "商品链接": f"https://www.amazon.com/dp/B{i:09d}"} for i in range(20)]
+    try:
+        enriched = list(enricher.enrich(products))
+    finally:
+        enricher.close()
+    # 关闭补全不会关闭传入的卖家缓存
+    try:
+        assert cache.get("A1SELLER", "amazon.com").rating == 4.6
+    finally:
+        cache.close()
+
+    assert all(product["店铺评分"] == "4.6" for product in enriched)
+    assert sum("/sp?" in url for url in fetcher.urls) == 1
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    for test in (test_ttl_and_persistence, test_inflight_coalescing, test_waits_for_other_process,
+                 test_reclaims_when_other_process_fails, test_enricher_fetches_each_seller_once):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(pathlib.Path(tmp))
+    print("✅ 卖家缓存测试通过")
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+流式导出测试脚本
+"""
+
+import csv
+import json
+
+import pytest
+
+from page_parser import PRODUCT_FIELDS, SearchPageParser
+from sinks import create_sink
+from test_page_parser import load_fixture
+
+
+def fixture_pages():
+    products = SearchPageParser().parse(load_fixture())
+    return [products[:24], products[24:]]
+
+
+@pytest.mark.parametrize("extension", [".jsonl", ".csv", ".xlsx", ".parquet"])
+def test_sink_round_trip(tmp_path, extension):
+    """逐页写入后读回的商品与原始数据一致"""
+    if extension == ".parquet":
+        pytest.importorskip("pyarrow")
+    pages = fixture_pages()
+    path = str(tmp_path / f"products{extension}")
+
+    with create_sink(path) as sink:
+        for page in pages:
+            sink.write(page)
+
+    if extension == ".jsonl":
+        with open(path, encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f]
+    elif extension == ".csv":
+        with open(path, encoding="utf-8", newline="") as f:
+            rows = list(csv.DictReader(f))
+    elif extension == ".xlsx":
+        from openpyxl import load_workbook
+        sheet = load_workbook(path, read_only=True).active
+        header, *body = list(sheet.values)
+        rows = [dict(zip(header, values)) for values in body]
+    else:
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(path)
+        rows = parquet_file.read().to_pylist()
+
+    assert rows == pages[0] + pages[1]
+    assert list(rows[0].keys()) == PRODUCT_FIELDS
+
+
+def test_jsonl_partial_output(tmp_path):
+    """每写完一页立即可以读到部分结果"""
+    path = str(tmp_path / "products.jsonl")
+    sink = create_sink(path)
+    sink.write(fixture_pages()[0])
+    with open(path, encoding="utf-8") as f:
+        assert len(f.readlines()) == 24
+    sink.close()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])